@@ -0,0 +1,184 @@
+"""Benchmark the hot paths of the transformer on synthetic data, offline and reproducibly.
+
+    python -m benchmark.run --rows 100000 --contracts 50 --complexity mixed --nb-workers 1 4
+
+Every (stage, nb_workers) runs in a fresh process, so that its peak RSS is its own. The results are appended to a
+json lines file with the commit, and compared with the last result of the same case to show the regressions.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+current_file_dir = os.path.dirname(__file__)
+sys.path.append(os.path.join(current_file_dir, '..'))
+
+from benchmark.synthetic import SyntheticChain
+from pandas3 import Transformer
+
+STAGES = ['traces', 'logs', 'assemble']
+
+CASE_KEYS = ['stage', 'rows', 'contracts', 'complexity', 'undecodable_ratio', 'unknown_ratio', 'distinct_ratio',
+             'nb_workers', 'backend']
+
+
+def _peak_rss_mb() -> float:
+    # kilobytes on linux
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(self_rss, children_rss) / 1024
+
+
+def _run_stage(case: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Run a stage `repeat` times in the current process, the best time is kept."""
+    logging.getLogger('Transformer').setLevel(logging.ERROR)
+    chain = SyntheticChain(
+        rows=case['rows'],
+        contracts=case['contracts'],
+        complexity=case['complexity'],
+        undecodable_ratio=case['undecodable_ratio'],
+        unknown_ratio=case['unknown_ratio'],
+        distinct_ratio=case['distinct_ratio']
+    )
+    # offline, the unknown contracts are never fetched from etherscan
+    transformer = Transformer(nb_workers=case['nb_workers'], backend=case['backend'], init_abi_map=chain.abi_map,
+                              fetch_abis=False)
+    df = chain.logs() if case['stage'] == 'logs' else chain.traces()
+    base_rss_mb = _peak_rss_mb()
+
+    timings = []
+    for _ in range(repeat):
+        if case['stage'] == 'assemble':
+            timings.append(_time_assemble(transformer, df.copy()))
+            continue
+        to_func_call_df = transformer.logs_to_func_call_df if case['stage'] == 'logs' \
+            else transformer.traces_to_func_call_df
+        start = time.perf_counter()
+        to_func_call_df(df=df.copy())
+        timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+    return {
+        'seconds': seconds,
+        'rows_per_second': case['rows'] / seconds,
+        'peak_rss_mb': _peak_rss_mb(),
+        'base_rss_mb': base_rss_mb,
+        'failures': transformer.failures.total // repeat
+    }
+
+
+def _time_assemble(transformer: Transformer, df: Any) -> float:
+    """Time the assembly of the wide output only, the traces are decoded beforehand."""
+    contracts = transformer._cache_abi_and_contract_by_df(df=df)
+    df = df.assign(
+        block_number=df.block_number.astype(np.int64),
+        tx_index=df.tx_index.astype(np.int64),
+        trace_address=df.trace_address.fillna('').astype(str)
+    )
+    selectors = df.input.astype(str).str[:10].str.lower()
+    mask = transformer._prefilter(df.contract_address, selectors, contracts, 'functions')
+    df = df[mask]
+    decoded = transformer._decode_function_groups(df=df, selectors=selectors[mask], contracts=contracts)
+    df = df.assign(hash_index=transformer._calculate_trace_index(df.block_number, df.tx_index, df.trace_address))
+
+    start = time.perf_counter()
+    transformer._assemble_name_parts(
+        funcall_dfs=transformer._batches_to_frames(decoded),
+        index_df=df[['hash_index', 'block_number', 'tx_index', 'trace_address']],
+        index_columns=['hash_index']
+    )
+    return time.perf_counter() - start
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=current_file_dir,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _read_results(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as file_handle:
+        return [json.loads(i) for i in file_handle if i.strip()]
+
+
+def _last_result(results: List[Dict[str, Any]], case: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    for result in reversed(results):
+        if all(result.get(i) == case[i] for i in CASE_KEYS):
+            return result
+    return None
+
+
+def run(args: argparse.Namespace) -> int:
+    history = _read_results(args.output)
+    commit = _git_commit()
+    regressions = 0
+    print(f"{'stage':<10}{'workers':>8}{'rows/s':>14}{'peak MB':>10}{'vs last':>10}")
+    for stage in args.stages:
+        for nb_workers in args.nb_workers:
+            case = {
+                'stage': stage,
+                'rows': args.rows,
+                'contracts': args.contracts,
+                'complexity': args.complexity,
+                'undecodable_ratio': args.undecodable_ratio,
+                'unknown_ratio': args.unknown_ratio,
+                'distinct_ratio': args.distinct_ratio,
+                'nb_workers': nb_workers,
+                'backend': args.backend
+            }
+            # a fresh process per case, its peak rss is not shared with the other cases
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                measure = executor.submit(_run_stage, case, args.repeat).result()
+
+            result = dict(case, **measure, commit=commit, timestamp=datetime.now(timezone.utc).isoformat())
+            last = _last_result(history, case)
+            change = ''
+            if last is not None:
+                ratio = result['rows_per_second'] / last['rows_per_second'] - 1
+                change = f'{ratio:+.1%}'
+                if ratio < -args.max_regression:
+                    regressions += 1
+            print(f"{stage:<10}{nb_workers:>8}{result['rows_per_second']:>14,.0f}{result['peak_rss_mb']:>10.0f}"
+                  f"{change:>10}")
+
+            history.append(result)
+            with open(args.output, 'a', encoding='utf-8') as file_handle:
+                file_handle.write(json.dumps(result) + '\n')
+
+    return 1 if regressions > 0 else 0
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--contracts', type=int, default=50)
+    parser.add_argument('--complexity', choices=['simple', 'nested', 'dynamic', 'mixed'], default='mixed')
+    parser.add_argument('--undecodable-ratio', type=float, default=0.01)
+    parser.add_argument('--unknown-ratio', type=float, default=0.5)
+    parser.add_argument('--distinct-ratio', type=float, default=1.0)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--nb-workers', nargs='+', type=int, default=[1])
+    parser.add_argument('--backend', choices=['serial', 'thread', 'process'], default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=os.path.join(current_file_dir, 'results.jsonl'))
+    parser.add_argument('--max-regression', type=float, default=0.1,
+                        help='exit with 1 if the throughput drops more than this ratio since the last same case')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(run(parse_args()))
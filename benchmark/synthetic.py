@@ -0,0 +1,205 @@
+"""Generate reproducible ethereum-etl like traces and logs of synthetic contracts, so that the transformer can be
+benchmarked offline.
+"""
+import json
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from eth_abi import encode_abi
+from eth_utils import encode_hex, event_abi_to_log_topic, function_abi_to_4byte_selector
+
+# the functions and events of every complexity, the parameters of `_random_value`
+ABI_BY_COMPLEXITY: Dict[str, List[Dict[str, Any]]] = {
+    'simple': [
+        {'type': 'function', 'name': 'transfer', 'inputs': [
+            {'name': 'to', 'type': 'address'},
+            {'name': 'value', 'type': 'uint256'}
+        ]},
+        {'type': 'event', 'name': 'Transfer', 'anonymous': False, 'inputs': [
+            {'name': 'from', 'type': 'address', 'indexed': True},
+            {'name': 'to', 'type': 'address', 'indexed': True},
+            {'name': 'value', 'type': 'uint256', 'indexed': False}
+        ]}
+    ],
+    'nested': [
+        {'type': 'function', 'name': 'mint', 'inputs': [
+            {'name': 'data', 'type': 'tuple', 'components': [
+                {'name': 'tokenURI', 'type': 'string'},
+                {'name': 'contentHash', 'type': 'bytes32'}
+            ]},
+            {'name': 'bidShares', 'type': 'tuple', 'components': [
+                {'name': 'creator', 'type': 'tuple', 'components': [{'name': 'value', 'type': 'uint256'}]},
+                {'name': 'owner', 'type': 'tuple', 'components': [{'name': 'value', 'type': 'uint256'}]}
+            ]}
+        ]},
+        {'type': 'event', 'name': 'OrderMatched', 'anonymous': False, 'inputs': [
+            {'name': 'hash', 'type': 'bytes32', 'indexed': True},
+            {'name': 'order', 'type': 'tuple', 'indexed': False, 'components': [
+                {'name': 'maker', 'type': 'address'},
+                {'name': 'price', 'type': 'uint256'}
+            ]}
+        ]}
+    ],
+    'dynamic': [
+        {'type': 'function', 'name': 'multicall', 'inputs': [
+            {'name': 'targets', 'type': 'address[]'},
+            {'name': 'values', 'type': 'uint256[]'},
+            {'name': 'data', 'type': 'bytes'}
+        ]},
+        {'type': 'event', 'name': 'Executed', 'anonymous': False, 'inputs': [
+            {'name': 'sender', 'type': 'address', 'indexed': True},
+            {'name': 'amounts', 'type': 'uint256[]', 'indexed': False},
+            {'name': 'result', 'type': 'bytes', 'indexed': False}
+        ]}
+    ]
+}
+ABI_BY_COMPLEXITY['mixed'] = [i for key in ['simple', 'nested', 'dynamic'] for i in ABI_BY_COMPLEXITY[key]]
+
+
+def _abi_type(schema: Dict[str, Any]) -> str:
+    if schema['type'].startswith('tuple'):
+        return f"({','.join(_abi_type(i) for i in schema['components'])}){schema['type'][len('tuple'):]}"
+    return schema['type']
+
+
+def _random_value(random: np.random.RandomState, schema: Dict[str, Any]) -> Any:
+    type_str = schema['type']
+    if type_str.endswith('[]'):
+        item_schema = dict(schema, type=type_str[:-2])
+        return [_random_value(random, item_schema) for _ in range(random.randint(0, 5))]
+    if type_str == 'tuple':
+        return tuple(_random_value(random, i) for i in schema['components'])
+    if type_str == 'address':
+        return encode_hex(random.bytes(20))
+    if type_str.startswith('uint'):
+        return int.from_bytes(random.bytes(random.randint(1, 33)), 'big')
+    if type_str == 'bytes32':
+        return random.bytes(32)
+    if type_str == 'bytes':
+        return random.bytes(random.randint(0, 100))
+    if type_str == 'string':
+        return f'ipfs://{encode_hex(random.bytes(23))[2:]}'
+    raise ValueError(f'Unsupported type: {type_str}')
+
+
+def _function_payloads(random: np.random.RandomState, abi: Dict[str, Any], count: int) -> List[str]:
+    selector = function_abi_to_4byte_selector(abi)
+    types = [_abi_type(i) for i in abi['inputs']]
+    return [encode_hex(selector + encode_abi(types, [_random_value(random, i) for i in abi['inputs']]))
+            for _ in range(count)]
+
+
+def _event_payloads(random: np.random.RandomState, abi: Dict[str, Any], count: int) -> List[List[str]]:
+    """
+    :return: topic1 to topic4 and data of every log
+    """
+    topic = encode_hex(event_abi_to_log_topic(abi))
+    indexed = [i for i in abi['inputs'] if i['indexed']]
+    not_indexed = [i for i in abi['inputs'] if not i['indexed']]
+    payloads = []
+    for _ in range(count):
+        topics = [topic] + [encode_hex(encode_abi([_abi_type(i)], [_random_value(random, i)])) for i in indexed]
+        data = encode_hex(encode_abi([_abi_type(i) for i in not_indexed],
+                                     [_random_value(random, i) for i in not_indexed]))
+        payloads.append(topics + [None] * (4 - len(topics)) + [data])
+    return payloads
+
+
+def _corrupt(payload: str) -> str:
+    # a truncated word can not be decoded
+    return payload[:len(payload) - 6]
+
+
+class SyntheticChain:
+    """N traces or logs over M contracts sharing the abi of a complexity.
+
+    :param undecodable_ratio: the rows of a known selector whose payload is corrupted
+    :param unknown_ratio: the rows of contracts without abi, dropped before decoding
+    :param distinct_ratio: the ratio of distinct payloads, the others repeat them
+    """
+
+    def __init__(
+            self,
+            rows: int,
+            contracts: int,
+            complexity: str = 'mixed',
+            undecodable_ratio: float = 0.01,
+            unknown_ratio: float = 0.5,
+            distinct_ratio: float = 1.0,
+            seed: int = 0
+    ):
+        assert complexity in ABI_BY_COMPLEXITY
+        self.rows = rows
+        self.abi = ABI_BY_COMPLEXITY[complexity]
+        self.undecodable_ratio = undecodable_ratio
+        self.unknown_ratio = unknown_ratio
+        self.distinct_ratio = distinct_ratio
+        self.seed = seed
+        random = np.random.RandomState(seed)
+        self.contract_addresses = [encode_hex(random.bytes(20)) for _ in range(contracts)]
+        self.unknown_addresses = [encode_hex(random.bytes(20)) for _ in range(max(1, contracts))]
+
+    @property
+    def abi_map(self) -> Dict[str, str]:
+        abi_json = json.dumps(self.abi)
+        return {i: abi_json for i in self.contract_addresses}
+
+    def _layout(self, random: np.random.RandomState) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        """
+        :return: the block_number, tx_index and contract_address of every row, the mask of the unknown rows
+                 and the mask of the corrupted rows
+        """
+        block_number = 10_000_000 + np.sort(random.randint(0, max(1, self.rows // 100), size=self.rows))
+        tx_index = random.randint(0, 200, size=self.rows)
+        unknown = random.random_sample(self.rows) < self.unknown_ratio
+        corrupted = ~unknown & (random.random_sample(self.rows) < self.undecodable_ratio)
+        addresses = np.array(self.contract_addresses, dtype=object)[random.randint(0, len(self.contract_addresses),
+                                                                                   size=self.rows)]
+        addresses[unknown] = np.array(self.unknown_addresses, dtype=object)[
+            random.randint(0, len(self.unknown_addresses), size=unknown.sum())]
+        layout_df = pd.DataFrame({'block_number': block_number, 'tx_index': tx_index, 'contract_address': addresses})
+        return layout_df, unknown, corrupted
+
+    def _payload_indices(self, random: np.random.RandomState, count: int) -> Tuple[int, np.ndarray]:
+        distinct = max(1, int(count * self.distinct_ratio))
+        return distinct, random.randint(0, distinct, size=count)
+
+    def traces(self) -> pd.DataFrame:
+        random = np.random.RandomState(self.seed + 1)
+        df, unknown, corrupted = self._layout(random)
+        functions = [i for i in self.abi if i['type'] == 'function']
+        function_index = random.randint(0, len(functions), size=self.rows)
+
+        inputs = np.empty(self.rows, dtype=object)
+        for index, abi in enumerate(functions):
+            rows = np.flatnonzero(function_index == index)
+            distinct, payload_index = self._payload_indices(random, len(rows))
+            payloads = np.array(_function_payloads(random, abi, distinct), dtype=object)
+            inputs[rows] = payloads[payload_index]
+        inputs[corrupted] = [_corrupt(i) for i in inputs[corrupted]]
+
+        return df.assign(trace_address=[str(i % 3) if i % 3 else None for i in range(self.rows)], input=inputs)
+
+    def logs(self) -> pd.DataFrame:
+        random = np.random.RandomState(self.seed + 2)
+        df, unknown, corrupted = self._layout(random)
+        events = [i for i in self.abi if i['type'] == 'event']
+        event_index = random.randint(0, len(events), size=self.rows)
+
+        columns = np.empty((self.rows, 5), dtype=object)
+        for index, abi in enumerate(events):
+            rows = np.flatnonzero(event_index == index)
+            distinct, payload_index = self._payload_indices(random, len(rows))
+            payloads = np.empty((distinct, 5), dtype=object)
+            payloads[:, :] = _event_payloads(random, abi, distinct)
+            columns[rows] = payloads[payload_index]
+        columns[corrupted, 4] = [_corrupt(i) for i in columns[corrupted, 4]]
+
+        return df.assign(
+            topic1=columns[:, 0],
+            topic2=columns[:, 1],
+            topic3=columns[:, 2],
+            topic4=columns[:, 3],
+            data=columns[:, 4]
+        )
@@ -2,12 +2,12 @@ import os
 import sys
 import timeit
 
-import pandas as pd
-
 current_file_dir = os.path.dirname(__file__)
 sys.path.append(os.path.join(current_file_dir, '..'))
 
 from pandas3 import Transformer
+from pandas3.aggregate import aggregate_stream
+from pandas3.logging_util import logging_basic_config
 
 weth_contract_address = '0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2'
 
@@ -28,22 +28,17 @@ def analysis_weth_withdraw_value():
 
     transformer = Transformer()
 
-    df = pd.read_csv(get_tmp_resource_path('trace.csv'))
-    weth_df = df.loc[df['to_address'] == weth_contract_address].copy(deep=True)
     weth_abi = get_abi('weth_abi.json')
 
-    func_call_df = transformer.traces_to_func_call_df(
-        df=weth_df,
-        alias={'transaction_index': 'tx_index', 'to_address': 'contract_address'},
-        abi_map={weth_contract_address: weth_abi}
-    )
     withdraw_value_col = f'{weth_contract_address}.withdraw.wad'
-
-    agg_df = func_call_df[['block_number', withdraw_value_col]] \
-        .dropna() \
-        .groupby(['block_number']) \
-        .agg({withdraw_value_col: sum}) \
-        .squeeze()
+    # decode the export chunk by chunk, only the WETH withdraw amounts are decoded and only their sums are kept
+    agg_df = aggregate_stream(transformer.stream_traces_to_func_call_df(
+        source=get_tmp_resource_path('trace.csv'),
+        alias={'transaction_index': 'tx_index', 'to_address': 'contract_address'},
+        abi_map={weth_contract_address: weth_abi},
+        contract_addresses=[weth_contract_address],
+        columns=[withdraw_value_col]
+    ), columns=[withdraw_value_col], funcs=['sum'])[(withdraw_value_col, 'sum')].rename(withdraw_value_col)
     # .apply(Web3.fromWei, unit='ether') \
 
     print(agg_df.to_string())
@@ -53,4 +48,5 @@ def analysis_weth_withdraw_value():
 
 
 if __name__ == "__main__":
+    logging_basic_config()
     analysis_weth_withdraw_value()
@@ -1 +1,8 @@
+from .abi_store import FileAbiStore
+from .accessor import DecodedCalls
+from .aggregate import IntAggregator
+from .async_transformer import AsyncTransformer
+from .incremental import FileCheckpointStore, IncrementalDecoder, ParquetResultStore
+from .result_cache import FileResultCache
+from .signatures import SignatureDatabase
 from .transformer import Transformer
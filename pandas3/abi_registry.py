@@ -0,0 +1,145 @@
+import itertools
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from eth_abi.codec import ABICodec
+from eth_abi.decoding import TupleDecoder
+from eth_utils import encode_hex, event_abi_to_log_topic, function_abi_to_4byte_selector, decode_hex
+from eth_utils.abi import collapse_if_tuple
+from web3._utils.abi import (
+    exclude_indexed_event_inputs,
+    get_abi_input_names,
+    get_abi_input_types,
+    get_indexed_event_inputs,
+    map_abi_data,
+    normalize_event_input_types,
+)
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+
+def function_selector(input_data: str) -> str:
+    """Normalize the leading 4 bytes of the calldata to the key used by `CompiledContract.functions`."""
+    return input_data[:10].lower()
+
+
+def _has_address(types: List[str]) -> bool:
+    return any('address' in i for i in types)
+
+
+def _event_types_for_decoding(inputs: Iterable[Dict[str, Any]]) -> List[str]:
+    """Same as `web3._utils.events.get_event_abi_types_for_decoding`, but the tuples are collapsed to `(...)` types
+    which eth_abi can decode. The indexed dynamic values, including tuples and arrays, are only stored as their hash.
+    """
+    types = []
+    for i in inputs:
+        type_str = collapse_if_tuple(i)
+        if i.get('indexed') and (type_str in ('string', 'bytes') or type_str.startswith('(') or type_str.endswith(']')):
+            type_str = 'bytes32'
+        types.append(type_str)
+    return types
+
+
+def _tuple_decoder(codec: ABICodec, types: List[str]) -> TupleDecoder:
+    """The decoder `ABICodec.decode_abi` would build for the types on every call."""
+    return TupleDecoder(decoders=[codec._registry.get_decoder(i) for i in types])
+
+
+class CompiledFunction:
+
+    def __init__(self, abi: Dict[str, Any], codec: ABICodec):
+        self.name: str = abi['name']
+        self.inputs: List[Dict[str, Any]] = abi['inputs']
+        self.codec = codec
+        self.selector: str = encode_hex(function_abi_to_4byte_selector(abi))
+        self.names: List[str] = get_abi_input_names(abi)
+        self.types: List[str] = get_abi_input_types(abi)
+        self.normalize: bool = _has_address(self.types)
+        self.decoder = _tuple_decoder(codec, self.types)
+
+    def decode_values(self, input_data: str) -> Tuple[Any, ...]:
+        decoded = self.decoder(self.codec.stream_class(decode_hex(input_data)[4:]))
+        if self.normalize:
+            decoded = map_abi_data(BASE_RETURN_NORMALIZERS, self.types, decoded)
+        return decoded
+
+    def decode(self, input_data: str) -> Dict[str, Any]:
+        return dict(zip(self.names, self.decode_values(input_data)))
+
+
+class CompiledEvent:
+
+    def __init__(self, abi: Dict[str, Any], codec: ABICodec):
+        self.name: str = abi['name']
+        self.inputs: List[Dict[str, Any]] = abi['inputs']
+        self.codec = codec
+        self.topic: str = encode_hex(event_abi_to_log_topic(abi))
+
+        topic_abi = get_indexed_event_inputs(abi)
+        self.topic_types: List[str] = _event_types_for_decoding(normalize_event_input_types(topic_abi))
+        self.topic_names: List[str] = get_abi_input_names({'inputs': topic_abi})
+
+        data_abi = exclude_indexed_event_inputs(abi)
+        self.data_types: List[str] = _event_types_for_decoding(normalize_event_input_types(data_abi))
+        self.data_names: List[str] = get_abi_input_names({'inputs': data_abi})
+
+        duplicate_names = set(self.topic_names).intersection(self.data_names)
+        if duplicate_names:
+            raise ValueError(f"The following argument names are duplicated between event inputs: {duplicate_names}")
+
+        self.normalize_topics: bool = _has_address(self.topic_types)
+        self.normalize_data: bool = _has_address(self.data_types)
+        self.topic_decoders = [codec._registry.get_decoder(i) for i in self.topic_types]
+        self.data_decoder = _tuple_decoder(codec, self.data_types)
+
+    def decode(self, topics: List[str], data: str) -> Dict[str, Any]:
+        """Same as `web3._utils.events.get_event_data`, but the event signature was matched by the caller."""
+        log_topics = topics[1:]
+        if len(log_topics) != len(self.topic_types):
+            raise ValueError(f'Expected {len(self.topic_types)} log topics. Got {len(log_topics)}')
+
+        decoded_topics = [decoder(self.codec.stream_class(decode_hex(topic)))
+                          for decoder, topic in zip(self.topic_decoders, log_topics)]
+        if self.normalize_topics:
+            decoded_topics = map_abi_data(BASE_RETURN_NORMALIZERS, self.topic_types, decoded_topics)
+
+        decoded_data = self.data_decoder(self.codec.stream_class(decode_hex(data)))
+        if self.normalize_data:
+            decoded_data = map_abi_data(BASE_RETURN_NORMALIZERS, self.data_types, decoded_data)
+
+        return dict(itertools.chain(
+            zip(self.topic_names, decoded_topics),
+            zip(self.data_names, decoded_data)
+        ))
+
+
+class CompiledContract:
+    """The selector tables of a contract ABI, built once when the ABI is loaded.
+
+    Functions are keyed by the lowercase hex 4-byte selector and events by the lowercase hex topic hash,
+    so the decoding of a row is a dict lookup instead of a scan over the ABI.
+    """
+
+    def __init__(self, abi: List[Dict[str, Any]], codec: ABICodec):
+        self.abi = abi
+        self.codec = codec
+        self.functions: Dict[str, CompiledFunction] = {}
+        self.events: Dict[str, CompiledEvent] = {}
+
+        for entry in abi:
+            self.add(entry)
+
+    def add(self, entry: Dict[str, Any]):
+        """Compile an entry of the abi, the first function of a selector or event of a topic wins."""
+        if 'name' not in entry:
+            return
+        if entry.get('type', 'function') == 'function':
+            func = CompiledFunction(entry, self.codec)
+            self.functions.setdefault(func.selector, func)
+        elif entry.get('type') == 'event' and not entry.get('anonymous', False):
+            event = CompiledEvent(entry, self.codec)
+            self.events.setdefault(event.topic, event)
+
+    def get_function(self, input_data: str) -> Optional[CompiledFunction]:
+        return self.functions.get(function_selector(input_data))
+
+    def get_event(self, topic: str) -> Optional[CompiledEvent]:
+        return self.events.get(topic.lower())
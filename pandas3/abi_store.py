@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from typing import Optional
+
+
+class FileAbiStore:
+    """A directory of ABI files keyed by the lowercase contract address, kept across processes and restarts.
+
+    The contracts whose source code is not verified are stored as negative entries, which expire after `negative_ttl`
+    so that they will be fetched again, e.g. once the source code is verified. A failed call, e.g. a timeout or a rate
+    limit, is never stored.
+    """
+
+    def __init__(self, directory: str, negative_ttl: timedelta = timedelta(days=1)):
+        self.directory = directory
+        self.negative_ttl = negative_ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, address: str) -> str:
+        return os.path.join(self.directory, f'{address.lower()}.json')
+
+    def _read(self, address: str) -> Optional[dict]:
+        try:
+            with open(self._path(address), encoding='utf-8') as file_handle:
+                entry = json.load(file_handle)
+        except (OSError, ValueError):
+            return None
+
+        if entry['abi'] is None and entry['expires_at'] < time.time():
+            return None
+        return entry
+
+    def __contains__(self, address: str) -> bool:
+        return self._read(address) is not None
+
+    def get(self, address: str) -> Optional[str]:
+        """
+        :return: the abi json string, None if the contract is missing or a negative entry
+        """
+        entry = self._read(address)
+        return None if entry is None else entry['abi']
+
+    def put(self, address: str, abi: Optional[str]):
+        entry = {'abi': abi, 'expires_at': None if abi is not None else time.time() + self.negative_ttl.total_seconds()}
+
+        # write to a temporary file then rename it, the readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file_handle:
+            json.dump(entry, file_handle)
+        os.replace(tmp_path, self._path(address))
@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .aggregate import AGGREGATE_FUNCS, aggregate_ints
+from .transformer import Transformer
+
+_default_transformer: Optional[Transformer] = None
+
+
+def _get_default_transformer() -> Transformer:
+    global _default_transformer
+    if _default_transformer is None:
+        _default_transformer = Transformer()
+    return _default_transformer
+
+
+def _column_key(column: str) -> str:
+    # the contract address of a column is case insensitive, its names are not
+    address, _, names = column.partition('.')
+    return f'{address.lower()}.{names}'
+
+
+class DecodedCalls:
+    """The lazy decoded calls of a dataframe, returned by `df.web3.decode_calls` and `df.web3.decode_logs`.
+
+    Nothing is decoded until columns are asked, then only the calls of these columns are decoded, and of their
+    calldata only the params asked are decoded and flattened. The frames are cached by the set of columns asked.
+
+        calls = df.web3.decode_calls(alias={'to_address': 'contract_address'})
+        wad = calls['0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2.withdraw.wad']
+    """
+
+    def __init__(self, df: pd.DataFrame, transformer: Transformer, kind: str, **kwargs):
+        assert kind in ('traces', 'logs')
+        self._df = df
+        self.transformer = transformer
+        self.kind = kind
+        self._kwargs = kwargs
+        self._frames: Dict[Optional[Tuple[str, ...]], pd.DataFrame] = {}
+
+    def _decode(self, columns: Optional[Tuple[str, ...]]) -> pd.DataFrame:
+        if columns not in self._frames:
+            decode = self.transformer.traces_to_func_call_df if self.kind == 'traces' \
+                else self.transformer.logs_to_func_call_df
+            # the transformer drops the abi column of its input, every decode reads the abi of the dataframe again
+            self._frames[columns] = decode(df=self._df.copy(deep=False), columns=columns, **self._kwargs)
+        return self._frames[columns]
+
+    def select(self, *columns: str) -> pd.DataFrame:
+        """Decode the columns, `address.name.param` for one param or `address.name` for every param of a call,
+        see `Transformer._projection`.
+
+        :return: the id columns and the columns asked, spelled as asked, a param column without any call is all NaN
+        """
+        assert len(columns) > 0
+        # the same columns in any order or case are decoded once
+        frame = self._decode(tuple(sorted({_column_key(i) for i in columns})))
+        spelling = {_column_key(i): i for i in columns}
+        frame = frame.rename(columns={i: spelling[_column_key(i)] for i in frame.columns
+                                      if _column_key(i) in spelling})
+        missing_columns = [i for i in columns if i.count('.') >= 2 and i not in frame.columns]
+        return frame.reindex(columns=list(frame.columns) + missing_columns) if missing_columns else frame
+
+    def __getitem__(self, key: Union[str, List[str]]) -> Union[pd.Series, pd.DataFrame]:
+        """A param column as a series, or a call `address.name` or a list of columns as a dataframe, see `select`."""
+        if isinstance(key, str):
+            frame = self.select(key)
+            return frame[key] if key in frame.columns else frame
+        return self.select(*key)
+
+    def aggregate(
+            self,
+            columns: Iterable[str],
+            by: str = 'block_number',
+            bucket: Optional[Union[int, str]] = None,
+            funcs: Iterable[str] = AGGREGATE_FUNCS
+    ) -> pd.DataFrame:
+        """Decode the int param columns and aggregate them exactly, see `aggregate.IntAggregator`."""
+        columns = list(columns)
+        return aggregate_ints(self.select(*columns), columns, by=by, bucket=bucket, funcs=funcs)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Decode every call and param, the same as the `Transformer`."""
+        return self._decode(None)
+
+
+@pd.api.extensions.register_dataframe_accessor('web3')
+class Web3Accessor:
+    """The `df.web3` accessor of the dataframes, registered by importing `pandas3`.
+
+        df.web3.decode_calls(abi_map={weth: weth_abi})[f'{weth}.withdraw.wad']
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+
+    def _decoded_calls(
+            self,
+            kind: str,
+            transformer: Optional[Transformer],
+            alias: Optional[Dict[str, str]],
+            **kwargs
+    ) -> DecodedCalls:
+        # renamed here, the dataframe of the user is never changed, see `DecodedCalls._decode`
+        df = self._df if alias is None else self._df.rename(alias, axis=1)
+        return DecodedCalls(df, transformer or _get_default_transformer(), kind, **kwargs)
+
+    def decode_calls(
+            self,
+            # by default a transformer shared by the accessors
+            transformer: Optional[Transformer] = None,
+            # column name to alias
+            alias: Optional[Dict[str, str]] = None,
+            # contract address to abi
+            abi_map: Optional[Dict[str, str]] = None,
+            index: str = 'hash',
+            allowed_calls: Optional[Iterable[Tuple[str, str]]] = None
+    ) -> DecodedCalls:
+        """The lazy decoded calls of the traces, see `Transformer.traces_to_func_call_df`."""
+        return self._decoded_calls('traces', transformer, alias, abi_map=abi_map, index=index,
+                                   allowed_calls=None if allowed_calls is None else list(allowed_calls))
+
+    def decode_logs(
+            self,
+            transformer: Optional[Transformer] = None,
+            alias: Optional[Dict[str, str]] = None,
+            abi_map: Optional[Dict[str, str]] = None,
+            index: str = 'hash',
+            allowed_calls: Optional[Iterable[Tuple[str, str]]] = None
+    ) -> DecodedCalls:
+        """The lazy decoded events of the logs, see `Transformer.logs_to_func_call_df` and `decode_calls`."""
+        return self._decoded_calls('logs', transformer, alias, abi_map=abi_map, index=index,
+                                   allowed_calls=None if allowed_calls is None else list(allowed_calls))
@@ -0,0 +1,305 @@
+from functools import partial
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from . import arrow
+
+AGGREGATE_FUNCS = ('sum', 'count', 'min', 'max')
+
+# an int<M> or uint<M> up to 256 bits plus the offset is a positive int of 288 bits, nine 32-bit limbs held by uint64,
+# so that the limbs of up to 2 ** 32 values are summed without overflow and the order of the ints is the order of
+# their limbs, the most significant first
+_NB_LIMBS = 9
+_LIMB_BITS = 32
+_LIMB_MASK = (1 << _LIMB_BITS) - 1
+_OFFSET = 1 << 256
+# no offset value is 0 or 2 ** 288 - 1, the min and the max of the groups without any value
+_NO_MIN = np.full(_NB_LIMBS, _LIMB_MASK, dtype=np.uint64)
+_NO_MAX = np.zeros(_NB_LIMBS, dtype=np.uint64)
+
+# the wide output of a transformer keeps the int columns exact, a float column comes from a conversion of the caller
+_FLOAT_ERROR = 'the {} values of an int column are inexact above 2 ** 53, keep the python ints of the wide output, ' \
+               'or decode the column by `columns=` projection, the long output or the arrow output'
+
+_to_bytes = partial(int.to_bytes, length=_NB_LIMBS * 4, byteorder='little', signed=True)
+
+
+def int_limbs(values: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """Split the ints of a column to the limbs of their offset values.
+
+    :param values: python ints with NaN or None, a numpy integer array, or an int column of the arrow output, e.g. the
+                   limbs of a uint256 or an int256, see `arrow.to_arrow_array`, or their decimal strings, the float
+                   values are rejected as inexact
+    :return: limbs: np.ndarray, (rows, 9) uint64, zeros for the missing values,
+             valid: np.ndarray, the mask of the rows with a value
+    """
+    if arrow.pa is not None and isinstance(values, (arrow.pa.Array, arrow.pa.ChunkedArray)):
+        if arrow.pa.types.is_struct(values.type):
+            return _arrow_limbs(values)
+        if arrow.pa.types.is_string(values.type) or arrow.pa.types.is_large_string(values.type):
+            # the decimal strings of the wide ints, e.g. of a parquet store written before they were limbs
+            values = np.array([None if i is None else int(i) for i in values.to_pylist()], dtype=object)
+        else:
+            values = np.array(values.to_pylist(), dtype=object)
+
+    # numpy would infer float for a list mixing negative ints and ints above 2 ** 63
+    values = np.asarray(values) if isinstance(values, (np.ndarray, pd.Series, pd.Index)) \
+        else np.array(values, dtype=object)
+    # column major, every limb is reduced on its own
+    limbs = np.zeros((len(values), _NB_LIMBS), dtype=np.uint64, order='F')
+    if values.dtype.kind in 'iu':
+        low = values.astype(np.int64).view(np.uint64) if values.dtype.kind == 'i' else values.astype(np.uint64)
+        limbs[:, 0] = low & np.uint64(_LIMB_MASK)
+        limbs[:, 1] = low >> np.uint64(_LIMB_BITS)
+        # two's complement, the offset of a negative int64 borrows from the bits above 64
+        negative = values < 0 if values.dtype.kind == 'i' else np.zeros(len(values), dtype=bool)
+        limbs[negative, 2:_NB_LIMBS - 1] = _LIMB_MASK
+        limbs[~negative, _NB_LIMBS - 1] = 1
+        return limbs, np.ones(len(values), dtype=bool)
+
+    if values.dtype.kind == 'f':
+        raise TypeError(_FLOAT_ERROR.format(values.dtype))
+    assert values.dtype == object, f'{values.dtype} is not an int column'
+    valid = pd.notna(values)
+    if valid.any():
+        present = values[valid]
+        inferred = pd.api.types.infer_dtype(present, skipna=False)
+        if inferred in ('floating', 'mixed-integer-float', 'decimal'):
+            raise TypeError(_FLOAT_ERROR.format('float'))
+        if inferred not in ('integer', 'boolean'):
+            raise TypeError(f'the {inferred} values are not ints')
+        ints = present.tolist()
+        try:
+            # most amounts fit 64 bits, converted by numpy at once
+            limbs[valid] = int_limbs(np.array(ints, dtype=np.int64))[0]
+            return limbs, valid
+        except OverflowError:
+            pass
+        try:
+            # the positional call is the fastest, it fails on a negative int
+            buffer = b''.join(map(int.to_bytes, ints, repeat(_NB_LIMBS * 4), repeat('little')))
+        except OverflowError:
+            buffer = b''.join(map(_to_bytes, ints))
+        limbs[valid] = np.frombuffer(buffer, dtype='<u4').reshape(-1, _NB_LIMBS)
+        # the offset carries to the most significant limb of the two's complement, 0xffffffff for a negative int
+        limbs[valid, _NB_LIMBS - 1] = (limbs[valid, _NB_LIMBS - 1] + 1) & np.uint64(_LIMB_MASK)
+    return limbs, valid
+
+
+def _arrow_limbs(array: Union['arrow.pa.StructArray', 'arrow.pa.ChunkedArray']) -> Tuple[np.ndarray, np.ndarray]:
+    if isinstance(array, arrow.pa.ChunkedArray):
+        array = array.combine_chunks()
+    limbs = np.zeros((len(array), _NB_LIMBS), dtype=np.uint64, order='F')
+    for index, name in enumerate(arrow.LIMB_NAMES):
+        limb = array.field(name).fill_null(0).to_numpy(zero_copy_only=False).astype(np.uint64)
+        limbs[:, 2 * index] = limb & np.uint64(_LIMB_MASK)
+        limbs[:, 2 * index + 1] = limb >> np.uint64(_LIMB_BITS)
+    valid = array.is_valid().to_numpy(zero_copy_only=False)
+    # the offset carries to the most significant limb, 0 for a negative two's complement of an int<M>
+    high = array.field(arrow.LIMB_NAMES[-1])
+    negative = high.fill_null(0).to_numpy(zero_copy_only=False) < 0 if arrow.pa.types.is_signed_integer(high.type) \
+        else np.zeros(len(array), dtype=bool)
+    limbs[valid & ~negative, _NB_LIMBS - 1] = 1
+    limbs[~valid] = 0
+    return limbs, valid
+
+
+def _limbs_to_int(limbs: np.ndarray) -> int:
+    return sum(int(limb) << (_LIMB_BITS * index) for index, limb in enumerate(limbs))
+
+
+class _State:
+    """The partial aggregates of one column per group, merged by concatenating and reducing them again."""
+
+    def __init__(
+            self,
+            keys: np.ndarray,
+            sums: np.ndarray,
+            counts: np.ndarray,
+            mins: Optional[np.ndarray],
+            maxs: Optional[np.ndarray]
+    ):
+        self.keys = keys
+        self.sums = sums
+        self.counts = counts
+        self.mins = mins
+        self.maxs = maxs
+
+    @staticmethod
+    def from_values(keys: np.ndarray, values: Any, funcs: Sequence[str]) -> '_State':
+        limbs, valid = int_limbs(values)
+        return _State(
+            keys=keys,
+            sums=limbs,
+            counts=valid.astype(np.int64),
+            mins=np.where(valid[:, None], limbs, _NO_MIN) if 'min' in funcs else None,
+            maxs=np.where(valid[:, None], limbs, _NO_MAX) if 'max' in funcs else None
+        )
+
+    @staticmethod
+    def concat(states: Sequence['_State']) -> '_State':
+        return _State(*(None if getattr(states[0], name) is None
+                        else np.concatenate([getattr(i, name) for i in states])
+                        for name in ('keys', 'sums', 'counts', 'mins', 'maxs')))
+
+    def reduce(self) -> '_State':
+        """One row per key, the keys sorted."""
+        if len(self.keys) == 0:
+            return self
+        codes, keys = pd.factorize(self.keys, sort=True)
+        return _State(
+            keys=np.asarray(keys),
+            sums=self._sum(codes, len(keys), self.sums),
+            counts=self._sum(codes, len(keys), self.counts[:, None])[:, 0].astype(np.int64),
+            mins=None if self.mins is None else self._extreme(codes, len(keys), self.mins, np.minimum),
+            maxs=None if self.maxs is None else self._extreme(codes, len(keys), self.maxs, np.maximum)
+        )
+
+    @staticmethod
+    def _sum(codes: np.ndarray, size: int, limbs: np.ndarray) -> np.ndarray:
+        sums = np.zeros((limbs.shape[1], size), dtype=np.uint64)
+        for index in range(limbs.shape[1]):
+            limb = limbs[:, index]
+            # e.g. the high limbs of small amounts
+            if limb.any():
+                np.add.at(sums[index], codes, limb.astype(np.uint64))
+        return sums.T
+
+    @staticmethod
+    def _extreme(codes: np.ndarray, size: int, limbs: np.ndarray, ufunc: np.ufunc) -> np.ndarray:
+        """The min or max limbs of every group.
+
+        From the most significant limb, only the rows equal to the extreme limb of their group stay candidates.
+        """
+        candidates = np.arange(len(codes))
+        for index in reversed(range(_NB_LIMBS)):
+            limb = limbs[candidates, index]
+            if limb.min() == limb.max():
+                continue
+            candidate_codes = codes[candidates]
+            extremes = np.full(size, _LIMB_MASK if ufunc is np.minimum else 0, dtype=np.uint64)
+            ufunc.at(extremes, candidate_codes, limb)
+            candidates = candidates[limb == extremes[candidate_codes]]
+        # the remaining candidates of a group are equal
+        result = np.empty((size, _NB_LIMBS), dtype=np.uint64)
+        result[codes[candidates]] = limbs[candidates]
+        return result
+
+    def to_columns(self, funcs: Sequence[str]) -> Dict[str, np.ndarray]:
+        columns = {}
+        for func in funcs:
+            if func == 'count':
+                columns[func] = self.counts
+            elif func == 'sum':
+                columns[func] = np.array([_limbs_to_int(limbs) - int(count) * _OFFSET
+                                          for limbs, count in zip(self.sums, self.counts)], dtype=object)
+            else:
+                limbs = self.mins if func == 'min' else self.maxs
+                columns[func] = np.array([_limbs_to_int(i) - _OFFSET if count > 0 else None
+                                          for i, count in zip(limbs, self.counts)], dtype=object)
+        return columns
+
+
+class IntAggregator:
+    """Exact sum, count, min and max of int columns, e.g. `address.withdraw.wad`, per block or bucket.
+
+    The uint256 and int256 values are split to numpy limbs once, then aggregated by vectorized reductions of the limbs,
+    exactly and without overflow. The missing values are skipped, the sum of a group without any value is 0,
+    its min and max are None. The chunks of a stream are aggregated one by one, only the aggregates are kept:
+
+        aggregator = IntAggregator([f'{weth}.withdraw.wad'])
+        for df in transformer.stream_traces_to_func_call_df(path, columns=[f'{weth}.withdraw.wad']):
+            aggregator.update(df)
+        aggregator.result()
+    """
+
+    def __init__(
+            self,
+            columns: Iterable[str],
+            # the group column, e.g. block_number or a joined block_timestamp
+            by: str = 'block_number',
+            # None, an int to group the numbers by buckets of its size, or a pandas frequency e.g. '1H' to group the
+            # times by the buckets of its duration
+            bucket: Optional[Union[int, str]] = None,
+            funcs: Iterable[str] = AGGREGATE_FUNCS
+    ):
+        self.columns = list(columns)
+        self.by = by
+        self.bucket = bucket
+        self.funcs = list(funcs)
+        assert set(self.funcs).issubset(AGGREGATE_FUNCS)
+        self._states: Dict[str, Optional[_State]] = {i: None for i in self.columns}
+
+    def _keys(self, keys: pd.Series) -> pd.Series:
+        if self.bucket is None:
+            return keys
+        if isinstance(self.bucket, str):
+            return pd.to_datetime(keys).dt.floor(self.bucket)
+        return keys // self.bucket * self.bucket
+
+    def update(self, df: pd.DataFrame) -> 'IntAggregator':
+        """Aggregate a chunk, a column missing from the chunk has no value in it."""
+        # the 'multi' index of the transformer holds block_number and tx_index instead of the columns
+        by = df[self.by] if self.by in df.columns else pd.Series(df.index.get_level_values(self.by), index=df.index)
+        df = df[by.notna().values]
+        keys = self._keys(by[by.notna().values]).values
+        for column in self.columns:
+            if column not in df.columns:
+                continue
+            state = _State.from_values(keys, df[column].values, self.funcs).reduce()
+            previous_state = self._states[column]
+            self._states[column] = state if previous_state is None else _State.concat([previous_state, state]).reduce()
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """
+        :return: one row per group, indexed by `by`, and the columns (column, func) as `DataFrame.agg`, the sums,
+                 mins and maxs are python ints
+        """
+        states = {column: state for column, state in self._states.items() if state is not None}
+        keys = pd.Index(pd.unique(np.concatenate([i.keys for i in states.values()])) if states else [], name=self.by) \
+            .sort_values()
+        frames = []
+        for column in self.columns:
+            state = states.get(column)
+            if state is None:
+                frame = pd.DataFrame(index=keys, columns=self.funcs, dtype=object)
+            else:
+                frame = pd.DataFrame(state.to_columns(self.funcs), index=pd.Index(state.keys, name=self.by)) \
+                    .reindex(keys)
+            if 'count' in self.funcs:
+                frame['count'] = frame['count'].fillna(0).astype(np.int64)
+            if 'sum' in self.funcs:
+                frame['sum'] = frame['sum'].where(frame['sum'].notna(), 0)
+            frames.append(frame)
+        if len(frames) == 0:
+            return pd.DataFrame(index=keys)
+        return pd.concat(frames, axis=1, keys=self.columns)
+
+
+def aggregate_ints(
+        df: pd.DataFrame,
+        columns: Iterable[str],
+        by: str = 'block_number',
+        bucket: Optional[Union[int, str]] = None,
+        funcs: Iterable[str] = AGGREGATE_FUNCS
+) -> pd.DataFrame:
+    """Aggregate the int columns of a decoded frame, see `IntAggregator`."""
+    return IntAggregator(columns, by=by, bucket=bucket, funcs=funcs).update(df).result()
+
+
+def aggregate_stream(
+        frames: Iterable[pd.DataFrame],
+        columns: List[str],
+        by: str = 'block_number',
+        bucket: Optional[Union[int, str]] = None,
+        funcs: Iterable[str] = AGGREGATE_FUNCS
+) -> pd.DataFrame:
+    """Aggregate the chunks of a stream one by one, see `IntAggregator`."""
+    aggregator = IntAggregator(columns, by=by, bucket=bucket, funcs=funcs)
+    for frame in frames:
+        aggregator.update(frame)
+    return aggregator.result()
@@ -0,0 +1,222 @@
+import operator
+import os
+from functools import reduce
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from eth_utils import is_hex_address, to_checksum_address
+
+from .batch_decoder import DecodedBatch
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, install `web3-pandas[arrow]`
+    pa = None
+    pc = None
+    ds = None
+    pq = None
+
+# a uint wider than 64 bits is stored as four uint64 limbs, the least significant first
+LIMB_NAMES = ['limb0', 'limb1', 'limb2', 'limb3']
+
+_LIMB_MASK = (1 << 64) - 1
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError('pyarrow is required by the arrow i/o, install it by `pip install web3-pandas[arrow]`')
+
+
+def is_arrow_source(source: Any) -> bool:
+    """A parquet path, an arrow table or an arrow dataset."""
+    if isinstance(source, str):
+        return source.endswith('.parquet')
+    return type(source).__module__.startswith('pyarrow')
+
+
+def read_chunks(
+        source: Any,
+        chunksize: int,
+        columns: Optional[List[str]] = None,
+        address_column: str = 'contract_address',
+        contract_addresses: Optional[Iterable[str]] = None,
+        block_column: str = 'block_number',
+        block_range: Optional[Tuple[int, int]] = None,
+        case_insensitive: bool = False
+) -> Iterator[pd.DataFrame]:
+    """Read a parquet dataset or an arrow table batch by batch, only the projected columns and the rows matching
+    the predicates are read.
+
+    :param columns: the projected columns, the missing ones are ignored
+    :param contract_addresses: only read the rows of these contracts, stored as given, lower case, e.g. by
+                               ethereum-etl, upper case or checksummed, so that the row groups and partitions are
+                               skipped by their statistics
+    :param block_range: only read the rows in [start, end)
+    :param case_insensitive: match the addresses stored in any other case, the predicate is then applied to every row
+                             read instead of skipping the row groups
+    """
+    require_pyarrow()
+    if isinstance(source, str):
+        dataset = ds.dataset(source, format='parquet')
+    elif isinstance(source, pa.Table):
+        dataset = ds.dataset(source)
+    else:
+        dataset = source
+
+    expression = None
+    if contract_addresses is not None:
+        expression = _address_expression(address_column, contract_addresses, case_insensitive)
+    if block_range is not None:
+        start, end = block_range
+        block_expression = (ds.field(block_column) >= start) & (ds.field(block_column) < end)
+        expression = block_expression if expression is None else expression & block_expression
+
+    if columns is not None:
+        columns = [i for i in columns if i in dataset.schema.names]
+
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=chunksize):
+        if batch.num_rows > 0:
+            yield batch.to_pandas()
+
+
+def _address_expression(column: str, addresses: Iterable[str], case_insensitive: bool = False) -> 'ds.Expression':
+    if case_insensitive:
+        # like `Transformer._filter_chunks`, the lower function of the column cannot skip any row group
+        return pc.utf8_lower(ds.field(column)).isin(list(dict.fromkeys(i.lower() for i in addresses)))
+
+    forms = []
+    for address in addresses:
+        forms += [address, address.lower()]
+        if is_hex_address(address):
+            forms += ['0x' + address[2:].upper(), to_checksum_address(address)]
+    # the equalities, unlike `isin`, are checked against the min and max statistics of the row groups
+    return reduce(operator.or_, [ds.field(column) == i for i in dict.fromkeys(forms)], ds.scalar(False))
+
+
+def to_arrow_array(values: np.ndarray, abi_type: str) -> 'pa.Array':
+    """Convert the decoded values of an abi type to a typed arrow array.
+
+    address and bytes<M> are fixed size binary, uint<M> and int<M> up to 64 bits are uint64 and int64,
+    the wider ones are a struct of four 64-bit limbs, see `limbs_to_int`, and the arrays are lists of their items.
+    The other types, e.g. fixed<M>x<N>, are left to the inference of arrow, or are strings if it fails.
+    """
+    require_pyarrow()
+    if abi_type.endswith(']'):
+        return _to_list_array(values, abi_type[:abi_type.rindex('[')])
+    if abi_type == 'bool':
+        return pa.array(np.asarray(values, dtype=bool))
+    if abi_type == 'address':
+        return pa.array([bytes.fromhex(i[2:]) for i in values], type=pa.binary(20))
+    if abi_type.startswith('uint'):
+        if _type_bits(abi_type, 'uint') <= 64:
+            return pa.array(_to_uint64(values))
+        return uint256_to_limbs(values)
+    if abi_type.startswith('int'):
+        if _type_bits(abi_type, 'int') <= 64:
+            return pa.array(np.asarray(values, dtype=np.int64))
+        return uint256_to_limbs(values, signed=True)
+    if abi_type == 'bytes':
+        return pa.array(values.tolist(), type=pa.binary())
+    if abi_type.startswith('bytes'):
+        return pa.array(values.tolist(), type=pa.binary(int(abi_type[len('bytes'):])))
+    if abi_type == 'string':
+        return pa.array(values.tolist(), type=pa.string())
+    try:
+        return pa.array(values.tolist())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([str(i) for i in values], type=pa.string())
+
+
+def _to_list_array(values: np.ndarray, item_type: str) -> 'pa.ListArray':
+    # the items of every row are converted as a single column of their own type
+    lengths = np.fromiter((len(i) for i in values), dtype=np.int32, count=len(values))
+    offsets = np.concatenate([np.zeros(1, dtype=np.int32), np.cumsum(lengths, dtype=np.int32)])
+    items = np.empty(int(offsets[-1]), dtype=object)
+    items[:] = [item for row in values for item in row]
+    return pa.ListArray.from_arrays(pa.array(offsets), to_arrow_array(items, item_type))
+
+
+def uint256_to_limbs(values: np.ndarray, signed: bool = False) -> 'pa.StructArray':
+    """Split 256-bit ints to four 64-bit limbs, the least significant first.
+
+    :param signed: the limbs of the two's complement, the most significant limb is an int64 holding the sign
+    """
+    require_pyarrow()
+    if values.dtype != object:
+        values = values.astype(np.int64 if signed else np.uint64)
+        high = (values >> 63) if signed else np.zeros(len(values), dtype=np.uint64)
+        limbs = [values.view(np.uint64)] + [high.view(np.uint64)] * 2 + [high]
+    else:
+        # the shifts of a negative python int fill with ones, the masked limbs are its two's complement
+        limbs = [np.fromiter(((i >> (64 * index)) & _LIMB_MASK for i in values), dtype=np.uint64, count=len(values))
+                 for index in range(len(LIMB_NAMES))]
+        if signed:
+            limbs[-1] = limbs[-1].view(np.int64)
+    return pa.StructArray.from_arrays([pa.array(i) for i in limbs], names=LIMB_NAMES)
+
+
+def limbs_to_int(array: Union['pa.StructArray', 'pa.ChunkedArray']) -> List[int]:
+    """The python ints of a uint or int column stored as limbs, negative if the most significant limb is."""
+    require_pyarrow()
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    limbs = [array.field(i).to_numpy(zero_copy_only=False) for i in LIMB_NAMES]
+    return [sum(int(limb) << (64 * index) for index, limb in enumerate(row)) for row in zip(*limbs)]
+
+
+def batches_to_tables(
+        decoded: List[Tuple[Tuple[str, str], np.ndarray, DecodedBatch]],
+        index_df: pd.DataFrame
+) -> Dict[Tuple[str, str], 'pa.Table']:
+    """Build an arrow table per (address, name) from the decoded batches, without going through object columns.
+
+    :param index_df: the columns identifying a row, e.g. block_number, tx_index, prepended to every table
+    """
+    require_pyarrow()
+    grouped: Dict[Tuple[str, str], List[Tuple[np.ndarray, pa.Table]]] = {}
+    for key, positions, batch in decoded:
+        rows = positions[batch.mask]
+        names = list(index_df.columns) + list(batch.columns.keys())
+        arrays = [pa.array(index_df[i].values[rows]) for i in index_df.columns] + \
+                 [to_arrow_array(values, batch.types[path]) for path, values in batch.columns.items()]
+        grouped.setdefault(key, []).append((rows, pa.Table.from_arrays(arrays, names=names)))
+
+    tables = {}
+    for key, parts in grouped.items():
+        rows = np.concatenate([i for i, _ in parts])
+        table = pa.concat_tables([i for _, i in parts])
+        tables[key] = table.take(pa.array(np.argsort(rows, kind='stable')))
+    return tables
+
+
+def write_parquet_dataset(results: Iterable[Dict[Tuple[str, str], 'pa.Table']], base_dir: str) -> List[str]:
+    """Write the arrow outputs of a stream to a parquet dataset partitioned by contract_address and call_name,
+    e.g. `base_dir/contract_address=0x.../call_name=mint/part-00000.parquet`, one file per chunk.
+
+    :return: the paths of the written files
+    """
+    require_pyarrow()
+    paths = []
+    for chunk_index, tables in enumerate(results):
+        for (address, name), table in tables.items():
+            directory = os.path.join(base_dir, f'contract_address={address}', f'call_name={name}')
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'part-{chunk_index:05d}.parquet')
+            pq.write_table(table, path)
+            paths.append(path)
+    return paths
+
+
+def _type_bits(type_str: str, prefix: str) -> int:
+    suffix = type_str[len(prefix):]
+    return int(suffix) if suffix else 256
+
+
+def _to_uint64(values: np.ndarray) -> np.ndarray:
+    if values.dtype != object:
+        return values.astype(np.uint64)
+    return np.fromiter(values, dtype=np.uint64, count=len(values))
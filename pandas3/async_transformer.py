@@ -0,0 +1,236 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from . import etherscan
+from .proxy import map_implementations
+from .transformer import Transformer
+
+_END = object()
+
+
+class AsyncTransformer:
+    """The entry points of a `Transformer` for an asyncio service.
+
+    The abi are fetched from etherscan by an aiohttp session, with a connection pool and at most `max_concurrency`
+    requests in flight, and the decoding runs in `executor`, so the event loop is never blocked. The streams fetch
+    the abi of the next chunk while the current chunk is decoded.
+
+    The transformer is used by one thread at a time, the default executor has a single thread. Its own backend still
+    spreads the decoding over its workers.
+
+        async with AsyncTransformer(Transformer(nb_workers=8)) as transformer:
+            df = await transformer.traces_to_func_call_df(df=df)
+    """
+
+    def __init__(
+            self,
+            transformer: Optional[Transformer] = None,
+            # runs the decoding, by default a single thread
+            executor: Optional[Executor] = None,
+            # the max requests in flight to etherscan, by default the `prefetch_workers` of the transformer
+            max_concurrency: Optional[int] = None
+    ):
+        etherscan.require_aiohttp()
+        self.transformer = transformer or Transformer()
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.max_concurrency = max_concurrency or self.transformer.prefetch_workers
+        self._session = None
+
+    async def __aenter__(self) -> 'AsyncTransformer':
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+    def _get_session(self) -> 'etherscan.aiohttp.ClientSession':
+        # created in the loop, the connections are reused by every fetch
+        if self._session is None:
+            connector = etherscan.aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = etherscan.aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def fetch_missing_abis(self, addresses: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Fetch the abi of the contracts neither cached nor stored, the caches are not changed.
+
+        :return: contract address to the abi json string, None if the source code is not verified, the contracts
+                 whose call failed are left out and fetched again by the decoding
+        """
+        if not self.transformer.fetch_abis:
+            return {}
+        missing_addresses = self.transformer.uncached_addresses(addresses)
+        if len(missing_addresses) == 0:
+            return {}
+        return await etherscan.async_get_contract_abis(
+            missing_addresses,
+            session=self._get_session(),
+            max_concurrency=self.max_concurrency,
+            calls_per_second=self.transformer.etherscan_calls_per_second,
+            api_url=self.transformer.etherscan_api_url,
+            api_key=self.transformer.etherscan_api_key,
+            timeout=self.transformer.etherscan_timeout
+        )
+
+    def _abi_addresses(
+            self,
+            df: pd.DataFrame,
+            abi_map: Optional[Dict[str, str]],
+            allowed_calls: Optional[List[Tuple[str, str]]],
+            columns: Optional[List[str]] = None
+    ) -> List[str]:
+        """The contracts of `df` and the implementations of its known proxies, without an abi in `df` or `abi_map`."""
+        addresses = df.contract_address.dropna()
+        allowed_names = self.transformer._allowed_names(allowed_calls, self.transformer._projection(columns))
+        if allowed_names is not None:
+            addresses = addresses[addresses.str.lower().isin(allowed_names.keys())]
+        implementations = map_implementations(addresses, None, self.transformer.proxy_map,
+                                              self.transformer.implementations)
+
+        given_addresses = set(abi_map or {})
+        if 'abi' in df.columns:
+            given_addresses.update(df.contract_address[df.abi.notna()])
+        return [i for i in dict.fromkeys(list(addresses.unique()) + list(implementations.dropna().unique()))
+                if i not in given_addresses]
+
+    @staticmethod
+    def _materialize_kwargs(kwargs: Dict[str, Any]):
+        # the iterables are read once to find the abi to fetch and once more to decode
+        for key in ('allowed_calls', 'columns'):
+            if kwargs.get(key) is not None:
+                kwargs[key] = list(kwargs[key])
+
+    def _run(self, func: Callable[..., Any], fetched: Dict[str, Optional[str]], kept: Dict[str, Optional[str]],
+             **kwargs) -> Any:
+        # in the executor, the fetched abi are cached by the thread decoding, never concurrently with it. They are
+        # pinned for the call too, the bounded abi cache may evict them before their contracts are decoded
+        abis = {address: self.transformer._cache_abi_json(address, abi) for address, abi in kept.items()}
+        abis.update(self.transformer.cache_fetched_abis(fetched))
+        with self.transformer._pinned_abis(abis):
+            return func(**kwargs)
+
+    async def _decode(self, func: Callable[..., Any], df: pd.DataFrame, fetched: Dict[str, Optional[str]],
+                      kept: Optional[Dict[str, Optional[str]]] = None, **kwargs) -> Any:
+        """Decode `df` by `func` in the executor.
+
+        :param fetched: the abi fetched for `df`, stored and cached before the decoding
+        :param kept: the abi of `df` fetched with an earlier chunk, only cached
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, partial(self._run, func, fetched, kept or {}, df=df, **kwargs))
+
+    async def _fetch_and_decode(self, func: Callable[..., Any], df: pd.DataFrame, alias: Optional[Dict[str, str]],
+                                **kwargs) -> Any:
+        if alias is not None:
+            df = df.rename(alias, axis=1)
+        self._materialize_kwargs(kwargs)
+        fetched = await self.fetch_missing_abis(
+            self._abi_addresses(df, kwargs.get('abi_map'), kwargs.get('allowed_calls'), kwargs.get('columns'))
+        )
+        return await self._decode(func, df, fetched, **kwargs)
+
+    async def traces_to_func_call_df(self, df: pd.DataFrame, alias: Optional[Dict[str, str]] = None, **kwargs) -> Any:
+        """See `Transformer.traces_to_func_call_df`."""
+        return await self._fetch_and_decode(self.transformer.traces_to_func_call_df, df, alias, **kwargs)
+
+    async def logs_to_func_call_df(self, df: pd.DataFrame, alias: Optional[Dict[str, str]] = None, **kwargs) -> Any:
+        """See `Transformer.logs_to_func_call_df`."""
+        return await self._fetch_and_decode(self.transformer.logs_to_func_call_df, df, alias, **kwargs)
+
+    async def stream_traces_to_func_call_df(
+            self,
+            source: Any,
+            chunksize: int = 100_000,
+            alias: Optional[Dict[str, str]] = None,
+            contract_addresses: Optional[Iterable[str]] = None,
+            block_range: Optional[Tuple[int, int]] = None,
+            **kwargs
+    ) -> AsyncIterator[Any]:
+        """See `Transformer.stream_traces_to_func_call_df`, the abi of the chunk N+1 are fetched while the chunk N is
+        decoded.
+        """
+        chunks = self.transformer._filter_chunks(
+            self.transformer._read_chunks(
+                source,
+                chunksize,
+                read_csv_kwargs={'dtype': {'trace_address': str}},
+                columns=['block_number', 'tx_index', 'trace_address', 'contract_address', 'input', 'call_type',
+                         'from_address', 'abi'],
+                alias=alias,
+                contract_addresses=contract_addresses,
+                block_range=block_range
+            ),
+            alias=alias,
+            contract_addresses=contract_addresses,
+            block_range=block_range
+        )
+        async for result in self._pipeline(self.transformer.traces_to_func_call_df, chunks, **kwargs):
+            yield result
+
+    async def stream_logs_to_func_call_df(
+            self,
+            source: Any,
+            chunksize: int = 100_000,
+            alias: Optional[Dict[str, str]] = None,
+            contract_addresses: Optional[Iterable[str]] = None,
+            block_range: Optional[Tuple[int, int]] = None,
+            **kwargs
+    ) -> AsyncIterator[Any]:
+        """See `Transformer.stream_logs_to_func_call_df` and `stream_traces_to_func_call_df`."""
+        chunks = self.transformer._filter_chunks(
+            self.transformer._read_chunks(
+                source,
+                chunksize,
+                columns=['block_number', 'tx_index', 'contract_address', 'topic1', 'topic2', 'topic3', 'topic4',
+                         'data', 'abi'],
+                alias=alias,
+                contract_addresses=contract_addresses,
+                block_range=block_range
+            ),
+            alias=alias,
+            contract_addresses=contract_addresses,
+            block_range=block_range
+        )
+        async for result in self._pipeline(self.transformer.logs_to_func_call_df, chunks, **kwargs):
+            yield result
+
+    async def _pipeline(self, func: Callable[..., Any], chunks: Iterator[pd.DataFrame], **kwargs) -> AsyncIterator[Any]:
+        """Read and fetch the abi of the next chunk while the current chunk is decoded."""
+        loop = asyncio.get_event_loop()
+        self._materialize_kwargs(kwargs)
+
+        async def prepare(
+                decoding_abis: Dict[str, Optional[str]]
+        ) -> Tuple[Any, Dict[str, Optional[str]], Dict[str, Optional[str]]]:
+            # the chunks are read by the default executor of the loop, apart from the decoding
+            chunk = await loop.run_in_executor(None, next, chunks, _END)
+            if chunk is _END:
+                return _END, {}, {}
+            # the abi fetched for the chunk being decoded may not be cached yet, they are kept for this chunk
+            addresses = self._abi_addresses(chunk, kwargs.get('abi_map'), kwargs.get('allowed_calls'),
+                                            kwargs.get('columns'))
+            kept = {i: decoding_abis[i] for i in addresses if i in decoding_abis}
+            fetched = await self.fetch_missing_abis([i for i in addresses if i not in decoding_abis])
+            return chunk, fetched, kept
+
+        chunk, fetched, kept = await prepare({})
+        while chunk is not _END:
+            decoding = asyncio.ensure_future(self._decode(func, chunk, fetched, kept, **kwargs))
+            preparing = asyncio.ensure_future(prepare({**kept, **fetched}))
+            try:
+                result = await decoding
+            except BaseException:
+                preparing.cancel()
+                raise
+            yield result
+            chunk, fetched, kept = await preparing
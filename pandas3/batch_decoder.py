@@ -0,0 +1,360 @@
+import re
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from eth_utils import to_checksum_address
+
+from .abi_registry import CompiledEvent, CompiledFunction
+
+_STATIC_TYPE_PATTERN = re.compile(r'^(address|bool|uint\d*|bytes\d+)$')
+
+# ascii code of a hex digit to its value, 255 marks a non hex character
+_HEX_LUT = np.full(256, 255, dtype=np.uint8)
+_HEX_LUT[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+_HEX_LUT[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+_HEX_LUT[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+_NIBBLE_SHIFTS = np.arange(60, -1, -4, dtype=np.uint64)
+
+_WORD_SIZE = 64
+
+
+class StringColumn:
+    """An Arrow-like string column: the bytes of every value are concatenated in one buffer and sliced by offsets,
+    the missing values are marked by `valid`.
+
+    It is pickled as three numpy buffers instead of one python object per row, and the rows of the same length
+    can be viewed as a matrix without copying.
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray, valid: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.valid = valid
+
+    @staticmethod
+    def from_values(values: Sequence[Any]) -> 'StringColumn':
+        valid = np.fromiter((isinstance(i, str) for i in values), dtype=bool, count=len(values))
+        encoded = [i.encode('utf-8') if is_valid else b'' for i, is_valid in zip(values, valid)]
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(values)), out=offsets[1:])
+        return StringColumn(buffer=np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets=offsets, valid=valid)
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if not self.valid[index]:
+            return None
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def lengths(self) -> np.ndarray:
+        return np.where(self.valid, np.diff(self.offsets), -1)
+
+    def fixed_width_rows(self, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: positions: np.ndarray, the positions of the rows of `width` bytes,
+                 matrix: np.ndarray, the bytes of those rows, one row per position
+        """
+        positions = np.flatnonzero(self.lengths() == width)
+        if len(positions) == len(self) and len(self.buffer) == width * len(self):
+            return positions, self.buffer.reshape(-1, width)
+        starts = self.offsets[positions]
+        return positions, self.buffer[starts[:, np.newaxis] + np.arange(width)]
+
+
+class DecodedBatch:
+    """The decoded columns of a group of calldata or logs which share the same selector.
+
+    `columns` maps the flattened parameter path, e.g. `data.tokenURI`, to the values of the rows selected by `mask`.
+    `types` maps the same paths to their abi types, e.g. `uint256`.
+    `errors` holds the position, the exception class name and the message of every row failed to decode,
+    the exceptions themselves may not be picklable.
+    """
+
+    def __init__(
+            self,
+            mask: np.ndarray,
+            columns: Dict[str, Any],
+            errors: List[Tuple[int, str, str]],
+            types: Optional[Dict[str, str]] = None
+    ):
+        self.mask = mask
+        self.columns = columns
+        self.errors = errors
+        self.types = types or {}
+
+
+def is_static_layout(types: Sequence[str]) -> bool:
+    return all(_STATIC_TYPE_PATTERN.match(i) is not None for i in types)
+
+
+def decode_function_inputs(
+        func: CompiledFunction,
+        inputs: Union[StringColumn, Sequence[str]],
+        params: Optional[AbstractSet[str]] = None
+) -> DecodedBatch:
+    """Decode the calldata of one function in one pass.
+
+    The calldata with a static-only layout and the exact length are decoded by slicing the hex buffer with numpy,
+    the others fall back to the precompiled eth_abi decoder of the function.
+
+    :param params: only decode and flatten these param paths, e.g. `wad` or `data.tokenURI`, by default all of them
+    """
+    if not isinstance(inputs, StringColumn):
+        inputs = StringColumn.from_values(inputs)
+    size = len(inputs)
+    values: List[Optional[np.ndarray]] = [None] * len(func.types)
+    slots = [index for index, name in enumerate(func.names) if _is_projected(name, params)]
+    decoded = np.zeros(size, dtype=bool)
+
+    if size > 0 and is_static_layout(func.types):
+        fast_positions, fast_values = _decode_static_inputs(func.types, inputs, slots)
+        if len(fast_positions) == size:
+            values = fast_values
+        elif len(fast_positions) > 0:
+            for index, column in enumerate(fast_values):
+                if column is None:
+                    continue
+                values[index] = np.empty(size, dtype=object)
+                values[index][fast_positions] = column
+        decoded[fast_positions] = True
+
+    errors = []
+    for position in np.flatnonzero(~decoded):
+        try:
+            row = func.decode_values(inputs[position])
+        except Exception as ex:
+            errors.append((position, type(ex).__name__, str(ex)))
+            continue
+        for index in slots:
+            if values[index] is None:
+                values[index] = np.empty(size, dtype=object)
+            values[index][position] = row[index]
+        decoded[position] = True
+
+    columns, types = _flatten_values(func.names, func.inputs, values, decoded, params)
+    return DecodedBatch(mask=decoded, columns=columns, errors=errors, types=types)
+
+
+def decode_event_logs(
+        event: CompiledEvent,
+        topics: Sequence[StringColumn],
+        data: StringColumn,
+        params: Optional[AbstractSet[str]] = None
+) -> DecodedBatch:
+    """Decode the logs of one event in one pass.
+
+    :param topics: topic1 to topic4, the missing topics of a row are skipped
+    :param params: only flatten these param paths, see `decode_function_inputs`
+    """
+    size = len(data)
+    names = event.topic_names + event.data_names
+    schemas = {i['name']: i for i in event.inputs}
+    values: List[Optional[np.ndarray]] = [None] * len(names)
+    decoded = np.zeros(size, dtype=bool)
+
+    errors = []
+    for position in range(size):
+        try:
+            row_data = data[position]
+            if row_data is None:
+                raise Exception('The data is empty.')
+            row_topics = [i for i in (column[position] for column in topics) if i is not None]
+            row = event.decode(row_topics, row_data)
+        except Exception as ex:
+            errors.append((position, type(ex).__name__, str(ex)))
+            continue
+        for index, name in enumerate(names):
+            if values[index] is None:
+                values[index] = np.empty(size, dtype=object)
+            values[index][position] = row[name]
+        decoded[position] = True
+
+    columns, types = _flatten_values(names, [schemas[i] for i in names], values, decoded, params)
+    return DecodedBatch(mask=decoded, columns=columns, errors=errors, types=types)
+
+
+def deduplicate(columns: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the identical rows of several columns, the missing values are equal to each other.
+
+    :return: codes: np.ndarray, the index of the unique row of every row,
+             representatives: np.ndarray, the position of the first row of every unique row
+    """
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(column)
+        # the missing values are coded as -1, they are a value of their own
+        column_codes = column_codes + 1
+        codes, _ = pd.factorize(codes * (len(uniques) + 1) + column_codes)
+    _, representatives = np.unique(codes, return_index=True)
+    return codes, representatives
+
+
+def broadcast_batch(batch: DecodedBatch, codes: np.ndarray) -> DecodedBatch:
+    """Expand a batch decoded from the unique rows back to every row, see `deduplicate`."""
+    row_mask = batch.mask[codes]
+    decoded_rank = np.cumsum(batch.mask) - 1
+    take = decoded_rank[codes[row_mask]]
+
+    error_index = np.full(len(batch.mask), -1, dtype=np.int64)
+    error_index[[i[0] for i in batch.errors]] = np.arange(len(batch.errors))
+    row_errors = error_index[codes]
+    errors = [(position, batch.errors[row_errors[position]][1], batch.errors[row_errors[position]][2])
+              for position in np.flatnonzero(row_errors >= 0)]
+
+    return DecodedBatch(
+        mask=row_mask,
+        columns={path: values[take] for path, values in batch.columns.items()},
+        errors=errors,
+        types=batch.types
+    )
+
+
+def decode_function_task(task: Tuple[CompiledFunction, StringColumn, Optional[AbstractSet[str]]]) -> DecodedBatch:
+    """`decode_function_inputs` taking one argument, to be run by an execution backend."""
+    return decode_function_inputs(*task)
+
+
+def decode_event_task(
+        task: Tuple[CompiledEvent, List[StringColumn], StringColumn, Optional[AbstractSet[str]]]
+) -> DecodedBatch:
+    """`decode_event_logs` taking one argument, to be run by an execution backend."""
+    return decode_event_logs(*task)
+
+
+def _is_projected(path: str, params: Optional[AbstractSet[str]]) -> bool:
+    """Whether the param path is asked, is inside a param asked or contains a param asked."""
+    if params is None:
+        return True
+    return any(i == path or path.startswith(i + '.') or i.startswith(path + '.') for i in params)
+
+
+def _flatten_values(
+        names: List[str],
+        schemas: List[Dict[str, Any]],
+        values: List[Optional[np.ndarray]],
+        decoded: np.ndarray,
+        params: Optional[AbstractSet[str]] = None
+) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+    columns = {}
+    types = {}
+    for name, schema, column in zip(names, schemas, values):
+        if not _is_projected(name, params):
+            continue
+        if column is None:
+            column = np.empty(len(decoded), dtype=object)
+        flatten_param(name, schema, column[decoded], columns, types, params)
+    return columns, types
+
+
+def flatten_param(
+        name: str,
+        schema: Dict[str, Any],
+        column: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        types: Optional[Dict[str, str]] = None,
+        params: Optional[AbstractSet[str]] = None
+):
+    """Split the nested tuple params to columns named by their dotted path, the same as `json_normalize` does.
+
+    :param params: only flatten these paths, see `decode_function_inputs`
+    """
+    if schema['type'] != 'tuple':
+        columns[name] = column
+        if types is not None:
+            types[name] = schema['type']
+        return
+
+    for index, component in enumerate(schema['components']):
+        path = f"{name}.{component['name']}"
+        if not _is_projected(path, params):
+            continue
+        sub_column = object_column([i[index] for i in column])
+        flatten_param(path, component, sub_column, columns, types, params)
+
+
+def object_column(values: Sequence[Any]) -> np.ndarray:
+    """Build an 1-d object array, the tuple and list values are kept as elements instead of a new dimension."""
+    column = np.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        column[index] = value
+    return column
+
+
+def _decode_static_inputs(
+        types: Sequence[str],
+        inputs: StringColumn,
+        slots: Optional[Sequence[int]] = None
+) -> Tuple[np.ndarray, List[Optional[np.ndarray]]]:
+    """Decode the calldata made of 32-byte words only.
+
+    :param slots: only decode these arguments, the padding of every argument is still validated
+    :return: positions: np.ndarray, the positions of the decoded rows,
+             values: List[Optional[np.ndarray]], one column per argument, None if it is not in `slots`
+    """
+    width = 10 + _WORD_SIZE * len(types)
+    positions, raw = inputs.fixed_width_rows(width)
+    if len(positions) == 0:
+        return positions, []
+
+    nibbles = _HEX_LUT[raw[:, 10:]]
+    valid = (nibbles != 255).all(axis=1)
+
+    words = []
+    for index, type_str in enumerate(types):
+        word = nibbles[:, index * _WORD_SIZE:(index + 1) * _WORD_SIZE]
+        ascii_word = raw[:, 10 + index * _WORD_SIZE:10 + (index + 1) * _WORD_SIZE]
+        valid &= _valid_padding(type_str, word)
+        words.append((type_str, word, ascii_word))
+
+    positions = positions[valid]
+    values = [
+        _decode_static_word(type_str, word[valid], ascii_word[valid]) if slots is None or index in slots else None
+        for index, (type_str, word, ascii_word) in enumerate(words)
+    ]
+    return positions, values
+
+
+def _type_size(type_str: str, prefix: str, default: int) -> int:
+    suffix = type_str[len(prefix):]
+    return int(suffix) if suffix else default
+
+
+def _valid_padding(type_str: str, word: np.ndarray) -> np.ndarray:
+    if type_str == 'address':
+        return (word[:, :24] == 0).all(axis=1)
+    if type_str == 'bool':
+        return (word[:, :63] == 0).all(axis=1) & (word[:, 63] <= 1)
+    if type_str.startswith('uint'):
+        return (word[:, :_WORD_SIZE - _type_size(type_str, 'uint', 256) // 4] == 0).all(axis=1)
+    # bytes<M> is right padded
+    return (word[:, 2 * _type_size(type_str, 'bytes', 32):] == 0).all(axis=1)
+
+
+def _decode_static_word(type_str: str, word: np.ndarray, ascii_word: np.ndarray) -> np.ndarray:
+    if type_str == 'address':
+        hex_addresses = np.ascontiguousarray(ascii_word[:, 24:]).view('S40').ravel()
+        unique, inverse = np.unique(hex_addresses, return_inverse=True)
+        checksum = np.array([to_checksum_address(i.decode('ascii')) for i in unique], dtype=object)
+        return checksum[inverse]
+
+    if type_str == 'bool':
+        return word[:, 63] == 1
+
+    if type_str.startswith('uint'):
+        low = (word[:, 48:].astype(np.uint64) << _NIBBLE_SHIFTS).sum(axis=1, dtype=np.uint64)
+        small = (word[:, :48] == 0).all(axis=1) & (low < np.uint64(2 ** 63))
+        if small.all():
+            return low.astype(np.int64)
+        result = low.astype(object)
+        hex_words = np.ascontiguousarray(ascii_word[~small]).view(f'S{_WORD_SIZE}').ravel()
+        result[~small] = [int(i, 16) for i in hex_words]
+        return result
+
+    size = _type_size(type_str, 'bytes', 32)
+    buffer = ((word[:, 0:2 * size:2] << 4) | word[:, 1:2 * size:2]).astype(np.uint8).tobytes()
+    result = np.empty(len(word), dtype=object)
+    result[:] = [buffer[i:i + size] for i in range(0, len(buffer), size)]
+    return result
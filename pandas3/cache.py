@@ -0,0 +1,113 @@
+import json
+import logging
+from datetime import timedelta, datetime
+from typing import Any, Callable, Dict, Optional, Union
+
+import cachetools
+
+logger = logging.getLogger()
+
+# the ttl of the lru policy by default, the lfu policy has no ttl
+DEFAULT_TTL = object()
+_DEFAULT_LRU_TTL = timedelta(minutes=3)
+
+
+class _StatsMixin:
+    """Count the hits and misses of `get`, the evictions and the rejections of a cachetools cache, and bound its
+    number of entries by `capacity` when its `maxsize` is a memory budget.
+    """
+
+    def __init__(self, *args, capacity: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def __setitem__(self, key, value):
+        size = self.getsizeof(value)
+        if size > self.maxsize:
+            # larger than the whole budget, it is never cached, the transformer keeps it for the current call only
+            self.rejections += 1
+            logger.warning("%s of size %d is larger than the cache budget %d, it is not cached", key, size,
+                           self.maxsize)
+            return
+        super().__setitem__(key, value)
+        while self.capacity is not None and len(self) > self.capacity:
+            self.popitem()
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'rejections': self.rejections,
+            'size': len(self),
+            'currsize': self.currsize,
+            'maxsize': self.maxsize
+        }
+
+
+class LRUCache(_StatsMixin, cachetools.LRUCache):
+    pass
+
+
+class LFUCache(_StatsMixin, cachetools.LFUCache):
+    pass
+
+
+class TTLCache(_StatsMixin, cachetools.TTLCache):
+    pass
+
+
+def abi_size(abi: Optional[Any]) -> int:
+    """The size of a parsed abi, measured by the length of its json text."""
+    if abi is None:
+        return 1
+    return len(json.dumps(abi, separators=(',', ':')))
+
+
+def make_cache(
+        capacity: int,
+        ttl: Union[timedelta, None, object] = None,
+        policy: str = 'lru',
+        max_abi_size: Optional[int] = None,
+        getsizeof: Callable[[Any], int] = abi_size
+) -> cachetools.Cache:
+    """
+    :param capacity: the max number of entries
+    :param ttl: the entries expire after the ttl, only supported by the 'lru' policy, `DEFAULT_TTL` is 3 minutes by
+                the 'lru' policy and none by the 'lfu' policy
+    :param policy: 'lru' or 'lfu'
+    :param max_abi_size: the budget of the total size of the cached abi, see `abi_size`
+    """
+    assert policy in ('lru', 'lfu')
+    if ttl is DEFAULT_TTL:
+        ttl = _DEFAULT_LRU_TTL if policy == 'lru' else None
+    assert ttl is None or policy == 'lru', 'ttl is only supported by the lru policy'
+
+    if max_abi_size is None:
+        kwargs = {'maxsize': capacity}
+    else:
+        kwargs = {'maxsize': max_abi_size, 'getsizeof': getsizeof, 'capacity': capacity}
+
+    if ttl is not None:
+        return TTLCache(ttl=ttl, timer=datetime.now, **kwargs)
+    if policy == 'lfu':
+        return LFUCache(**kwargs)
+    return LRUCache(**kwargs)
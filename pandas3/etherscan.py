@@ -1,18 +1,189 @@
-import requests
+import asyncio
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency, install `web3-pandas[async]`
+    aiohttp = None
 
 logger = logging.getLogger()
 
+_FAILED = object()
+
+API_URL = 'https://api.etherscan.io/api'
+# seconds to connect and to read the response of a call
+TIMEOUT = 30
 
-def get_contract_abi(contract_address: str):
-    r = requests.get('https://api.etherscan.io/api', params={
+
+class AbiNotVerified(Exception):
+    """The source code of the contract is not verified, a definitive answer unlike a failed call, e.g. a timeout or
+    a rate limit.
+    """
+
+
+def _getabi_params(contract_address: str, api_key: Optional[str]) -> Dict[str, str]:
+    params = {
         'module': 'contract',
         'action': 'getabi',
         'address': contract_address
-    })
-    r.raise_for_status()
-    data = r.json()
+    }
+    if api_key is not None:
+        params['apikey'] = api_key
+    return params
+
+
+def _getabi_result(data: Dict[str, Any]) -> str:
     if data['status'] != '1':
-        logger.error("Failed to get contract abi: %s:%s", data['status'], data['message'])
+        if 'not verified' in str(data.get('result', '')).lower():
+            raise AbiNotVerified(data['result'])
+        logger.error("Failed to get contract abi: %s:%s:%s", data['status'], data['message'], data.get('result'))
         raise Exception("Get ABI from Etherscan failed")
     return data['result']
+
+
+def get_contract_abi(
+        contract_address: str,
+        session: Optional[requests.Session] = None,
+        api_url: str = API_URL,
+        api_key: Optional[str] = None,
+        timeout: float = TIMEOUT
+):
+    """
+    :raise AbiNotVerified: if the source code of the contract is not verified
+    """
+    r = (session or requests).get(api_url, params=_getabi_params(contract_address, api_key), timeout=timeout)
+    r.raise_for_status()
+    return _getabi_result(r.json())
+
+
+class RateLimiter:
+    """Space out the calls shared by several threads to at most `calls_per_second`."""
+
+    def __init__(self, calls_per_second: float):
+        self.interval = 1 / calls_per_second
+        self.next_call = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait_until = max(self.next_call, now)
+            self.next_call = wait_until + self.interval
+        if wait_until > now:
+            time.sleep(wait_until - now)
+
+
+def get_contract_abis(
+        contract_addresses: Iterable[str],
+        max_workers: int = 4,
+        calls_per_second: float = 5,
+        api_url: str = API_URL,
+        api_key: Optional[str] = None,
+        timeout: float = TIMEOUT
+) -> Dict[str, Optional[str]]:
+    """Fetch the ABIs of many contracts concurrently through a pooled session.
+
+    :return: contract address to the abi json string, None if the source code is not verified, the contracts whose
+             call failed, e.g. by a timeout or a rate limit, are left out
+    """
+    rate_limiter = RateLimiter(calls_per_second)
+
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        def fetch(address: str) -> Any:
+            rate_limiter.wait()
+            try:
+                return get_contract_abi(address, session=session, api_url=api_url, api_key=api_key, timeout=timeout)
+            except AbiNotVerified:
+                return None
+            except Exception as ex:
+                logger.warning("Failed to get contract abi of %s: %s", address, ex)
+                return _FAILED
+
+        addresses = list(dict.fromkeys(contract_addresses))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return {k: v for k, v in zip(addresses, executor.map(fetch, addresses)) if v is not _FAILED}
+
+
+def require_aiohttp():
+    if aiohttp is None:
+        raise ImportError('aiohttp is required by the asyncio api, install it by `pip install web3-pandas[async]`')
+
+
+class AsyncRateLimiter:
+    """Space out the calls of the coroutines of an event loop to at most `calls_per_second`."""
+
+    def __init__(self, calls_per_second: float):
+        self.interval = 1 / calls_per_second
+        self.next_call = time.monotonic()
+
+    async def wait(self):
+        # no await between the read and the update, the coroutines of a loop never interleave here
+        now = time.monotonic()
+        wait_until = max(self.next_call, now)
+        self.next_call = wait_until + self.interval
+        if wait_until > now:
+            await asyncio.sleep(wait_until - now)
+
+
+async def async_get_contract_abi(
+        contract_address: str,
+        session: 'aiohttp.ClientSession',
+        api_url: str = API_URL,
+        api_key: Optional[str] = None,
+        timeout: float = TIMEOUT
+) -> str:
+    """Same as `get_contract_abi` by an aiohttp session."""
+    async with session.get(api_url, params=_getabi_params(contract_address, api_key),
+                           timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+        r.raise_for_status()
+        return _getabi_result(await r.json(content_type=None))
+
+
+async def async_get_contract_abis(
+        contract_addresses: Iterable[str],
+        session: Optional['aiohttp.ClientSession'] = None,
+        max_concurrency: int = 4,
+        calls_per_second: float = 5,
+        api_url: str = API_URL,
+        api_key: Optional[str] = None,
+        timeout: float = TIMEOUT
+) -> Dict[str, Optional[str]]:
+    """Same as `get_contract_abis` without blocking the event loop, at most `max_concurrency` requests are in flight.
+
+    :param session: a session to reuse its connection pool, by default a session is created for the call
+    """
+    require_aiohttp()
+    if session is None:
+        connector = aiohttp.TCPConnector(limit=max_concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await async_get_contract_abis(contract_addresses, session, max_concurrency, calls_per_second,
+                                                 api_url, api_key, timeout)
+
+    rate_limiter = AsyncRateLimiter(calls_per_second)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(address: str) -> Any:
+        async with semaphore:
+            await rate_limiter.wait()
+            try:
+                return await async_get_contract_abi(address, session, api_url=api_url, api_key=api_key,
+                                                    timeout=timeout)
+            except AbiNotVerified:
+                return None
+            except Exception as ex:
+                logger.warning("Failed to get contract abi of %s: %s", address, ex)
+                return _FAILED
+
+    addresses = list(dict.fromkeys(contract_addresses))
+    return {k: v for k, v in zip(addresses, await asyncio.gather(*[fetch(i) for i in addresses])) if v is not _FAILED}
@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Iterable, List, Optional, Union
+
+
+class SerialBackend:
+    """Run the tasks one by one in the current thread."""
+
+    nb_workers = 1
+
+    def map(self, func: Callable[[Any], Any], tasks: Iterable[Any]) -> List[Any]:
+        return [func(i) for i in tasks]
+
+
+class ThreadBackend:
+    """Run the tasks by a thread pool, useful when the decoders release the GIL or the tasks are small."""
+
+    def __init__(self, nb_workers: int):
+        self.nb_workers = nb_workers
+
+    def map(self, func: Callable[[Any], Any], tasks: Iterable[Any]) -> List[Any]:
+        tasks = list(tasks)
+        if len(tasks) <= 1:
+            return [func(i) for i in tasks]
+        with ThreadPoolExecutor(max_workers=self.nb_workers) as executor:
+            return list(executor.map(func, tasks))
+
+
+class ProcessBackend:
+    """Run the tasks by a process pool created for every call, so that nothing is left running between calls
+    and no global state is shared by several transformers.
+
+    The tasks and results are pickled, they should carry column buffers rather than one object per row.
+    """
+
+    def __init__(self, nb_workers: int, mp_context: Optional[str] = None):
+        self.nb_workers = nb_workers
+        self.mp_context = mp_context
+
+    def map(self, func: Callable[[Any], Any], tasks: Iterable[Any]) -> List[Any]:
+        tasks = list(tasks)
+        if len(tasks) <= 1:
+            return [func(i) for i in tasks]
+        context = None if self.mp_context is None else get_context(self.mp_context)
+        with ProcessPoolExecutor(max_workers=min(self.nb_workers, len(tasks)), mp_context=context) as executor:
+            return list(executor.map(func, tasks))
+
+
+ExecutionBackend = Union[SerialBackend, ThreadBackend, ProcessBackend]
+
+
+def make_backend(backend: Union[str, ExecutionBackend, None], nb_workers: int) -> ExecutionBackend:
+    """
+    :param backend: 'serial', 'thread', 'process', a backend object, or None to pick 'process' if nb_workers > 1
+    """
+    if backend is None:
+        backend = 'process' if nb_workers > 1 else 'serial'
+    if not isinstance(backend, str):
+        return backend
+
+    assert backend in ('serial', 'thread', 'process')
+    if backend == 'thread':
+        return ThreadBackend(nb_workers)
+    if backend == 'process':
+        return ProcessBackend(nb_workers)
+    return SerialBackend()
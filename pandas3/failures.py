@@ -0,0 +1,99 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class FailureReport:
+    """Count the decoding failures per (contract address, selector, error class) instead of logging every row.
+
+    A warning is logged the first time a failure is seen and then every time its count reaches the next power of ten,
+    so the log stays small on millions of undecodable rows. The identifiers of the first `max_rows` failed rows are
+    kept, see `failed_rows`.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, max_rows: int = 100_000):
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.max_rows = max_rows
+        self.counts: Dict[Tuple[str, str, str], int] = {}
+        self.names: Dict[Tuple[str, str, str], str] = {}
+        self.messages: Dict[Tuple[str, str, str], str] = {}
+        self._rows: List[pd.DataFrame] = []
+        self._row_count = 0
+
+    def record(
+            self,
+            address: str,
+            selector: str,
+            name: str,
+            errors: List[Tuple[int, str, str]],
+            rows: pd.DataFrame
+    ):
+        """
+        :param errors: the position, the exception class name and the message of every failed row
+        :param rows: the identifiers of the failed rows, e.g. block_number, tx_index, in the order of `errors`
+        """
+        error_classes = [i[1] for i in errors]
+        counts = {}
+        for _, error_class, message in errors:
+            if error_class not in counts:
+                counts[error_class] = 0
+                self.messages.setdefault((address, selector, error_class), message)
+            counts[error_class] += 1
+
+        for error_class, count in counts.items():
+            key = (address, selector, error_class)
+            before = self.counts.get(key, 0)
+            self.counts[key] = before + count
+            self.names.setdefault(key, name)
+            if self._should_log(before, before + count):
+                self.logger.warning("decoding %s of %s (%s) failed %d times with %s: %s",
+                                    name, address, selector, before + count, error_class, self.messages[key])
+
+        row_count = min(len(rows), self.max_rows - self._row_count)
+        if row_count > 0:
+            self._rows.append(rows.iloc[:row_count].assign(
+                contract_address=address,
+                selector=selector,
+                error=error_classes[:row_count]
+            ))
+            self._row_count += row_count
+
+    @staticmethod
+    def _should_log(before: int, after: int) -> bool:
+        # the first failure, then whenever the count gets one more digit
+        return before == 0 or len(str(after)) > len(str(before))
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self) -> pd.DataFrame:
+        """
+        :return: one row per (contract_address, selector, error) with the name, the count and the first message,
+                 the most frequent first
+        """
+        keys = list(self.counts.keys())
+        summary_df = pd.DataFrame({
+            'contract_address': [i[0] for i in keys],
+            'selector': [i[1] for i in keys],
+            'name': [self.names[i] for i in keys],
+            'error': [i[2] for i in keys],
+            'count': np.array([self.counts[i] for i in keys], dtype=np.int64),
+            'message': [self.messages[i] for i in keys]
+        })
+        return summary_df.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+    def failed_rows(self) -> pd.DataFrame:
+        """The identifiers of the failed rows with their contract_address, selector and error."""
+        if len(self._rows) == 0:
+            return pd.DataFrame(columns=['contract_address', 'selector', 'error'])
+        return pd.concat(self._rows, axis=0, ignore_index=True)
+
+    def reset(self):
+        self.counts.clear()
+        self.names.clear()
+        self.messages.clear()
+        self._rows.clear()
+        self._row_count = 0
@@ -0,0 +1,183 @@
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from . import arrow
+
+_RESULT_FILE_PATTERN = re.compile(r'^blocks-(\d+)-(\d+)\.parquet$')
+
+_SOURCE_ID_PATTERN = re.compile(r'[^\w.-]')
+
+
+def _safe_source_id(source_id: str) -> str:
+    return _SOURCE_ID_PATTERN.sub('_', source_id)
+
+
+class FileCheckpointStore:
+    """A directory of checkpoints keyed by the source id, the highest block fully decoded of every source."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, source_id: str) -> str:
+        return os.path.join(self.directory, _safe_source_id(source_id) + '.json')
+
+    def get(self, source_id: str) -> Optional[int]:
+        try:
+            with open(self._path(source_id), encoding='utf-8') as file_handle:
+                return json.load(file_handle)['last_block']
+        except (OSError, ValueError):
+            return None
+
+    def put(self, source_id: str, last_block: int):
+        # write to a temporary file then rename it, the readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file_handle:
+            json.dump({'source_id': source_id, 'last_block': int(last_block)}, file_handle)
+        os.replace(tmp_path, self._path(source_id))
+
+
+class ParquetResultStore:
+    """The decoded calls persisted as a parquet dataset partitioned by source, contract_address and call_name, with
+    one file per appended block range, e.g.
+    `source=traces/contract_address=0x.../call_name=mint/blocks-000000000100-000000000199.parquet`.
+
+    Every source, e.g. the traces and the logs of a chain, is truncated and appended on its own, like its checkpoint.
+    Read it by `pyarrow.dataset.dataset(directory, partitioning='hive')` or `read_table`.
+    """
+
+    def __init__(self, directory: str):
+        arrow.require_pyarrow()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _source_directory(self, source_id: str) -> str:
+        return os.path.join(self.directory, f'source={_safe_source_id(source_id)}')
+
+    def _files(self, directory: str) -> List[Tuple[str, int, int]]:
+        files = []
+        for root, _, names in os.walk(directory):
+            for name in names:
+                match = _RESULT_FILE_PATTERN.match(name)
+                if match is not None:
+                    files.append((os.path.join(root, name), int(match.group(1)), int(match.group(2))))
+        return files
+
+    def truncate(self, source_id: str, from_block: int):
+        """Drop the rows of a source from `from_block`, only the files overlapping them are read."""
+        for path, first_block, last_block in self._files(self._source_directory(source_id)):
+            if last_block < from_block:
+                continue
+            if first_block < from_block:
+                table = arrow.pq.read_table(path)
+                kept_table = table.filter(arrow.pc.less(table['block_number'], from_block))
+                self._write(os.path.dirname(path), kept_table, first_block,
+                            arrow.pc.max(kept_table['block_number']).as_py())
+            os.remove(path)
+
+    def append(self, source_id: str, tables: Dict[Tuple[str, str], Any]) -> List[str]:
+        """
+        :param tables: the arrow output of the transformer, see `arrow.batches_to_tables`
+        :return: the paths of the written files
+        """
+        paths = []
+        for (address, name), table in tables.items():
+            if table.num_rows == 0:
+                continue
+            block_numbers = table['block_number']
+            paths.append(self._write(
+                os.path.join(self._source_directory(source_id), f'contract_address={address}', f'call_name={name}'),
+                table,
+                arrow.pc.min(block_numbers).as_py(),
+                arrow.pc.max(block_numbers).as_py()
+            ))
+        return paths
+
+    @staticmethod
+    def _write(directory: str, table: Any, first_block: int, last_block: int) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'blocks-{first_block:012d}-{last_block:012d}.parquet')
+        # write to a temporary file then rename it, the readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        arrow.pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def read_table(self, address: str, name: str, source_id: Optional[str] = None) -> Any:
+        """The decoded calls of a function or an event ordered by block.
+
+        :param source_id: only read the calls of a source, by default of every source
+        """
+        if source_id is None:
+            source_directories = sorted(os.path.join(self.directory, i) for i in os.listdir(self.directory)
+                                        if i.startswith('source='))
+        else:
+            source_directories = [self._source_directory(source_id)]
+        files = []
+        for source_directory in source_directories:
+            files += self._files(os.path.join(source_directory, f'contract_address={address}', f'call_name={name}'))
+        tables = [arrow.pq.read_table(path) for path, _, _ in sorted(files, key=lambda i: i[1])]
+        if len(tables) == 0:
+            return None
+        return arrow.pa.concat_tables(tables)
+
+
+class IncrementalDecoder:
+    """Decode the overlapping block windows of a source incrementally.
+
+    Every update decodes the rows after the checkpoint of the source only, except the last `reorg_window` blocks which
+    are decoded again and replace the persisted rows, in case of a chain reorganization. The checkpoint moves after
+    the results are written, so an interrupted update is simply done again.
+    """
+
+    def __init__(
+            self,
+            transformer: Any,
+            checkpoint_store: FileCheckpointStore,
+            result_store: ParquetResultStore,
+            reorg_window: int = 64
+    ):
+        self.transformer = transformer
+        self.checkpoint_store = checkpoint_store
+        self.result_store = result_store
+        self.reorg_window = reorg_window
+
+    def update_traces(self, source_id: str, df: pd.DataFrame, **kwargs) -> Optional[int]:
+        """Decode the new traces of a window, see `Transformer.traces_to_func_call_df` for the kwargs.
+
+        :return: the new checkpoint of the source
+        """
+        return self._update(source_id, df, self.transformer.traces_to_func_call_df, **kwargs)
+
+    def update_logs(self, source_id: str, df: pd.DataFrame, **kwargs) -> Optional[int]:
+        """Decode the new logs of a window, see `update_traces`."""
+        return self._update(source_id, df, self.transformer.logs_to_func_call_df, **kwargs)
+
+    def _update(self, source_id: str, df: pd.DataFrame, to_func_call_df: Any, **kwargs) -> Optional[int]:
+        alias = kwargs.pop('alias', None)
+        if alias is not None:
+            df = df.rename(alias, axis=1)
+
+        last_block = self.checkpoint_store.get(source_id)
+        if len(df) == 0:
+            return last_block
+
+        if last_block is not None:
+            if int(df.block_number.max()) < last_block:
+                # a stale window never rolls the results back
+                return last_block
+            # the blocks of the reorg window covered by this window are replaced
+            from_block = max(last_block - self.reorg_window + 1, int(df.block_number.min()))
+            df = df[df.block_number >= from_block].copy()
+            self.result_store.truncate(source_id, from_block)
+
+        new_last_block = int(df.block_number.max())
+        self.result_store.append(source_id, to_func_call_df(df=df, output='arrow', **kwargs))
+        self.checkpoint_store.put(source_id, new_last_block)
+        return new_last_block
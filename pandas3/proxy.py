@@ -0,0 +1,94 @@
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def parent_trace_address(trace_address: pd.Series) -> pd.Series:
+    """The trace address of the caller of every trace, e.g. '' for '0' and '0,1' for '0,1,2'."""
+    trace_address = trace_address.fillna('').astype(str)
+    return trace_address.str.rpartition(',')[0].where(trace_address.str.contains(','), '')
+
+
+def delegatecall_implementations(df: pd.DataFrame) -> pd.Series:
+    """Find the implementation of every call to a proxy by its delegatecall child trace, i.e. a delegatecall made by
+    the called contract with the same input, as EIP-1967 and EIP-1822 proxies forward their calldata.
+
+    :param df: the traces with the columns block_number, tx_index, trace_address, contract_address, input,
+               call_type and from_address
+    :return: the implementation address of every row indexed like `df`, NaN if the row is not proxied
+             or its delegatecall is not in `df`
+    """
+    implementations = pd.Series(np.nan, index=df.index, dtype=object)
+    if not {'call_type', 'from_address'}.issubset(df.columns):
+        return implementations
+
+    is_delegatecall = (df.call_type == 'delegatecall').values
+    if not is_delegatecall.any():
+        return implementations
+
+    keys = ['block_number', 'tx_index', 'trace_address', 'address', 'input']
+    calls_df = pd.DataFrame({
+        'block_number': df.block_number.values,
+        'tx_index': df.tx_index.values,
+        'trace_address': df.trace_address.fillna('').astype(str).values,
+        'address': df.contract_address.str.lower().values,
+        'input': df.input.values,
+        'position': np.arange(len(df))
+    })[~is_delegatecall]
+    children = df[is_delegatecall]
+    children_df = pd.DataFrame({
+        'block_number': children.block_number.values,
+        'tx_index': children.tx_index.values,
+        'trace_address': parent_trace_address(children.trace_address).values,
+        'address': children.from_address.str.lower().values,
+        'input': children.input.values,
+        'implementation': children.contract_address.values
+    }).drop_duplicates(subset=keys)
+
+    matched_df = calls_df.merge(children_df, on=keys, how='inner')
+    implementations.iloc[matched_df.position.values] = matched_df.implementation.values
+    return implementations
+
+
+def latest_implementations(
+        addresses: pd.Series,
+        implementations: pd.Series,
+        block_numbers: pd.Series
+) -> Dict[str, str]:
+    """
+    :return: lower case proxy address to its implementation at the latest block of the rows
+    """
+    mask = implementations.notna().values
+    if not mask.any():
+        return {}
+    latest_df = pd.DataFrame({
+        'address': addresses.str.lower().values[mask],
+        'implementation': implementations.values[mask],
+        'block_number': block_numbers.values[mask]
+    }).sort_values('block_number', kind='stable').drop_duplicates(subset=['address'], keep='last')
+    return dict(zip(latest_df.address, latest_df.implementation))
+
+
+def map_implementations(
+        addresses: pd.Series,
+        implementations: Optional[pd.Series],
+        *proxy_maps: Dict[str, str]
+) -> pd.Series:
+    """Fill the rows without a known implementation from the proxy maps, the first map containing the address wins.
+
+    :param proxy_maps: lower case proxy address to implementation address
+    """
+    if implementations is None:
+        implementations = pd.Series(np.nan, index=addresses.index, dtype=object)
+    missing = implementations.isna().values
+    if not missing.any() or not any(proxy_maps):
+        return implementations
+
+    lower_addresses = addresses.str.lower()
+    for proxy_map in proxy_maps:
+        if len(proxy_map) == 0:
+            continue
+        filled = lower_addresses.map(proxy_map)
+        implementations = implementations.where(implementations.notna(), filled)
+    return implementations
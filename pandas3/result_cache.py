@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import arrow
+
+_MANIFEST = 'manifest.json'
+_PICKLED_COLUMNS = b'pandas3.pickled_columns'
+# a change of the file layout or of the decoded values must change the keys
+_VERSION = 2
+
+
+def fingerprint_path(path: str) -> Optional[Dict[str, Any]]:
+    """The path, modification time and size of a file, or of every file of a directory, e.g. a parquet dataset.
+
+    :return: None if the path does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    path = os.path.abspath(path)
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return {'path': path, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    files = []
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            stat = os.stat(os.path.join(root, name))
+            files.append([os.path.relpath(os.path.join(root, name), path), stat.st_mtime_ns, stat.st_size])
+    return {'path': path, 'files': sorted(files)}
+
+
+def fingerprint_frame(df: pd.DataFrame, columns: List[str]) -> str:
+    """The content hash of the columns of a dataframe, vectorized by `pd.util.hash_pandas_object`."""
+    hasher = hashlib.sha256()
+    for column in columns:
+        if column in df.columns:
+            hasher.update(column.encode())
+            hasher.update(pd.util.hash_pandas_object(df[column], index=False).values.tobytes())
+    return hasher.hexdigest()
+
+
+def hash_abi(abi: Optional[Any]) -> Optional[str]:
+    return None if abi is None else hashlib.sha256(json.dumps(abi, sort_keys=True).encode()).hexdigest()
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _frame_to_table(df: pd.DataFrame) -> 'arrow.pa.Table':
+    """The dataframe as an arrow table, the columns arrow cannot hold, e.g. the ints wider than 64 bits or the mixed
+    values of the long output, are pickled value by value.
+    """
+    pickled_columns = []
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        try:
+            arrow.pa.array(df[column], from_pandas=True)
+        except (arrow.pa.ArrowInvalid, arrow.pa.ArrowTypeError, OverflowError):
+            pickled_columns.append(column)
+    if pickled_columns:
+        df = df.assign(**{
+            column: [None if _is_missing(value) else pickle.dumps(value) for value in df[column]]
+            for column in pickled_columns
+        })
+    table = arrow.pa.Table.from_pandas(df, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_PICKLED_COLUMNS] = json.dumps(pickled_columns).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def _table_to_frame(table: 'arrow.pa.Table') -> pd.DataFrame:
+    # the int columns with missing values stay python ints, like the output of the transformer
+    df = table.to_pandas(integer_object_nulls=True)
+    pickled_columns = set(json.loads((table.schema.metadata or {}).get(_PICKLED_COLUMNS, b'[]')))
+    columns = {}
+    for column in df.columns:
+        values = df[column].values
+        if values.dtype == object:
+            if column in pickled_columns:
+                # filled one by one, the lists of an array param are not split to a 2-d array, and the wide frames
+                # are mostly missing values
+                unpickled = np.full(len(values), np.nan, dtype=object)
+                for index in np.flatnonzero(pd.notna(values)):
+                    unpickled[index] = pickle.loads(values[index])
+                values = unpickled
+            else:
+                # arrow reads the missing values as None, the transformer outputs NaN
+                values = np.where(pd.isna(values), np.nan, values)
+        columns[column] = values
+    # built at once, setting the columns one by one splits the blocks of the frame every time
+    return pd.DataFrame(columns, index=df.index, columns=df.columns)
+
+
+class _EntryWriter:
+    """Write the frames of an entry to a temporary directory, moved to the cache by `commit` only, so that the readers
+    never see a partial entry, e.g. of a stream not read to the end.
+    """
+
+    def __init__(self, cache: 'FileResultCache', key: str):
+        self.cache = cache
+        self.key = key
+        self.directory = tempfile.mkdtemp(dir=cache.directory, prefix='.tmp-')
+        self.nb_parts = 0
+
+    def append(self, df: pd.DataFrame):
+        table = _frame_to_table(df)
+        # an uncompressed arrow ipc file, i.e. feather v2, so that the hits are memory mapped without decompression
+        with arrow.pa.OSFile(os.path.join(self.directory, f'part-{self.nb_parts:05d}.feather'), 'wb') as sink:
+            with arrow.pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        self.nb_parts += 1
+
+    def commit(self, abis: Dict[str, Optional[str]], state: Optional[Dict[str, Any]] = None):
+        """
+        :param state: json serializable state learned by the call, given back by a hit, see `FileResultCache.get`
+        """
+        with open(os.path.join(self.directory, _MANIFEST), 'w', encoding='utf-8') as file_handle:
+            json.dump({'key': self.key, 'nb_parts': self.nb_parts, 'abis': abis, 'state': state or {}}, file_handle)
+        path = self.cache._path(self.key)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(self.directory, path)
+        self.cache.evict()
+
+    def abort(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class FileResultCache:
+    """A directory of decoded results keyed by the fingerprint of the input, the abi and the options of the call, see
+    `Transformer(result_cache=...)`.
+
+    Every entry is a directory of uncompressed feather files, one per frame, read back memory mapped. The least
+    recently used entries are evicted once the entries take more than `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 10 * 2 ** 30):
+        arrow.require_pyarrow()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """The key of the json serializable parts, e.g. the fingerprint of the input and the options of the call."""
+        return hashlib.sha256(json.dumps(dict(parts, version=_VERSION), sort_keys=True, default=str).encode()) \
+            .hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(
+            self,
+            key: str,
+            is_valid: Optional[Callable[[Dict[str, Optional[str]]], bool]] = None,
+            on_hit: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Optional[Iterator[pd.DataFrame]]:
+        """
+        :param is_valid: called with the abi hashes of the entry, lower case contract address to `hash_abi`, an
+                         invalid entry is a miss, e.g. if an abi changed since
+        :param on_hit: called with the state committed with the entry, e.g. to restore what the call learned
+        :return: the frames of the entry, read one by one, or None if missing
+        """
+        manifest_path = os.path.join(self._path(key), _MANIFEST)
+        try:
+            with open(manifest_path, encoding='utf-8') as file_handle:
+                manifest = json.load(file_handle)
+        except (OSError, ValueError):
+            return None
+        if is_valid is not None and not is_valid(manifest['abis']):
+            return None
+        # the modification time of the manifest orders the eviction
+        os.utime(manifest_path)
+        if on_hit is not None:
+            on_hit(manifest.get('state', {}))
+        return self._read_parts(key, manifest['nb_parts'])
+
+    def _read_parts(self, key: str, nb_parts: int) -> Iterator[pd.DataFrame]:
+        for index in range(nb_parts):
+            with arrow.pa.memory_map(os.path.join(self._path(key), f'part-{index:05d}.feather')) as source:
+                yield _table_to_frame(arrow.pa.ipc.open_file(source).read_all())
+
+    def writer(self, key: str) -> _EntryWriter:
+        return _EntryWriter(self, key)
+
+    def put(
+            self,
+            key: str,
+            frames: List[pd.DataFrame],
+            abis: Dict[str, Optional[str]],
+            state: Optional[Dict[str, Any]] = None
+    ):
+        writer = self.writer(key)
+        try:
+            for df in frames:
+                writer.append(df)
+            writer.commit(abis, state)
+        except BaseException:
+            writer.abort()
+            raise
+
+    def _entries(self) -> List[Dict[str, Any]]:
+        entries = []
+        for name in os.listdir(self.directory):
+            path = self._path(name)
+            manifest_path = os.path.join(path, _MANIFEST)
+            if name.startswith('.') or not os.path.exists(manifest_path):
+                continue
+            entries.append({
+                'path': path,
+                'last_used': os.stat(manifest_path).st_mtime,
+                'size': sum(os.stat(os.path.join(path, i)).st_size for i in os.listdir(path))
+            })
+        return entries
+
+    def size(self) -> int:
+        """The total bytes of the entries."""
+        return sum(i['size'] for i in self._entries())
+
+    def evict(self):
+        """Remove the least recently used entries until the entries take at most `max_bytes`."""
+        entries = sorted(self._entries(), key=lambda i: i['last_used'])
+        total_size = sum(i['size'] for i in entries)
+        for entry in entries:
+            if total_size <= self.max_bytes:
+                break
+            shutil.rmtree(entry['path'], ignore_errors=True)
+            total_size -= entry['size']
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            shutil.rmtree(self._path(name), ignore_errors=True)
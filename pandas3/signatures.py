@@ -0,0 +1,191 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from eth_utils import event_signature_to_log_topic, function_signature_to_4byte_selector
+from eth_utils.abi import collapse_if_tuple
+
+# the keys of the contracts compiled from the database, in place of the contract addresses, see `Transformer`
+SIGNATURE_FUNCTIONS = 'signatures'
+SIGNATURE_EVENTS = 'signatures:{indexed}'
+
+_KINDS = {'functions': 4, 'events': 32}
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split the params of a signature by the commas outside of the tuples."""
+    parts = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+    if text.strip():
+        parts.append(text[start:])
+    return parts
+
+
+def _parse_param(text: str, index: int) -> Dict[str, Any]:
+    text = text.strip()
+    if text.startswith('('):
+        depth = 0
+        for end, char in enumerate(text):
+            depth += {'(': 1, ')': -1}.get(char, 0)
+            if depth == 0:
+                break
+        suffix, _, tail = text[end + 1:].partition(' ')
+        param = {
+            'type': 'tuple' + suffix,
+            'components': [_parse_param(i, j) for j, i in enumerate(_split_top_level(text[1:end]))]
+        }
+    else:
+        type_str, _, tail = text.partition(' ')
+        param = {'type': type_str}
+    # `indexed` is ignored, the indexed params of an event are inferred from its topics
+    words = [i for i in tail.split() if i != 'indexed']
+    param['name'] = words[-1] if len(words) > 0 else f'arg{index}'
+    return param
+
+
+def parse_signature(signature: str) -> Dict[str, Any]:
+    """Parse a line of the database into an abi entry, e.g. `function transfer(address to,uint256 value)` or
+    `event Transfer(address,address,uint256)`. A line without `function` or `event` is a function, and the params
+    without a name are named `arg<index>`.
+    """
+    kind, _, text = signature.strip().partition(' ')
+    if kind not in ('function', 'event'):
+        kind, text = 'function', signature.strip()
+    name, _, params = text.partition('(')
+    params = params[:params.rindex(')')]
+    return {
+        'type': kind,
+        'name': name.strip(),
+        'inputs': [_parse_param(i, j) for j, i in enumerate(_split_top_level(params))]
+    }
+
+
+def canonical_signature(abi: Dict[str, Any]) -> str:
+    """The signature hashed to the selector or the topic, e.g. `transfer(address,uint256)`."""
+    return f"{abi['name']}({','.join(collapse_if_tuple(i) for i in abi['inputs'])})"
+
+
+def _hex_keys(values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: the keys of the hex values as fixed size bytes, and the mask of the valid ones
+    """
+    keys = np.zeros(len(values), dtype=f'S{size}')
+    valid = np.zeros(len(values), dtype=bool)
+    for index, value in enumerate(values):
+        if not isinstance(value, str) or len(value) < 2 + 2 * size:
+            continue
+        try:
+            keys[index] = bytes.fromhex(value[2:2 + 2 * size])
+        except ValueError:
+            continue
+        valid[index] = True
+    return keys, valid
+
+
+class SignatureDatabase:
+    """4-byte function selectors and 32-byte event topics to their signatures, e.g. to decode the standard calls of any
+    contract without its abi.
+
+    The database is a directory of numpy files built by `build` and memory mapped, so that it is shared by the
+    processes and only the pages looked up are read. The keys are sorted, a bulk lookup is a vectorized binary search.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {
+            kind: tuple(np.load(os.path.join(directory, f'{kind}.{i}.npy'), mmap_mode='r')
+                        for i in ('keys', 'offsets', 'blob'))
+            for kind in _KINDS
+        }
+
+    @staticmethod
+    def build(source: Union[str, Iterable[str]], directory: str) -> 'SignatureDatabase':
+        """Build the database from the signatures, one per line, see `parse_signature`. The first signature of
+        a selector or a topic wins, so the preferred ones should come first. The empty lines and `#` comments are
+        skipped.
+
+        :param source: the path of a text file or the lines
+        """
+        if isinstance(source, str):
+            with open(source, encoding='utf-8') as file_handle:
+                return SignatureDatabase.build(file_handle.readlines(), directory)
+
+        entries: Dict[str, List[Tuple[bytes, bytes]]] = {kind: [] for kind in _KINDS}
+        for line in source:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            abi = parse_signature(line)
+            signature = canonical_signature(abi)
+            if abi['type'] == 'event':
+                entries['events'].append((event_signature_to_log_topic(signature), line.encode()))
+            else:
+                entries['functions'].append((function_signature_to_4byte_selector(signature), line.encode()))
+
+        os.makedirs(directory, exist_ok=True)
+        for kind, size in _KINDS.items():
+            keys = np.array([i[0] for i in entries[kind]], dtype=f'S{size}')
+            # a stable sort keeps the first signature of a key first
+            order = np.argsort(keys, kind='stable')
+            keys, first = np.unique(keys[order], return_index=True)
+            lines = [entries[kind][i][1] for i in order[first]]
+            offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(i) for i in lines])
+            blob = np.frombuffer(b''.join(lines), dtype=np.uint8)
+            for name, array in (('keys', keys), ('offsets', offsets), ('blob', blob)):
+                np.save(os.path.join(directory, f'{kind}.{name}.npy'), array)
+        return SignatureDatabase(directory)
+
+    def __len__(self) -> int:
+        return sum(len(i[0]) for i in self._arrays.values())
+
+    def _lookup(self, kind: str, values: Iterable[str]) -> Dict[str, str]:
+        keys, offsets, blob = self._arrays[kind]
+        unique_values = pd.unique(np.asarray(list(values), dtype=object))
+        if len(keys) == 0 or len(unique_values) == 0:
+            return {}
+
+        value_keys, valid = _hex_keys(unique_values, _KINDS[kind])
+        positions = np.minimum(np.searchsorted(keys, value_keys), len(keys) - 1)
+        found = valid & (keys[positions] == value_keys)
+        return {
+            value: bytes(blob[offsets[position]:offsets[position + 1]]).decode()
+            for value, position in zip(unique_values[found], positions[found])
+        }
+
+    def lookup_functions(self, selectors: Iterable[str]) -> Dict[str, str]:
+        """
+        :param selectors: the hex selectors, or the calldata whose first 4 bytes are the selector
+        :return: the signature of every known selector
+        """
+        return self._lookup('functions', selectors)
+
+    def lookup_events(self, topics: Iterable[str]) -> Dict[str, str]:
+        """
+        :return: the signature of every known event topic
+        """
+        return self._lookup('events', topics)
+
+    @staticmethod
+    def event_abi(signature: str, indexed: int) -> Optional[Dict[str, Any]]:
+        """The abi of an event whose first `indexed` params are indexed, as in the standard events, e.g. the Transfer
+        of ERC-20 indexes 2 params and the Transfer of ERC-721 indexes 3 params with the same topic.
+
+        :return: None if the event has less than `indexed` params
+        """
+        abi = parse_signature(signature)
+        if len(abi['inputs']) < indexed:
+            return None
+        abi['anonymous'] = False
+        abi['inputs'] = [dict(param, indexed=bool(index < indexed)) for index, param in enumerate(abi['inputs'])]
+        return abi
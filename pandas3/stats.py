@@ -0,0 +1,141 @@
+import cProfile
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyinstrument
+except ImportError:  # optional, only needed by `profiler='pyinstrument'`
+    pyinstrument = None
+
+StageCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def timed_call(func: Callable[[Any], Any], task: Any) -> Tuple[Any, float]:
+    """Run a task of a backend and measure its time in the worker, see `StageStats.add_worker_time`."""
+    start = time.perf_counter()
+    result = func(task)
+    return result, time.perf_counter() - start
+
+
+class StageStats:
+    """Accumulate the wall time, the rows and the calls of every stage of the transformer, e.g. load_abi, prefilter,
+    decode, hash_index, to_frames and assemble.
+
+    The stages running tasks by a backend also report the busy time of the workers, so that the utilization of the
+    workers, busy time / (wall time x nb_workers), shows whether the decoding is bound by the workers or by the
+    overhead of dispatching the tasks.
+
+    :param callback: called with the stage name and its record, seconds, rows, rows_per_second and
+                     worker_utilization if any, at the end of every stage
+    :param profiler: None, 'cprofile' or 'pyinstrument', profile every stage in the current process, see `profile`.
+                     The tasks run by a process backend are not profiled, use backend='serial' to profile the decoders.
+    """
+
+    def __init__(self, callback: Optional[StageCallback] = None, profiler: Optional[str] = None):
+        assert profiler in (None, 'cprofile', 'pyinstrument')
+        if profiler == 'pyinstrument' and pyinstrument is None:
+            raise ImportError('pyinstrument is required by profiler="pyinstrument", install it by '
+                              '`pip install pyinstrument`')
+        self.callback = callback
+        self.profiler = profiler
+        self.records: Dict[str, Dict[str, float]] = {}
+        self.profiles: Dict[str, Any] = {}
+        self._worker_time: Optional[Tuple[float, int]] = None
+
+    @contextmanager
+    def stage(self, name: str, rows: int) -> Iterator[None]:
+        """Measure the block as a stage processing `rows` rows."""
+        self._worker_time = None
+        profile = self._start_profile(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._stop_profile(name, profile)
+            self._add(name, rows, seconds)
+
+    def add_worker_time(self, busy_seconds: float, nb_workers: int):
+        """Report the time spent by the workers in the tasks of the current stage."""
+        if self._worker_time is not None:
+            busy_seconds += self._worker_time[0]
+        self._worker_time = (busy_seconds, nb_workers)
+
+    def _add(self, name: str, rows: int, seconds: float):
+        record = self.records.setdefault(name, {
+            'calls': 0,
+            'rows': 0,
+            'seconds': 0.0,
+            'worker_seconds': 0.0,
+            'worker_capacity': 0.0
+        })
+        record['calls'] += 1
+        record['rows'] += rows
+        record['seconds'] += seconds
+
+        event = {'seconds': seconds, 'rows': rows, 'rows_per_second': rows / seconds if seconds > 0 else np.nan}
+        if self._worker_time is not None:
+            busy_seconds, nb_workers = self._worker_time
+            record['worker_seconds'] += busy_seconds
+            record['worker_capacity'] += seconds * nb_workers
+            event['worker_utilization'] = busy_seconds / (seconds * nb_workers) if seconds > 0 else np.nan
+            self._worker_time = None
+
+        if self.callback is not None:
+            self.callback(name, event)
+
+    def _start_profile(self, name: str) -> Any:
+        if self.profiler == 'cprofile':
+            # the calls of a stage are accumulated in the same profile
+            profile = self.profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+            return profile
+        if self.profiler == 'pyinstrument':
+            profile = pyinstrument.Profiler()
+            profile.start()
+            return profile
+        return None
+
+    def _stop_profile(self, name: str, profile: Any):
+        if self.profiler == 'cprofile':
+            profile.disable()
+        elif self.profiler == 'pyinstrument':
+            profile.stop()
+            # pyinstrument profiles can not be resumed, the last call of a stage is kept
+            self.profiles[name] = profile
+
+    def profile(self, name: str) -> Any:
+        """
+        :return: the `cProfile.Profile` of a stage, e.g. `pstats.Stats(stats.profile('decode')).sort_stats('cumtime')`,
+                 or the `pyinstrument.Profiler` of its last call, e.g. `.output_text()`, None if it is not profiled
+        """
+        return self.profiles.get(name)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        :return: one row per stage in the order they first ran, with the calls, rows, seconds, rows_per_second and
+                 worker_utilization, NaN for the stages without workers
+        """
+        names: List[str] = list(self.records.keys())
+        records = [self.records[i] for i in names]
+        seconds = np.array([i['seconds'] for i in records], dtype=np.float64)
+        rows = np.array([i['rows'] for i in records], dtype=np.int64)
+        capacity = np.array([i['worker_capacity'] for i in records], dtype=np.float64)
+        worker_seconds = np.array([i['worker_seconds'] for i in records], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.DataFrame({
+                'calls': np.array([i['calls'] for i in records], dtype=np.int64),
+                'rows': rows,
+                'seconds': seconds,
+                'rows_per_second': np.where(seconds > 0, rows / seconds, np.nan),
+                'worker_utilization': np.where(capacity > 0, worker_seconds / capacity, np.nan)
+            }, index=pd.Index(names, name='stage'))
+
+    def reset(self):
+        self.records.clear()
+        self.profiles.clear()
+        self._worker_time = None
@@ -1,20 +1,37 @@
 import json
 import logging
-from datetime import timedelta, datetime
+import os
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from functools import partial
 from multiprocessing import get_context
-from typing import Optional, Tuple, List, Dict, Any
+from typing import Optional, Tuple, List, Dict, Any, Union, Iterable, Iterator, Set, FrozenSet
 
-import cachetools
+import numpy as np
 import pandas as pd
-from eth_utils import event_abi_to_log_topic, encode_hex, decode_hex
-from pandarallel import pandarallel
-from pandas import DataFrame
 from web3 import Web3
 
-from . import etherscan
-from .logging_util import logging_basic_config
+from . import arrow, etherscan
+from .abi_registry import CompiledContract
+from .abi_store import FileAbiStore
+from .cache import make_cache, abi_size, DEFAULT_TTL, TTLCache
+from .batch_decoder import StringColumn, DecodedBatch, decode_function_task, decode_event_task, deduplicate, \
+    broadcast_batch
+from .executor import ExecutionBackend, make_backend
+from .failures import FailureReport
+from .proxy import delegatecall_implementations, latest_implementations, map_implementations
+from .result_cache import FileResultCache, fingerprint_frame, fingerprint_path, hash_abi
+from .signatures import SIGNATURE_EVENTS, SIGNATURE_FUNCTIONS, SignatureDatabase, parse_signature
+from .stats import StageCallback, StageStats, timed_call
 
-logging_basic_config()
+_MISSING = object()
+
+# the input columns which the decoded calls depend on, hashed to the key of a cached result
+_INPUT_COLUMNS = {
+    'traces': ['block_number', 'tx_index', 'trace_address', 'contract_address', 'input', 'call_type', 'from_address',
+               'abi'],
+    'logs': ['block_number', 'tx_index', 'contract_address', 'topic1', 'topic2', 'topic3', 'topic4', 'data', 'abi']
+}
 
 
 class Transformer:
@@ -22,19 +39,77 @@ class Transformer:
     def __init__(
             self,
             init_abi_map: Dict[str, str] = {},
-            nb_workers: int = get_context("fork").cpu_count()
+            nb_workers: int = get_context("fork").cpu_count(),
+            # persist the abi fetched from etherscan across processes
+            abi_store: Optional[FileAbiStore] = None,
+            etherscan_api_url: str = etherscan.API_URL,
+            etherscan_api_key: Optional[str] = None,
+            # seconds to connect to etherscan and to read a response
+            etherscan_timeout: float = etherscan.TIMEOUT,
+            # concurrency and rate limit of the bulk fetch
+            prefetch_workers: int = 4,
+            etherscan_calls_per_second: float = 5,
+            # policy of the abi and contract caches, see `cache.make_cache`, the ttl is 3 minutes by the 'lru' policy
+            cache_size: int = 50,
+            cache_ttl: Union[timedelta, None, object] = DEFAULT_TTL,
+            cache_policy: str = 'lru',
+            cache_max_abi_size: Optional[int] = None,
+            # 'serial', 'thread', 'process' or a backend object, by default 'process' if nb_workers > 1
+            backend: Union[str, ExecutionBackend, None] = None,
+            # the max rows of a task run by the backend, a large group of the same function is split into partitions
+            partition_size: int = 50_000,
+            # the max failed rows kept by the failure report, see `FailureReport`
+            failure_max_rows: int = 100_000,
+            # decode the identical inputs, or topics and data, of a partition once, see `dedup_stats`
+            dedup_inputs: bool = False,
+            # called with the name and the record of every stage, see `StageStats`
+            stats_callback: Optional[StageCallback] = None,
+            # None, 'cprofile' or 'pyinstrument', profile every stage, see `StageStats.profile`
+            profiler: Optional[str] = None,
+            # proxy address to implementation address, for the proxied calls without their delegatecall in the traces
+            proxy_map: Dict[str, str] = {},
+            # resolve the implementation of the proxies by the delegatecall child of their traces
+            detect_proxies: bool = True,
+            # decode the rows without abi, or unknown to it, by their selector or topic, see `SignatureDatabase`
+            signature_db: Optional[SignatureDatabase] = None,
+            # fetch the missing abi from etherscan, turn it off to decode by the abi map, the abi store and the
+            # signature database only
+            fetch_abis: bool = True,
+            # cache the decoded frames on disk, keyed by the input and the abi, see `FileResultCache`
+            result_cache: Optional[FileResultCache] = None
     ):
         self.w3 = Web3()
+        self.abi_store = abi_store
+        self.etherscan_api_url = etherscan_api_url
+        self.etherscan_api_key = etherscan_api_key
+        self.etherscan_timeout = etherscan_timeout
+        self.prefetch_workers = prefetch_workers
+        self.etherscan_calls_per_second = etherscan_calls_per_second
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.contract_cache = cachetools.TTLCache(50, ttl=timedelta(minutes=3), timer=datetime.now)
-        self.abi_cache = cachetools.TTLCache(50, ttl=timedelta(minutes=3), timer=datetime.now)
+        self.contract_cache = make_cache(cache_size, ttl=cache_ttl, policy=cache_policy, max_abi_size=cache_max_abi_size,
+                                         getsizeof=lambda contract: abi_size(contract.abi))
+        self.abi_cache = make_cache(cache_size, ttl=cache_ttl, policy=cache_policy, max_abi_size=cache_max_abi_size)
         self._update_abi_cache(init_abi_map)
-        self.is_multiprocessing = nb_workers > 1
-
-        if self.is_multiprocessing:
-            pandarallel.initialize(nb_workers=nb_workers, verbose=1)  # filtered INFO log for pandarallel
-        else:
-            DataFrame.parallel_apply = DataFrame.apply
+        self.backend = make_backend(backend, nb_workers)
+        self.partition_size = partition_size
+        self.failures = FailureReport(logger=self.logger, max_rows=failure_max_rows)
+        self.dedup_inputs = dedup_inputs
+        self._dedup_counts = {'rows': 0, 'unique_rows': 0}
+        self.stats = StageStats(callback=stats_callback, profiler=profiler)
+        self.proxy_map = {k.lower(): v for k, v in proxy_map.items()}
+        self.detect_proxies = detect_proxies
+        # lower case proxy address to the latest implementation detected in the traces
+        self.implementations: Dict[str, str] = {}
+        self.signature_db = signature_db
+        self.fetch_abis = fetch_abis
+        # the contracts compiled from the signatures looked up, keyed by `SIGNATURE_FUNCTIONS` and `SIGNATURE_EVENTS`
+        self._signature_contracts: Dict[str, CompiledContract] = {}
+        self.result_cache = result_cache
+        self._init_abi_hash = hash_abi(sorted(init_abi_map.items()))
+        # contract address to the hash of the abi decoding it, recorded for the result cache
+        self._used_abis: Optional[Dict[str, Optional[str]]] = None
+        # contract address to the abi resolved for the current call, kept whatever the bounded abi cache evicts
+        self._call_abis: Dict[str, Optional[List[Dict[str, Any]]]] = {}
 
     def traces_to_func_call_df(
             self,
@@ -42,47 +117,74 @@ class Transformer:
             # column name to alias
             alias: Optional[Dict[str, str]] = None,
             # contract address to abi
-            abi_map: Optional[Dict[str, str]] = None
-    ) -> pd.DataFrame:
+            abi_map: Optional[Dict[str, str]] = None,
+            # 'wide', 'long' or 'dict', see `_assemble_name_parts`, or 'arrow', see `arrow.batches_to_tables`
+            output: str = 'wide',
+            # 'hash', the string hash_index, or 'multi', an integer keyed MultiIndex, see `to_hash_index`
+            index: str = 'hash',
+            # only decode these (contract address, function or event name), the other rows are dropped before decoding
+            allowed_calls: Optional[Iterable[Tuple[str, str]]] = None,
+            # only decode these `address.name.param` columns, e.g. `0x...weth.withdraw.wad`, the other calls and params
+            # are neither decoded nor flattened, see `_projection`
+            columns: Optional[Iterable[str]] = None,
+            # read and write the result cache of the transformer if any, only the 'wide' and 'long' output are cached
+            cache: bool = True
+    ) -> Union[pd.DataFrame, Dict[Tuple[str, str], pd.DataFrame], Dict[Tuple[str, str], 'arrow.pa.Table']]:
         if alias is not None:
             df.rename(alias, axis=1, inplace=True)
 
-        self._cache_abi_and_contract_by_df(df=df, abi_map=abi_map)
+        assert output in ('wide', 'long', 'dict', 'arrow')
+        assert index in ('hash', 'multi')
+        if output == 'arrow':
+            arrow.require_pyarrow()
+        if cache and self._is_cached(output):
+            return self._cached_call('traces', self.traces_to_func_call_df, df, abi_map=abi_map, output=output,
+                                     index=index, allowed_calls=allowed_calls, columns=columns)
 
-        assert ({'block_number', 'tx_index', 'trace_address', 'contract_address', 'input'}.issubset(df.columns))
+        # the cached abi should not expire in the middle of a call
+        with self._frozen_cache_timers():
+            projection = self._projection(columns)
+            allowed_names = self._allowed_names(allowed_calls, projection)
+            assert ({'block_number', 'tx_index', 'trace_address', 'contract_address', 'input'}.issubset(df.columns))
 
-        # decode input by abi and get parsed df
-        parsed_df: pd.DataFrame = df.parallel_apply(
-            lambda x: self._parse_function_input_with_abi(
-                contract_address=x.contract_address,
-                input_data=x.input,
-            ),
-            axis=1,
-            result_type='expand'
-        ).rename(
-            columns={0: 'call_name', 1: 'input_schema', 2: 'input_params'}
-        )
-
-        df = pd.concat([df, parsed_df], axis=1)
-        # filtrate the records with valid input
-        df = df[df['call_name'] != '']
-        df.trace_address.fillna('', inplace=True)
+            with self.stats.stage('load_abi', rows=len(df)):
+                implementations = self._resolve_trace_implementations(df)
+                contracts = self._cache_abi_and_contract_by_df(df=df, abi_map=abi_map, allowed_names=allowed_names,
+                                                               implementations=implementations)
+                self._record_used_abis(contracts)
 
-        df['hash_index'] = df.parallel_apply(
-            lambda x: self._calculate_trace_index(x.block_number, x.tx_index, x.trace_address),
-            axis=1
-        )
+            with self.stats.stage('prefilter', rows=len(df)):
+                selectors = df.input.where(df.input.notna(), '').astype(str).str[:10].str.lower()
+                decode_addresses = self._decode_addresses(df.contract_address, implementations, selectors, contracts,
+                                                          'functions')
+                decode_addresses = self._signature_fallback(decode_addresses, selectors, contracts, 'functions')
+                mask = self._prefilter(df.contract_address, selectors, contracts, 'functions', allowed_names,
+                                       decode_addresses)
+                df = df[mask]
+                df = df.assign(
+                    block_number=df.block_number.astype(np.int64),
+                    tx_index=df.tx_index.astype(np.int64),
+                    trace_address=df.trace_address.fillna('').astype(str)
+                )
+            with self.stats.stage('decode', rows=len(df)):
+                decoded = self._decode_function_groups(df=df, selectors=selectors[mask], contracts=contracts,
+                                                       decode_addresses=decode_addresses[mask], projection=projection)
+            if output == 'arrow':
+                with self.stats.stage('to_arrow', rows=len(df)):
+                    return arrow.batches_to_tables(decoded, index_df=df[['block_number', 'tx_index', 'trace_address']])
 
-        distinct_func = df[['contract_address', 'call_name', 'block_number']] \
-            .groupby(['contract_address', 'call_name']) \
-            .indices \
-            .keys()
+            index_columns = ['block_number', 'tx_index', 'trace_address']
+            if index == 'hash':
+                with self.stats.stage('hash_index', rows=len(df)):
+                    df['hash_index'] = self._calculate_trace_index(df.block_number, df.tx_index, df.trace_address)
+                index_columns = ['hash_index']
 
-        result_df = self._join_multi_name_parts(address_name_tuples=distinct_func, df=df)
-
-        return result_df.join(df[['hash_index', 'block_number', 'tx_index', 'trace_address']].set_index('hash_index'),
-                              on='hash_index',
-                              how='inner')
+            return self._assemble_stage(
+                decoded=decoded,
+                index_df=df[list(dict.fromkeys(index_columns + ['block_number', 'tx_index', 'trace_address']))],
+                output=output,
+                index_columns=index_columns
+            )
 
     def logs_to_func_call_df(
             self,
@@ -90,240 +192,1079 @@ class Transformer:
             # column name to alias
             alias: Optional[Dict[str, str]] = None,
             # contract address to abi
-            abi_map: Optional[Dict[str, str]] = None
-    ) -> pd.DataFrame:
+            abi_map: Optional[Dict[str, str]] = None,
+            # 'wide', 'long' or 'dict', see `_assemble_name_parts`, or 'arrow', see `arrow.batches_to_tables`
+            output: str = 'wide',
+            # 'hash', the string hash_index, or 'multi', an integer keyed MultiIndex, see `to_hash_index`
+            index: str = 'hash',
+            # only decode these (contract address, function or event name), the other rows are dropped before decoding
+            allowed_calls: Optional[Iterable[Tuple[str, str]]] = None,
+            # only decode these `address.name.param` columns, e.g. `0x...weth.withdraw.wad`, the other calls and params
+            # are neither decoded nor flattened, see `_projection`
+            columns: Optional[Iterable[str]] = None,
+            # read and write the result cache of the transformer if any, only the 'wide' and 'long' output are cached
+            cache: bool = True
+    ) -> Union[pd.DataFrame, Dict[Tuple[str, str], pd.DataFrame], Dict[Tuple[str, str], 'arrow.pa.Table']]:
         if alias is not None:
             df.rename(alias, axis=1, inplace=True)
 
-        self._cache_abi_and_contract_by_df(df=df, abi_map=abi_map)
-
-        assert ({'block_number', 'tx_index', 'contract_address', 'topic1', 'topic2', 'topic3', 'topic4', 'data'}
-                .issubset(df.columns))
-
-        parsed_df: pd.DataFrame = df.parallel_apply(
-            lambda x: self._parse_event_data_with_abi(
-                contract_address=x.contract_address,
-                data=x.data,
-                topics=[i for i in [x.topic1, x.topic2, x.topic3, x.topic4] if not pd.isna(i)]
-            ),
-            axis=1,
-            result_type='expand'
-        ).rename(
-            columns={0: 'call_name', 1: 'input_schema', 2: 'input_params'}
+        assert output in ('wide', 'long', 'dict', 'arrow')
+        assert index in ('hash', 'multi')
+        if output == 'arrow':
+            arrow.require_pyarrow()
+        if cache and self._is_cached(output):
+            return self._cached_call('logs', self.logs_to_func_call_df, df, abi_map=abi_map, output=output,
+                                     index=index, allowed_calls=allowed_calls, columns=columns)
+
+        # the cached abi should not expire in the middle of a call
+        with self._frozen_cache_timers():
+            projection = self._projection(columns)
+            allowed_names = self._allowed_names(allowed_calls, projection)
+            assert ({'block_number', 'tx_index', 'contract_address', 'topic1', 'topic2', 'topic3', 'topic4', 'data'}
+                    .issubset(df.columns))
+
+            with self.stats.stage('load_abi', rows=len(df)):
+                # the logs of a proxy are emitted by the proxy, their implementation is known from the traces only
+                implementations = map_implementations(df.contract_address, None, self.proxy_map, self.implementations)
+                contracts = self._cache_abi_and_contract_by_df(df=df, abi_map=abi_map, allowed_names=allowed_names,
+                                                               implementations=implementations)
+                self._record_used_abis(contracts)
+
+            with self.stats.stage('prefilter', rows=len(df)):
+                selectors = df.topic1.where(df.topic1.notna(), '').astype(str).str.lower()
+                decode_addresses = self._decode_addresses(df.contract_address, implementations, selectors, contracts,
+                                                          'events')
+                decode_addresses = self._signature_fallback(
+                    decode_addresses, selectors, contracts, 'events',
+                    indexed_counts=df[['topic2', 'topic3', 'topic4']].notna().sum(axis=1)
+                )
+                mask = self._prefilter(df.contract_address, selectors, contracts, 'events', allowed_names,
+                                       decode_addresses)
+                df = df[mask]
+                df = df.assign(block_number=df.block_number.astype(np.int64), tx_index=df.tx_index.astype(np.int64))
+            with self.stats.stage('decode', rows=len(df)):
+                decoded = self._decode_event_groups(df=df, selectors=selectors[mask], contracts=contracts,
+                                                    decode_addresses=decode_addresses[mask], projection=projection)
+            if output == 'arrow':
+                with self.stats.stage('to_arrow', rows=len(df)):
+                    return arrow.batches_to_tables(decoded, index_df=df[['block_number', 'tx_index']])
+
+            index_columns = ['block_number', 'tx_index']
+            if index == 'hash':
+                with self.stats.stage('hash_index', rows=len(df)):
+                    df['hash_index'] = df.block_number.astype(str) + '_' + df.tx_index.astype(str)
+                index_columns = ['hash_index']
+
+            return self._assemble_stage(
+                decoded=decoded,
+                index_df=df[list(dict.fromkeys(index_columns + ['block_number', 'tx_index']))],
+                output=output,
+                index_columns=index_columns
+            )
+
+    def stream_traces_to_func_call_df(
+            self,
+            source: Any,
+            chunksize: int = 100_000,
+            # column name to alias
+            alias: Optional[Dict[str, str]] = None,
+            # contract address to abi
+            abi_map: Optional[Dict[str, str]] = None,
+            # only decode the traces of these contracts
+            contract_addresses: Optional[Iterable[str]] = None,
+            output: str = 'wide',
+            index: str = 'hash',
+            # only decode the traces of the blocks in [start, end)
+            block_range: Optional[Tuple[int, int]] = None,
+            allowed_calls: Optional[Iterable[Tuple[str, str]]] = None,
+            columns: Optional[Iterable[str]] = None,
+            # cache the frames of a file source as a whole, keyed by its path, modification time and size
+            cache: bool = True
+    ) -> Iterator[Union[pd.DataFrame, Dict[Tuple[str, str], Any]]]:
+        """Decode a trace export larger than memory chunk by chunk, see `traces_to_func_call_df`.
+
+        :param source: the path of an ethereum-etl csv, json lines or parquet export, an arrow table or dataset,
+                       or an iterator of dataframe chunks e.g. `pd.read_csv(path, chunksize=...)`.
+                       Only the needed columns and the rows of `contract_addresses` and `block_range` are read
+                       from a parquet or arrow source.
+        """
+        allowed_calls = None if allowed_calls is None else list(allowed_calls)
+        columns = None if columns is None else list(columns)
+        chunks = self._read_chunks(
+            source,
+            chunksize,
+            read_csv_kwargs={'dtype': {'trace_address': str}},
+            columns=['block_number', 'tx_index', 'trace_address', 'contract_address', 'input', 'call_type',
+                     'from_address', 'abi'],
+            alias=alias,
+            contract_addresses=contract_addresses,
+            block_range=block_range
+        )
+        results = (
+            self.traces_to_func_call_df(df=chunk, abi_map=abi_map, output=output, index=index,
+                                        allowed_calls=allowed_calls, columns=columns, cache=False)
+            for chunk in self._filter_chunks(chunks, alias=alias, contract_addresses=contract_addresses,
+                                             block_range=block_range)
+        )
+        yield from self._cached_stream(
+            'traces', source if cache else None, results, abi_map=abi_map, output=output, index=index,
+            allowed_calls=allowed_calls, columns=columns, chunksize=chunksize, alias=alias,
+            contract_addresses=None if contract_addresses is None else sorted(i.lower() for i in contract_addresses),
+            block_range=block_range
+        )
+
+    def stream_logs_to_func_call_df(
+            self,
+            source: Any,
+            chunksize: int = 100_000,
+            # column name to alias
+            alias: Optional[Dict[str, str]] = None,
+            # contract address to abi
+            abi_map: Optional[Dict[str, str]] = None,
+            # only decode the logs of these contracts
+            contract_addresses: Optional[Iterable[str]] = None,
+            output: str = 'wide',
+            index: str = 'hash',
+            # only decode the logs of the blocks in [start, end)
+            block_range: Optional[Tuple[int, int]] = None,
+            allowed_calls: Optional[Iterable[Tuple[str, str]]] = None,
+            columns: Optional[Iterable[str]] = None,
+            # cache the frames of a file source as a whole, keyed by its path, modification time and size
+            cache: bool = True
+    ) -> Iterator[Union[pd.DataFrame, Dict[Tuple[str, str], Any]]]:
+        """Decode a log export larger than memory chunk by chunk, see `logs_to_func_call_df` and
+        `stream_traces_to_func_call_df`.
+        """
+        allowed_calls = None if allowed_calls is None else list(allowed_calls)
+        columns = None if columns is None else list(columns)
+        chunks = self._read_chunks(
+            source,
+            chunksize,
+            columns=['block_number', 'tx_index', 'contract_address', 'topic1', 'topic2', 'topic3', 'topic4', 'data',
+                     'abi'],
+            alias=alias,
+            contract_addresses=contract_addresses,
+            block_range=block_range
+        )
+        results = (
+            self.logs_to_func_call_df(df=chunk, abi_map=abi_map, output=output, index=index,
+                                      allowed_calls=allowed_calls, columns=columns, cache=False)
+            for chunk in self._filter_chunks(chunks, alias=alias, contract_addresses=contract_addresses,
+                                             block_range=block_range)
+        )
+        yield from self._cached_stream(
+            'logs', source if cache else None, results, abi_map=abi_map, output=output, index=index,
+            allowed_calls=allowed_calls, columns=columns, chunksize=chunksize, alias=alias,
+            contract_addresses=None if contract_addresses is None else sorted(i.lower() for i in contract_addresses),
+            block_range=block_range
+        )
+
+    def _is_cached(self, output: str) -> bool:
+        return self.result_cache is not None and output in ('wide', 'long')
+
+    def _result_key(self, kind: str, fingerprint: Any, options: Dict[str, Any]) -> str:
+        """The key of a cached result, of the input, the options of the call and everything the abi are found by.
+        The implementations learned by the calls are not part of it, a hit restores those its call learned.
+        """
+        return self.result_cache.make_key(
+            kind=kind,
+            input=fingerprint,
+            options=options,
+            init_abi=self._init_abi_hash,
+            proxy_map=self.proxy_map,
+            detect_proxies=self.detect_proxies,
+            signature_db=None if self.signature_db is None else os.path.abspath(self.signature_db.directory),
+            fetch_abis=self.fetch_abis
         )
 
-        df = pd.concat([df, parsed_df], axis=1)
-        # filtrate the records with valid input
-        df = df[df['call_name'] != '']
+    def _learned_state(self, previous_implementations: Dict[str, str]) -> Dict[str, Any]:
+        """The implementations learned since `previous_implementations`, committed with a cached result."""
+        return {'implementations': {k: v for k, v in self.implementations.items()
+                                    if previous_implementations.get(k) != v}}
 
-        df['hash_index'] = df.parallel_apply(lambda x: f'{x.block_number}_{x.tx_index}', axis=1)
+    def _restore_state(self, state: Dict[str, Any]):
+        self.implementations.update(state.get('implementations', {}))
 
-        distinct_event = df[['contract_address', 'call_name', 'block_number']] \
-            .groupby(['contract_address', 'call_name']) \
-            .indices \
-            .keys()
+    def _cached_call(self, kind: str, func: Any, df: pd.DataFrame, **kwargs) -> Any:
+        # the iterables are hashed to the key and read again by the call
+        for name in ('allowed_calls', 'columns'):
+            if kwargs[name] is not None:
+                kwargs[name] = list(kwargs[name])
+        key = self._result_key(kind, fingerprint_frame(df, _INPUT_COLUMNS[kind]), kwargs)
+        frames = self.result_cache.get(key, is_valid=self._abis_unchanged, on_hit=self._restore_state)
+        if frames is not None:
+            return next(frames)
+
+        used_abis = {}
+        previous_implementations = dict(self.implementations)
+        with self._recording_abis(used_abis):
+            result = func(df=df, cache=False, **kwargs)
+        self.result_cache.put(key, [result], used_abis, self._learned_state(previous_implementations))
+        return result
+
+    def _cached_stream(self, kind: str, source: Any, results: Iterator[Any], **options) -> Iterator[Any]:
+        """Yield the cached frames of a file source, or the results while they are cached."""
+        fingerprint = fingerprint_path(source) if isinstance(source, str) and self._is_cached(options['output']) \
+            else None
+        if fingerprint is None:
+            yield from results
+            return
+
+        key = self._result_key(kind, fingerprint, options)
+        frames = self.result_cache.get(key, is_valid=self._abis_unchanged, on_hit=self._restore_state)
+        if frames is not None:
+            yield from frames
+            return
+
+        # the entry is written part by part and committed only once the stream is read to the end
+        writer = self.result_cache.writer(key)
+        used_abis = {}
+        previous_implementations = dict(self.implementations)
+        committed = False
+        try:
+            while True:
+                with self._recording_abis(used_abis):
+                    result = next(results, _MISSING)
+                if result is _MISSING:
+                    break
+                writer.append(result)
+                yield result
+            writer.commit(used_abis, self._learned_state(previous_implementations))
+            committed = True
+        finally:
+            if not committed:
+                writer.abort()
+
+    @contextmanager
+    def _recording_abis(self, used_abis: Dict[str, Optional[str]]) -> Iterator[Dict[str, Optional[str]]]:
+        previous_used_abis = self._used_abis
+        self._used_abis = used_abis
+        try:
+            yield used_abis
+        finally:
+            self._used_abis = previous_used_abis
+
+    def _record_used_abis(self, contracts: Dict[str, Optional[CompiledContract]]):
+        if self._used_abis is None:
+            return
+        for address, contract in contracts.items():
+            if address not in self._used_abis:
+                self._used_abis[address] = None if contract is None else hash_abi(contract.abi)
+
+    def _abis_unchanged(self, used_abis: Dict[str, Optional[str]]) -> bool:
+        """Whether the abi known now, cached or stored, are the abi a cached result was decoded by. The abi unknown
+        now are not fetched, they are assumed unchanged.
+        """
+        for address, abi_hash in used_abis.items():
+            if address in self.abi_cache:
+                abi = self.abi_cache[address]
+            elif self.abi_store is not None and address in self.abi_store:
+                abi_json = self.abi_store.get(address)
+                abi = None if abi_json is None else json.loads(abi_json)
+            else:
+                continue
+            if hash_abi(abi) != abi_hash:
+                return False
+        return True
 
-        result_df = self._join_multi_name_parts(address_name_tuples=distinct_event, df=df)
+    @staticmethod
+    def _read_chunks(
+            source: Any,
+            chunksize: int,
+            read_csv_kwargs: Optional[Dict[str, Any]] = None,
+            columns: Optional[List[str]] = None,
+            alias: Optional[Dict[str, str]] = None,
+            contract_addresses: Optional[Iterable[str]] = None,
+            block_range: Optional[Tuple[int, int]] = None
+    ) -> Iterable[pd.DataFrame]:
+        """
+        :param columns: the columns to read from a parquet or arrow source, named after the alias
+        """
+        if arrow.is_arrow_source(source):
+            # the columns and predicates are pushed down by their names in the source
+            source_names = {v: k for k, v in (alias or {}).items()}
+            return arrow.read_chunks(
+                source,
+                chunksize,
+                columns=None if columns is None else [source_names.get(i, i) for i in columns],
+                address_column=source_names.get('contract_address', 'contract_address'),
+                contract_addresses=contract_addresses,
+                block_column=source_names.get('block_number', 'block_number'),
+                block_range=block_range
+            )
+        if not isinstance(source, str):
+            return source
+        if source.endswith('.json'):
+            return pd.read_json(source, lines=True, chunksize=chunksize)
+        return pd.read_csv(source, chunksize=chunksize, **(read_csv_kwargs or {}))
 
-        return result_df.join(df[['hash_index', 'block_number', 'tx_index']].set_index('hash_index'),
-                              on='hash_index',
-                              how='inner')
+    @staticmethod
+    def _filter_chunks(
+            chunks: Iterable[pd.DataFrame],
+            alias: Optional[Dict[str, str]] = None,
+            contract_addresses: Optional[Iterable[str]] = None,
+            block_range: Optional[Tuple[int, int]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Rename the columns of every chunk and drop the rows of the other contracts and blocks before decoding."""
+        addresses = None if contract_addresses is None else {i.lower() for i in contract_addresses}
+        for chunk in chunks:
+            if alias is not None:
+                chunk = chunk.rename(alias, axis=1)
+            if addresses is not None:
+                chunk = chunk[chunk.contract_address.str.lower().isin(addresses)]
+            if block_range is not None:
+                chunk = chunk[(chunk.block_number >= block_range[0]) & (chunk.block_number < block_range[1])]
+            if len(chunk) > 0:
+                yield chunk
 
-    def _join_multi_name_parts(
+    def _assemble_stage(
             self,
-            address_name_tuples: List[Tuple[str, str]],
-            df: pd.DataFrame
+            decoded: List[Tuple[Tuple[str, str], np.ndarray, DecodedBatch]],
+            index_df: pd.DataFrame,
+            output: str,
+            index_columns: List[str]
+    ) -> Union[pd.DataFrame, Dict[Tuple[str, str], pd.DataFrame]]:
+        """Build the frames of the decoded batches and assemble the output, measured as two stages."""
+        with self.stats.stage('to_frames', rows=len(index_df)):
+            funcall_dfs = self._batches_to_frames(decoded)
+        with self.stats.stage('assemble', rows=len(index_df)):
+            return self._assemble_name_parts(
+                funcall_dfs=funcall_dfs,
+                index_df=index_df,
+                output=output,
+                index_columns=index_columns
+            )
+
+    @staticmethod
+    def _assemble_name_parts(
+            funcall_dfs: List[Tuple[Tuple[str, str], pd.DataFrame]],
+            index_df: pd.DataFrame,
+            output: str = 'wide',
+            index_columns: Optional[List[str]] = None
+    ) -> Union[pd.DataFrame, Dict[Tuple[str, str], pd.DataFrame]]:
+        """Combine the flattened params of every (address, name) group into the output indexed by `index_columns`
+        of `index_df`, by default the hash_index. The other columns of `index_df` are appended to the output.
+
+        Each group is indexed by the positions of its rows in `index_df` and the groups are disjoint,
+        so they are stacked by a single concat instead of being outer joined one by one.
+
+        :param output: 'wide', one column per `address.name.param` and one row per call,
+                       'long', one row per decoded value with the columns contract_address, call_name, param_path
+                       and value, so the size grows with the number of values instead of rows x distinct params,
+                       'dict', a frame per (address, name) which contains its own params only.
+        """
+        if output == 'long':
+            return Transformer._assemble_long_name_parts(
+                funcall_dfs=funcall_dfs,
+                index_df=index_df,
+                index_columns=index_columns
+            )
+
+        if output == 'dict':
+            grouped_dfs: Dict[Tuple[str, str], List[pd.DataFrame]] = {}
+            for key, funcall_df in funcall_dfs:
+                grouped_dfs.setdefault(key, []).append(funcall_df)
+            return {
+                key: Transformer._index_by_hash(pd.concat(dfs, axis=0, sort=False).sort_index(), index_df,
+                                                index_columns)
+                for key, dfs in grouped_dfs.items()
+            }
+
+        prefixed_dfs = []
+        for (address, name), funcall_df in funcall_dfs:
+            prefixed_dfs.append(funcall_df.add_prefix(f'{address}.{name}.'))
+
+        if len(prefixed_dfs) > 1:
+            # the missing values of the other calls would turn the int columns to float, inexact above 2 ** 53
+            shared_columns = set.intersection(*(set(i.columns) for i in prefixed_dfs))
+            prefixed_dfs = [
+                i.astype({k: object for k, v in i.dtypes.items() if v.kind in 'iu' and k not in shared_columns})
+                for i in prefixed_dfs
+            ]
+
+        if len(prefixed_dfs) > 0:
+            result_df = pd.concat(prefixed_dfs, axis=0, sort=False).sort_index()
+        else:
+            result_df = pd.DataFrame(index=pd.Index([], dtype=np.int64))
+
+        return Transformer._index_by_hash(result_df, index_df, index_columns)
+
+    @staticmethod
+    def _assemble_long_name_parts(
+            funcall_dfs: List[Tuple[Tuple[str, str], pd.DataFrame]],
+            index_df: pd.DataFrame,
+            index_columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
-        result_df = None
-        for (address, name) in address_name_tuples:
-            indices = df.loc[(df.contract_address == address) & (df.call_name == name)].index
-
-            df.loc[indices, 'input_params'] = df.loc[indices].parallel_apply(lambda x: self._nested_tuple_dict_ser(
-                raw_dict=x.input_params,
-                input_schema=x.input_schema,
-                append_obj={'hash_index': x.hash_index}
-            ), axis=1)
-
-            funcall_df = pd \
-                .json_normalize(df.loc[indices, 'input_params'].values.tolist()) \
-                .set_index('hash_index')
-            funcall_df.columns = f'{address}.{name}.' + funcall_df.columns
-
-            if result_df is None:
-                result_df = funcall_df
-            else:
-                # outer join will append the index from result_df to the column of result.
-                result_df = result_df \
-                    .join(other=funcall_df, on='hash_index', how='outer') \
-                    .set_index('hash_index')
+        long_dfs = []
+        for (address, name), funcall_df in funcall_dfs:
+            row_count, column_count = funcall_df.shape
+            long_dfs.append(pd.DataFrame({
+                'position': np.repeat(funcall_df.index.values, column_count),
+                'contract_address': address,
+                'call_name': name,
+                'param_path': np.tile(funcall_df.columns.values.astype(object), row_count),
+                'value': funcall_df.to_numpy(dtype=object).ravel()
+            }))
+
+        if len(long_dfs) > 0:
+            long_df = pd.concat(long_dfs, axis=0, ignore_index=True)
+        else:
+            long_df = pd.DataFrame({
+                'position': np.array([], dtype=np.int64),
+                'contract_address': [],
+                'call_name': [],
+                'param_path': [],
+                'value': []
+            })
+
+        # keep the params of a call together, and the calls in the order of the input
+        long_df = long_df.take(np.argsort(long_df.position.values, kind='stable'))
+        long_df.index = Transformer._take_index(index_df, index_columns, long_df.position.values)
+        long_df = long_df.drop(columns='position')
+        for column in ['contract_address', 'call_name', 'param_path']:
+            long_df[column] = long_df[column].astype('category')
+
+        return long_df
+
+    @staticmethod
+    def _index_by_hash(
+            result_df: pd.DataFrame,
+            index_df: pd.DataFrame,
+            index_columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Replace the positions of the rows by the index and append the other columns of `index_df`."""
+        positions = result_df.index.values
+        result_df.index = Transformer._take_index(index_df, index_columns, positions)
+        for column in index_df.columns.drop(result_df.index.names):
+            result_df[column] = index_df[column].values[positions]
 
         return result_df
 
+    @staticmethod
+    def _take_index(index_df: pd.DataFrame, index_columns: Optional[List[str]], positions: np.ndarray) -> pd.Index:
+        if index_columns is None:
+            index_columns = ['hash_index']
+        if len(index_columns) == 1:
+            return pd.Index(index_df[index_columns[0]].values[positions], name=index_columns[0])
+        return pd.MultiIndex.from_arrays([index_df[i].values[positions] for i in index_columns], names=index_columns)
+
+    @staticmethod
+    def to_hash_index(index: pd.MultiIndex) -> pd.Index:
+        """Build the string hash_index of an output indexed by `index='multi'`, only when it is needed,
+        e.g. to join with the outputs indexed by hash.
+        """
+        parts = [index.get_level_values(i).astype(str) for i in range(index.nlevels)]
+        hash_index = parts[0]
+        for part in parts[1:]:
+            hash_index = hash_index + '_' + part
+        return pd.Index(hash_index, name='hash_index')
+
+    def _decode_function_groups(
+            self,
+            df: pd.DataFrame,
+            selectors: pd.Series,
+            contracts: Dict[str, Optional[CompiledContract]],
+            decode_addresses: Optional[pd.Series] = None,
+            projection: Optional[Dict[Tuple[str, str], Optional[FrozenSet[str]]]] = None
+    ) -> List[Tuple[Tuple[str, str], np.ndarray, DecodedBatch]]:
+        """Decode the inputs group by the contract address and the function selector, every group is decoded in batch
+        by the backend.
+
+        :param decode_addresses: the contract whose abi decodes every row, e.g. the implementation of a proxy,
+                                 by default the contract address
+        :param projection: the params to decode of every call, see `_projection`, by default all of them
+        """
+        groups = self._group_rows(df, selectors, decode_addresses, self._merged_rows(decode_addresses, projection))
+
+        inputs = df.input.values
+        tasks = []
+        keys = []
+        for (address, decode_address, selector), positions in groups.items():
+            # the prefilter only keeps the known selectors
+            func = contracts[decode_address].functions[selector]
+            for partition in self._partition(positions):
+                codes, representatives = self._deduplicate([inputs[partition]])
+                tasks.append((func, StringColumn.from_values(inputs[partition[representatives]]),
+                              self._projected_params(projection, address, func.name)))
+                keys.append((address, selector, func.name, partition, codes))
+
+        return self._collect_batches(
+            batches=self._map_tasks(decode_function_task, tasks),
+            keys=keys,
+            id_df=df[['block_number', 'tx_index', 'trace_address']],
+            addresses=df.contract_address.values
+        )
+
+    def _decode_event_groups(
+            self,
+            df: pd.DataFrame,
+            selectors: pd.Series,
+            contracts: Dict[str, Optional[CompiledContract]],
+            decode_addresses: Optional[pd.Series] = None,
+            projection: Optional[Dict[Tuple[str, str], Optional[FrozenSet[str]]]] = None
+    ) -> List[Tuple[Tuple[str, str], np.ndarray, DecodedBatch]]:
+        """Decode the logs group by the contract address and the event topic, every group is decoded in batch
+        by the backend, see `_decode_function_groups`.
+        """
+        groups = self._group_rows(df, selectors, decode_addresses, self._merged_rows(decode_addresses, projection))
+
+        topics = [df[i].values for i in ['topic1', 'topic2', 'topic3', 'topic4']]
+        data = df.data.values
+        tasks = []
+        keys = []
+        for (address, decode_address, selector), positions in groups.items():
+            # the prefilter only keeps the known topics
+            event = contracts[decode_address].events[selector]
+            for partition in self._partition(positions):
+                codes, representatives = self._deduplicate([i[partition] for i in topics] + [data[partition]])
+                unique_partition = partition[representatives]
+                tasks.append((
+                    event,
+                    [StringColumn.from_values(i[unique_partition]) for i in topics],
+                    StringColumn.from_values(data[unique_partition]),
+                    self._projected_params(projection, address, event.name)
+                ))
+                keys.append((address, selector, event.name, partition, codes))
+
+        return self._collect_batches(
+            batches=self._map_tasks(decode_event_task, tasks),
+            keys=keys,
+            id_df=df[['block_number', 'tx_index']],
+            addresses=df.contract_address.values
+        )
+
+    def _merged_rows(
+            self,
+            decode_addresses: Optional[pd.Series],
+            projection: Optional[Dict[Tuple[str, str], Optional[FrozenSet[str]]]]
+    ) -> Optional[np.ndarray]:
+        """The rows decoded by the signatures, whatever their contract, unless the params decoded depend on it."""
+        if decode_addresses is None or projection is not None or len(self._signature_contracts) == 0:
+            return None
+        return decode_addresses.isin(self._signature_contracts.keys()).values
+
+    @staticmethod
+    def _group_rows(
+            df: pd.DataFrame,
+            selectors: pd.Series,
+            decode_addresses: Optional[pd.Series],
+            merged: Optional[np.ndarray] = None
+    ) -> Dict[Tuple[Optional[str], str, str], np.ndarray]:
+        """
+        :param merged: the mask of the rows grouped by decode address and selector only, e.g. the rows of the many
+                       contracts without abi decoded by the signatures, split by contract after decoding
+        :return: (contract address, None for the merged rows, decode address, selector) to the positions of its rows
+        """
+        decode_addresses = df.contract_address if decode_addresses is None else decode_addresses
+        keys_df = pd.DataFrame({
+            'contract_address': df.contract_address.values,
+            'decode_address': decode_addresses.values,
+            'selector': selectors.values
+        })
+        if merged is None or not merged.any():
+            return keys_df.groupby(['contract_address', 'decode_address', 'selector']).indices
+
+        groups = keys_df[~merged].groupby(['contract_address', 'decode_address', 'selector']).indices
+        positions = np.flatnonzero(~merged)
+        groups = {key: positions[rows] for key, rows in groups.items()}
+        positions = np.flatnonzero(merged)
+        for (decode_address, selector), rows in keys_df[merged].groupby(['decode_address', 'selector']).indices.items():
+            groups[(None, decode_address, selector)] = positions[rows]
+        return groups
+
+    def _map_tasks(self, func: Any, tasks: List[Any]) -> List[Any]:
+        """Run the tasks by the backend, their time in the workers is reported to the current stage."""
+        results = self.backend.map(partial(timed_call, func), tasks)
+        self.stats.add_worker_time(sum(i[1] for i in results), self.backend.nb_workers)
+        return [i[0] for i in results]
+
+    @staticmethod
+    def _projection(columns: Optional[Iterable[str]]) -> Optional[Dict[Tuple[str, str], Optional[FrozenSet[str]]]]:
+        """Parse the columns asked, `address.name` for every param of a call or `address.name.param` for one param,
+        the components of a tuple param are asked by their dotted path, e.g. `address.mint.data.tokenURI`.
+
+        :return: (lower case contract address, function or event name) to its param paths, None if every param of
+                 the call is asked, or None if every column is asked
+        """
+        if columns is None:
+            return None
+        projection: Dict[Tuple[str, str], Optional[Set[str]]] = {}
+        for column in columns:
+            parts = column.split('.', 2)
+            assert len(parts) >= 2, f"{column} is not an address.name.param column"
+            key = (parts[0].lower(), parts[1])
+            if len(parts) == 2 or projection.get(key, set()) is None:
+                projection[key] = None
+            else:
+                projection.setdefault(key, set()).add(parts[2])
+        return {key: None if params is None else frozenset(params) for key, params in projection.items()}
+
+    @staticmethod
+    def _projected_params(
+            projection: Optional[Dict[Tuple[str, str], Optional[FrozenSet[str]]]],
+            address: str,
+            name: str
+    ) -> Optional[FrozenSet[str]]:
+        return None if projection is None else projection.get((address.lower(), name))
+
+    @staticmethod
+    def _allowed_names(
+            allowed_calls: Optional[Iterable[Tuple[str, str]]],
+            projection: Optional[Dict[Tuple[str, str], Optional[FrozenSet[str]]]] = None
+    ) -> Optional[Dict[str, Set[str]]]:
+        """
+        :param projection: only the calls of the columns asked are allowed, see `_projection`
+        :return: lower case contract address to the allowed function or event names, None if everything is allowed
+        """
+        if allowed_calls is None and projection is None:
+            return None
+        calls = {(address.lower(), name) for address, name in allowed_calls} if allowed_calls is not None \
+            else set(projection)
+        if allowed_calls is not None and projection is not None:
+            calls.intersection_update(projection)
+        allowed_names = {}
+        for address, name in calls:
+            allowed_names.setdefault(address, set()).add(name)
+        return allowed_names
+
+    def _prefilter(
+            self,
+            addresses: pd.Series,
+            selectors: pd.Series,
+            contracts: Dict[str, Optional[CompiledContract]],
+            kind: str,
+            allowed_names: Optional[Dict[str, Set[str]]] = None,
+            decode_addresses: Optional[pd.Series] = None
+    ) -> np.ndarray:
+        """Keep the rows of a known (contract address, selector) only, so that the rows without abi, with an empty
+        input or of an unknown function never reach the decoders.
+
+        :param kind: 'functions' or 'events' of the compiled contracts
+        :param decode_addresses: the contract whose abi decodes every row, see `_decode_addresses`
+        :return: the mask of the kept rows
+        """
+        if decode_addresses is None:
+            decode_addresses = addresses
+        # the signature contracts are shared by every contract, their rows are checked against their selectors only
+        signature_rows = decode_addresses.isin(self._signature_contracts.keys()).values
+        pairs_df = pd.DataFrame({'address': addresses.values, 'decode_address': decode_addresses.values})[
+            ~signature_rows].drop_duplicates()
+
+        known_keys = []
+        for address, decode_address in zip(pairs_df.address, pairs_df.decode_address):
+            contract = contracts.get(decode_address)
+            if contract is None:
+                continue
+            # the allowed calls are given by the address called, e.g. the proxy
+            names = None if allowed_names is None else allowed_names.get(address.lower(), set())
+            for selector, item in getattr(contract, kind).items():
+                if names is None or item.name in names:
+                    known_keys.append((address, decode_address, selector))
+
+        mask = pd.MultiIndex.from_arrays([addresses.values, decode_addresses.values, selectors.values]) \
+            .isin(known_keys) if len(known_keys) > 0 else np.zeros(len(addresses), dtype=bool)
+        for key in pd.unique(decode_addresses.values[signature_rows]):
+            rows = signature_rows & (decode_addresses.values == key)
+            items = getattr(contracts[key], kind)
+            if allowed_names is None:
+                mask[rows] = selectors[rows].isin(items.keys()).values
+            else:
+                names = selectors[rows].map({selector: item.name for selector, item in items.items()})
+                allowed_pairs = [(address, name) for address, names in allowed_names.items() for name in names]
+                mask[rows] = pd.MultiIndex.from_arrays([addresses[rows].str.lower().values, names.values]) \
+                    .isin(allowed_pairs) if len(allowed_pairs) > 0 else False
+        self.logger.debug("prefilter kept %d of %d rows", mask.sum(), len(mask))
+        return mask
+
+    def _resolve_trace_implementations(self, df: pd.DataFrame) -> pd.Series:
+        """The implementation of every proxied trace, by its delegatecall child, the proxy map or the latest
+        implementation detected before, NaN if the trace is not proxied.
+        """
+        implementations = None
+        learned_implementations = {}
+        if self.detect_proxies:
+            implementations = delegatecall_implementations(df)
+            self.implementations.update(latest_implementations(df.contract_address, implementations, df.block_number))
+            learned_implementations = self.implementations
+        return map_implementations(df.contract_address, implementations, self.proxy_map, learned_implementations)
+
+    @staticmethod
+    def _decode_addresses(
+            addresses: pd.Series,
+            implementations: pd.Series,
+            selectors: pd.Series,
+            contracts: Dict[str, Optional[CompiledContract]],
+            kind: str
+    ) -> pd.Series:
+        """The contract whose abi decodes every row, the implementation of a proxy if it knows the selector, otherwise
+        the contract itself, e.g. for the admin functions of the proxy.
+        """
+        proxied = implementations.notna().values
+        if not proxied.any():
+            return addresses
+
+        known_keys = [
+            (address, selector)
+            for address in pd.unique(implementations.values[proxied])
+            if contracts.get(address) is not None
+            for selector in getattr(contracts[address], kind)
+        ]
+        if len(known_keys) == 0:
+            return addresses
+        known = proxied & pd.MultiIndex.from_arrays([implementations.values, selectors.values]).isin(known_keys)
+        return pd.Series(np.where(known, implementations.values, addresses.values), index=addresses.index)
+
+    def _signature_fallback(
+            self,
+            decode_addresses: pd.Series,
+            selectors: pd.Series,
+            contracts: Dict[str, Optional[CompiledContract]],
+            kind: str,
+            indexed_counts: Optional[pd.Series] = None
+    ) -> pd.Series:
+        """Decode the rows unknown to the abi of their contract by the signatures of their selectors, the contracts
+        compiled from the signatures are added to `contracts`.
+
+        :param indexed_counts: the topics after the event topic of every log, the first params of the event are indexed
+        :return: the decode addresses, `SIGNATURE_FUNCTIONS` or `SIGNATURE_EVENTS` for the rows found in the database
+        """
+        if self.signature_db is None:
+            return decode_addresses
+
+        known_keys = [
+            (address, selector)
+            for address in pd.unique(decode_addresses.values)
+            if contracts.get(address) is not None
+            for selector in getattr(contracts[address], kind)
+        ]
+        unknown = ~pd.MultiIndex.from_arrays([decode_addresses.values, selectors.values]).isin(known_keys) \
+            if len(known_keys) > 0 else np.ones(len(selectors), dtype=bool)
+        unknown &= decode_addresses.notna().values
+        if not unknown.any():
+            return decode_addresses
+
+        if kind == 'functions':
+            signatures = self.signature_db.lookup_functions(pd.unique(selectors.values[unknown]))
+            groups = {SIGNATURE_FUNCTIONS: (unknown, parse_signature)}
+        else:
+            signatures = self.signature_db.lookup_events(pd.unique(selectors.values[unknown]))
+            groups = {
+                SIGNATURE_EVENTS.format(indexed=indexed): (
+                    unknown & (indexed_counts.values == indexed),
+                    lambda signature, indexed=indexed: SignatureDatabase.event_abi(signature, indexed)
+                )
+                for indexed in pd.unique(indexed_counts.values[unknown])
+            }
+
+        decode_addresses = decode_addresses.copy()
+        for key, (rows, to_abi) in groups.items():
+            contract = self._signature_contracts.setdefault(key, CompiledContract(abi=[], codec=self.w3.codec))
+            for selector in pd.unique(selectors.values[rows]):
+                if selector in signatures and selector not in getattr(contract, kind):
+                    entry = to_abi(signatures[selector])
+                    try:
+                        if entry is not None:
+                            contract.add(entry)
+                    except Exception as e:
+                        self.logger.debug("can not compile the signature %s: %s", signatures[selector], e)
+            rows = rows & selectors.isin(getattr(contract, kind).keys()).values
+            decode_addresses[rows] = key
+            contracts[key] = contract
+        return decode_addresses
+
+    def _partition(self, positions: np.ndarray) -> List[np.ndarray]:
+        return np.array_split(positions, max(1, -(-len(positions) // self.partition_size)))
+
+    def _deduplicate(self, columns: List[np.ndarray]) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        :return: codes: Optional[np.ndarray], the unique row of every row, None if `dedup_inputs` is off,
+                 representatives: np.ndarray, the rows to decode
+        """
+        if not self.dedup_inputs:
+            return None, np.arange(len(columns[0]))
+        codes, representatives = deduplicate(columns)
+        self._dedup_counts['rows'] += len(codes)
+        self._dedup_counts['unique_rows'] += len(representatives)
+        return codes, representatives
+
+    def dedup_stats(self) -> Dict[str, Union[int, float]]:
+        """The rows seen by the deduplication, the unique rows decoded, and the hit rate of the skipped rows."""
+        rows = self._dedup_counts['rows']
+        unique_rows = self._dedup_counts['unique_rows']
+        return {
+            'rows': rows,
+            'unique_rows': unique_rows,
+            'hits': rows - unique_rows,
+            'hit_rate': (rows - unique_rows) / rows if rows > 0 else 0.0
+        }
+
+    def stage_stats(self) -> pd.DataFrame:
+        """The calls, rows, seconds, rows/sec and worker utilization of every stage, see `StageStats.summary`."""
+        return self.stats.summary()
+
+    def _collect_batches(
+            self,
+            batches: List[DecodedBatch],
+            keys: List[Tuple[Optional[str], str, str, np.ndarray, Optional[np.ndarray]]],
+            id_df: pd.DataFrame,
+            addresses: np.ndarray
+    ) -> List[Tuple[Tuple[str, str], np.ndarray, DecodedBatch]]:
+        """Broadcast the deduplicated batches back to their rows, split the merged batches by contract, report the
+        failures of every batch and drop the batches without any decoded row.
+
+        :param keys: the address, None for a batch of merged rows, selector, name, the positions of the rows of every
+                     batch and the unique row of every row if deduplicated
+        :param id_df: the columns identifying a failed row
+        :param addresses: the contract address of every row
+        :return: (address, name), the positions of the rows of the batch and the batch
+        """
+        decoded = []
+        for (address, selector, name, positions, codes), batch in zip(keys, batches):
+            if codes is not None:
+                batch = broadcast_batch(batch, codes)
+            if address is None:
+                parts = self._split_batch(batch, positions, addresses[positions])
+            else:
+                parts = [(address, positions, batch)]
+            for part_address, part_positions, part_batch in parts:
+                if len(part_batch.errors) > 0:
+                    failed_positions = part_positions[[i[0] for i in part_batch.errors]]
+                    self.failures.record(part_address, selector, name, part_batch.errors, id_df.iloc[failed_positions])
+                if part_batch.mask.any():
+                    decoded.append(((part_address, name), part_positions, part_batch))
+        if any(i[0] is None for i in keys):
+            # in the order of the contracts as if grouped by contract, their signature rows after their abi rows
+            decoded.sort(key=lambda i: i[0][0])
+        return decoded
+
+    @staticmethod
+    def _split_batch(
+            batch: DecodedBatch,
+            positions: np.ndarray,
+            addresses: np.ndarray
+    ) -> List[Tuple[str, np.ndarray, DecodedBatch]]:
+        """Split a batch of merged rows by the contract address of its rows, in the order of the addresses.
+
+        :return: the address, the positions of its rows and their batch
+        """
+        order = np.argsort(addresses, kind='stable')
+        sorted_addresses = addresses[order]
+        starts = np.flatnonzero(np.concatenate([[True], sorted_addresses[1:] != sorted_addresses[:-1]]))
+        ends = np.append(starts[1:], len(order))
+        decoded_rank = np.cumsum(batch.mask) - 1
+        row_errors = {i[0]: i for i in batch.errors}
+
+        parts = []
+        for start, end in zip(starts, ends):
+            rows = order[start:end]
+            mask = batch.mask[rows]
+            take = decoded_rank[rows[mask]]
+            errors = [(index, *row_errors[row][1:]) for index, row in enumerate(rows) if row in row_errors] \
+                if len(row_errors) > 0 else []
+            parts.append((sorted_addresses[start], positions[rows], DecodedBatch(
+                mask=mask,
+                columns={path: values[take] for path, values in batch.columns.items()},
+                errors=errors,
+                types=batch.types
+            )))
+        return parts
+
+    @staticmethod
+    def _batches_to_frames(
+            decoded: List[Tuple[Tuple[str, str], np.ndarray, DecodedBatch]]
+    ) -> List[Tuple[Tuple[str, str], pd.DataFrame]]:
+        """The flattened params of every batch indexed by the positions of its rows."""
+        return [
+            (key, pd.DataFrame(batch.columns, index=positions[batch.mask]).infer_objects())
+            for key, positions, batch in decoded
+        ]
+
     def _cache_abi_and_contract_by_df(
             self,
             df: pd.DataFrame,
-            abi_map: Optional[Dict[str, str]] = None
-    ):
+            abi_map: Optional[Dict[str, str]] = None,
+            allowed_names: Optional[Dict[str, Set[str]]] = None,
+            implementations: Optional[pd.Series] = None
+    ) -> Dict[str, Optional[CompiledContract]]:
+        """Cache the abi of the dataframe and the abi_map, and resolve the contracts of the dataframe and the
+        implementations of its proxies. Only the contracts of `allowed_names` are resolved if it is given.
+
+        :return: contract address to the compiled contract, None if its abi could not be found
+        """
+        abis = {}
         if 'abi' in df.columns:
             abi_map_from_df = df.loc[~pd.isna(df.abi), ['contract_address', 'abi']] \
                 .drop_duplicates(subset=['contract_address']) \
                 .set_index('contract_address') \
-                .squeeze() \
+                .abi \
                 .to_dict()
-            self._update_abi_cache(abi_map_from_df)
+            abis.update(self._update_abi_cache(abi_map_from_df))
             df.drop('abi', axis=1, inplace=True)
 
         if abi_map is not None:
-            self._update_abi_cache(abi_map)
+            abis.update(self._update_abi_cache(abi_map))
+
+        addresses = df.contract_address.dropna().unique()
+        if allowed_names is not None:
+            addresses = [i for i in addresses if i.lower() in allowed_names]
+        if implementations is not None:
+            proxied = implementations.notna()
+            if allowed_names is not None:
+                proxied &= df.contract_address.str.lower().isin(allowed_names.keys())
+            addresses = list(dict.fromkeys(list(addresses) + list(implementations[proxied].unique())))
 
-        if self.is_multiprocessing:
-            # only read cache
-            self._preheat_abi_and_contract(df.contract_address.unique())
+        with self._pinned_abis(abis):
+            abis.update(self.prefetch_abis(addresses))
+        with self._pinned_abis(abis):
+            return self._preheat_abi_and_contract(addresses)
 
-    def _update_abi_cache(self, abi_map: Dict[str, Any]):
+    def _update_abi_cache(self, abi_map: Dict[str, Any]) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        :return: contract address to the abi in effect, the cached abi first
+        """
+        abis = {}
         for address, abi in abi_map.items():
-            if address not in self.abi_cache:
-                self.abi_cache[address] = json.loads(abi)
+            abis[address] = self.abi_cache.get(address, _MISSING)
+            if abis[address] is _MISSING:
+                abis[address] = self.abi_cache[address] = json.loads(abi)
+        return abis
 
-    def _load_abi(self, address: str) -> Optional[Dict[str, Any]]:
+    @contextmanager
+    def _pinned_abis(self, abis: Dict[str, Optional[List[Dict[str, Any]]]]) -> Iterator[None]:
+        """Resolve the contracts by `abis` first in the block, so that an abi evicted from the bounded abi cache
+        meanwhile, e.g. by the other contracts of a large dataframe, is not fetched again.
+        """
+        previous_call_abis = self._call_abis
+        self._call_abis = {**previous_call_abis, **abis}
         try:
-            if address not in self.abi_cache:
-                self.abi_cache[address] = json.loads(etherscan.get_contract_abi(address))
-        except Exception:
-            self.abi_cache[address] = None
+            yield
         finally:
-            return self.abi_cache[address]
+            self._call_abis = previous_call_abis
 
-    # return type should be Optional[Type[web3.contract.Contract]], but web3.contract was not exposed =/
-    def _load_contract(self, address: str) -> Optional[Any]:
-        abi = self._load_abi(address)
-        if abi is None:
-            return None
-        if self.is_multiprocessing:
-            return self.w3.eth.contract(abi=abi)
-        if address not in self.contract_cache:
-            self.contract_cache[address] = self.w3.eth.contract(
-                abi=abi
-            )
-        return self.contract_cache[address]
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """The hits, misses, evictions, rejections and sizes of the abi and contract caches."""
+        return {'abi': self.abi_cache.stats(), 'contract': self.contract_cache.stats()}
 
-    def _preheat_abi_and_contract(self, addresses: List[str]):
-        for address in addresses:
-            self._load_contract(address)
+    def _frozen_cache_timers(self) -> ExitStack:
+        stack = ExitStack()
+        for cache in (self.abi_cache, self.contract_cache):
+            if isinstance(cache, TTLCache):
+                stack.enter_context(cache.timer)
+        return stack
 
-    def _parse_function_input_with_abi(
-            self,
-            contract_address: str,
-            input_data: str,
-    ) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
-        """
-        :return: function_name: str,
-                 input_schema: List[Dict[str, Any]],
-                 input_params: Dict[str, Any]
-        """
-        try:
-            abi = self._load_abi(contract_address)
-            contract = self._load_contract(contract_address)
-            if abi is None or contract is None:
-                return '', [], {}
+    def prefetch_abis(self, addresses: Iterable[str]) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """Resolve the abi of every contract, cached, stored or by a concurrent bulk fetch.
 
-            func_obj, input_params = contract.decode_function_input(input_data)
+        :return: contract address to the abi, None if not found, to resolve the contracts of the current call by, see
+                 `_pinned_abis`, the cache is bounded and may have evicted some of them already
+        """
+        abis = {}
+        missing_addresses = []
+        for address in dict.fromkeys(addresses):
+            abi = self._call_abis.get(address, _MISSING)
+            if abi is _MISSING:
+                abi = self.abi_cache.get(address, _MISSING)
+            if abi is _MISSING and self.abi_store is not None and address in self.abi_store:
+                abi = self._cache_abi_json(address, self.abi_store.get(address))
+            if abi is _MISSING:
+                missing_addresses.append(address)
+            else:
+                abis[address] = abi
 
-            func_name = vars(func_obj)['fn_name']
+        if len(missing_addresses) == 0 or not self.fetch_abis:
+            return abis
 
-            input_schema = \
-                [i for i in abi if 'name' in i and i['name'] == func_name and i['type'] == 'function'][0]['inputs']
-        except Exception as ex:
-            self.logger.warning("parsing input with abi failed: %s", ex)
-            return '', [], {}
+        abi_map = etherscan.get_contract_abis(
+            missing_addresses,
+            max_workers=self.prefetch_workers,
+            calls_per_second=self.etherscan_calls_per_second,
+            api_url=self.etherscan_api_url,
+            api_key=self.etherscan_api_key,
+            timeout=self.etherscan_timeout
+        )
+        abis.update(self.cache_fetched_abis(abi_map,
+                                            failed_addresses=[i for i in missing_addresses if i not in abi_map]))
+        return abis
 
-        return func_name, input_schema, input_params
+    def uncached_addresses(self, addresses: Iterable[str]) -> List[str]:
+        """The contracts whose abi is neither cached nor stored, i.e. to fetch, without changing the caches."""
+        return [
+            address for address in dict.fromkeys(addresses)
+            if address not in self.abi_cache and (self.abi_store is None or address not in self.abi_store)
+        ]
 
-    def _parse_event_data_with_abi(
+    def cache_fetched_abis(
             self,
-            contract_address: str,
-            topics: List[str],
-            data: Optional[str]
-    ) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
-        """
-        :return: event_name: str,
-                 input_schema: List[Dict[str, Any]],
-                 input_params: Dict[str, Any]
+            abi_map: Dict[str, Optional[str]],
+            failed_addresses: Iterable[str] = ()
+    ) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """Store and cache the abi fetched from etherscan, None if the source code is not verified.
+
+        :param failed_addresses: the contracts whose call failed, e.g. by a timeout or a rate limit, cached without
+                                 abi until their cache entry is evicted but never stored, so fetched again later
+        :return: contract address to the parsed abi
         """
+        abis = {}
+        for address, abi in abi_map.items():
+            if self.abi_store is not None:
+                self.abi_store.put(address, abi)
+            abis[address] = self._cache_abi_json(address, abi)
+        for address in failed_addresses:
+            abis[address] = self._cache_abi_json(address, None)
+        return abis
+
+    def _cache_abi_json(self, address: str, abi: Optional[str]) -> Optional[List[Dict[str, Any]]]:
         try:
-            if data is None:
-                raise Exception('The data is empty.')
-
-            abi = self._load_abi(contract_address)
-            contract = self._load_contract(contract_address)
-
-            event_inputs: Optional[List[Dict[str, Any]]] = None
-            event_name: Optional[str] = None
-
-            for event_abi in abi:
-                if 'name' in event_abi and topics[0] == encode_hex(event_abi_to_log_topic(event_abi)):
-                    event_inputs = event_abi['inputs']
-                    event_name = event_abi['name']
-
-            if event_inputs is None or event_name is None:
-                raise Exception('Could not find any event with matching selector.')
-
-            event = contract.events[event_name]().processLog({
-                'data': data,
-                'topics': [decode_hex(topic) for topic in topics],
-                # Placeholder only
-                'logIndex': '',
-                'transactionIndex': '',
-                'transactionHash': '',
-                'address': '',
-                'blockHash': '',
-                'blockNumber': ''
-            })
-        except Exception as ex:
-            self.logger.warning("parsing event data with abi failed: %s", ex)
-            return '', [], {}
+            parsed_abi = None if abi is None else json.loads(abi)
+        except ValueError:
+            parsed_abi = None
+        self.abi_cache[address] = parsed_abi
+        return parsed_abi
 
-        return event.event, event_inputs, event.args
+    def _load_abi(self, address: str) -> Optional[List[Dict[str, Any]]]:
+        if address in self._call_abis:
+            return self._call_abis[address]
+        cached_abi = self.abi_cache.get(address, _MISSING)
+        if cached_abi is not _MISSING:
+            return cached_abi
 
-    @staticmethod
-    def _calculate_trace_index(
-            block_number: int,
-            tx_index: int,
-            trace_address: str
-    ):
-        return f'{int(block_number)}_{int(tx_index)}_{trace_address}'
+        if self.abi_store is not None and address in self.abi_store:
+            return self._cache_abi_json(address, self.abi_store.get(address))
 
-    @staticmethod
-    def _tuple_to_dict(
-            raw_tuple: Tuple,
-            component_schema: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        tuple_dict = {}
-        for index, field_type in enumerate(component_schema):
-            if field_type['type'] != 'tuple':
-                tuple_dict[field_type['name']] = raw_tuple[index]
-            else:
-                tuple_dict[field_type['name']] = Transformer._tuple_to_dict(raw_tuple[index], field_type['components'])
+        if not self.fetch_abis:
+            return self._cache_abi_json(address, None)
+
+        try:
+            abi = etherscan.get_contract_abi(address, api_url=self.etherscan_api_url, api_key=self.etherscan_api_key,
+                                             timeout=self.etherscan_timeout)
+        except etherscan.AbiNotVerified:
+            abi = None
+        except Exception as ex:
+            self.logger.warning("Failed to get contract abi of %s: %s", address, ex)
+            # not stored, the call is retried once the cache entry is evicted
+            return self._cache_abi_json(address, None)
+        if self.abi_store is not None:
+            self.abi_store.put(address, abi)
+        return self._cache_abi_json(address, abi)
 
-        return tuple_dict
+    def _load_contract(self, address: str) -> Optional[CompiledContract]:
+        contract = self.contract_cache.get(address)
+        if contract is None:
+            abi = self._load_abi(address)
+            if abi is None:
+                return None
+            contract = CompiledContract(abi=abi, codec=self.w3.codec)
+            self.contract_cache[address] = contract
+        return contract
 
-    @staticmethod
-    def _nested_tuple_dict_ser(
-            raw_dict: Dict[str, Any],
-            input_schema: List[Dict[str, Any]],
-            append_obj: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Some func_params decoded by web3.contract are dictionary with some nested tuple fields,
-            the function will transform them to dictionary just contains some base type fields.
-        """
-        result_dict = append_obj
-        for key, value in raw_dict.items():
-            if type(value) is not tuple:
-                result_dict[key] = value
-            else:
-                component_schema = [i for i in input_schema
-                                    if 'name' in i and 'type' in i and i['name'] == key and i['type'] == 'tuple'][0][
-                    'components']
-                result_dict[key] = Transformer._tuple_to_dict(value, component_schema)
+    def _preheat_abi_and_contract(self, addresses: List[str]) -> Dict[str, Optional[CompiledContract]]:
+        """Compile the contracts once in the parent process, the workers only receive the compiled contracts."""
+        return {address: self._load_contract(address) for address in addresses}
 
-        return result_dict
+    @staticmethod
+    def _calculate_trace_index(
+            block_number: pd.Series,
+            tx_index: pd.Series,
+            trace_address: pd.Series
+    ) -> pd.Series:
+        return block_number.astype(str) + '_' + tx_index.astype(str) + '_' + trace_address.astype(str)
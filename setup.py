@@ -34,9 +34,13 @@ setup(
     install_requires=[
         'pandas==1.4.0',
         'web3==5.26.0',
-        'pandarallel==1.5.5',
+        'numpy>=1.18.5',
         'cachetools==5.0.0'
     ],
+    extras_require={
+        'arrow': ['pyarrow>=6.0.0'],
+        'async': ['aiohttp>=3.7.4']
+    },
     project_urls={
         'Bug Reports': 'https://github.com/tellery/web3-pandas/issues',
         'Source': 'https://github.com/tellery/web3-pandas',
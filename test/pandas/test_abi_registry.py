@@ -0,0 +1,66 @@
+import json
+import pickle
+import unittest
+from typing import AnyStr
+
+from eth_abi import encode_abi
+from eth_utils import encode_hex, event_abi_to_log_topic
+from web3 import Web3
+
+import test.resources
+from pandas3.abi_registry import CompiledContract
+
+RESOURCE_GROUP = 'test_transformer'
+
+
+def _read_resource(file_name: str) -> AnyStr:
+    return test.resources.read_resource([RESOURCE_GROUP], file_name)
+
+
+class TestAbiRegistry(unittest.TestCase):
+    contract = CompiledContract(abi=json.loads(_read_resource('log_test_abi.json')), codec=Web3().codec)
+
+    def test_function_lookup_by_selector(self):
+        # transferOwnership(address)
+        func = self.contract.get_function('0xF2FDE38B000000000000000000000000F8523C551763FE4261A28313015267F163DE7541')
+
+        self.assertEqual(first=func.name, second='transferOwnership')
+        self.assertEqual(
+            first=func.decode('0xf2fde38b000000000000000000000000f8523c551763fe4261a28313015267f163de7541'),
+            second={'newOwner': '0xF8523c551763FE4261A28313015267F163de7541'}
+        )
+        self.assertIsNone(self.contract.get_function('0x00000000'))
+
+    def test_event_lookup_by_topic(self):
+        event = self.contract.get_event('0x8BE0079C531659141344CD1FD0A4F28419497F9722A3DAAFE3B4186F6B6457E0')
+
+        self.assertEqual(first=event.name, second='OwnershipTransferred')
+        self.assertEqual(first=event.topic_names, second=['previousOwner', 'newOwner'])
+        self.assertIsNone(self.contract.get_event('0x' + '00' * 32))
+
+    def test_pickle(self):
+        contract = pickle.loads(pickle.dumps(self.contract))
+        func = contract.get_function('0xf2fde38b000000000000000000000000f8523c551763fe4261a28313015267f163de7541')
+
+        self.assertEqual(
+            first=func.decode('0xf2fde38b000000000000000000000000f8523c551763fe4261a28313015267f163de7541'),
+            second={'newOwner': '0xF8523c551763FE4261A28313015267F163de7541'}
+        )
+
+    def test_event_with_tuple(self):
+        abi = [{'type': 'event', 'name': 'OrderMatched', 'anonymous': False, 'inputs': [
+            {'name': 'hash', 'type': 'bytes32', 'indexed': True},
+            {'name': 'order', 'type': 'tuple', 'indexed': False, 'components': [
+                {'name': 'maker', 'type': 'address'},
+                {'name': 'price', 'type': 'uint256'}
+            ]}
+        ]}]
+        event = CompiledContract(abi=abi, codec=Web3().codec).events[
+            encode_hex(event_abi_to_log_topic(abi[0]))]
+        data = encode_hex(encode_abi(['(address,uint256)'], [('0xf8523c551763fe4261a28313015267f163de7541', 7)]))
+
+        self.assertEqual(first=event.data_types, second=['(address,uint256)'])
+        self.assertEqual(
+            first=event.decode([event.topic, '0x' + '11' * 32], data)['order'],
+            second=('0xF8523c551763FE4261A28313015267F163de7541', 7)
+        )
@@ -0,0 +1,127 @@
+import json
+import tempfile
+import unittest
+from datetime import timedelta
+from typing import AnyStr
+from unittest import mock
+
+import pandas as pd
+
+import test.resources
+from pandas3 import etherscan
+from pandas3.abi_store import FileAbiStore
+from pandas3.transformer import Transformer
+from test.stub_etherscan import StubEtherscan
+
+RESOURCE_GROUP = 'test_transformer'
+
+MINT_CONTRACT = '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7'
+
+
+def _get_resource_path(file_name: str) -> AnyStr:
+    return test.resources.get_resource_path([RESOURCE_GROUP], file_name)
+
+
+def _read_resource(file_name: str) -> AnyStr:
+    return test.resources.read_resource([RESOURCE_GROUP], file_name)
+
+
+class TestAbiStore(unittest.TestCase):
+
+    def test_positive_and_negative_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileAbiStore(directory, negative_ttl=timedelta(seconds=-1))
+            store.put(MINT_CONTRACT, '[]')
+            store.put('0x01', None)
+
+            self.assertIn(MINT_CONTRACT.lower(), store)
+            self.assertEqual(first=FileAbiStore(directory).get(MINT_CONTRACT), second='[]')
+            # the negative entry is already expired
+            self.assertNotIn('0x01', store)
+            self.assertIsNone(store.get('0x01'))
+
+    def test_get_contract_abis(self):
+        with StubEtherscan({MINT_CONTRACT: '[]'}) as stub:
+            abi_map = etherscan.get_contract_abis(
+                [MINT_CONTRACT, '0x01', MINT_CONTRACT],
+                max_workers=2,
+                calls_per_second=100,
+                api_url=stub.api_url
+            )
+
+        self.assertEqual(first=abi_map, second={MINT_CONTRACT: '[]', '0x01': None})
+        self.assertEqual(first=sorted(stub.requested_addresses), second=['0x01', MINT_CONTRACT.lower()])
+
+    def test_failed_calls_are_not_stored(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                StubEtherscan({MINT_CONTRACT: '[]'}, rate_limited_addresses=['0x02']) as stub:
+            abi_map = etherscan.get_contract_abis(['0x01', '0x02'], calls_per_second=100, api_url=stub.api_url)
+            self.assertEqual(first=abi_map, second={'0x01': None})
+
+            transformer = Transformer(nb_workers=1, abi_store=FileAbiStore(directory), etherscan_api_url=stub.api_url)
+            transformer.prefetch_abis(['0x01', '0x02'])
+            self.assertIsNone(transformer._load_abi('0x02'))
+            # the unverified contract is a negative entry, the rate limited one is fetched again by a new process
+            self.assertIn('0x01', transformer.abi_store)
+            self.assertNotIn('0x02', transformer.abi_store)
+            self.assertEqual(first=sorted(stub.requested_addresses), second=['0x01', '0x01', '0x02', '0x02'])
+
+            stub.rate_limited_addresses.clear()
+            stub.abi_map['0x02'] = '[]'
+            transformer = Transformer(nb_workers=1, abi_store=FileAbiStore(directory), etherscan_api_url=stub.api_url)
+            self.assertEqual(first=transformer._load_abi('0x02'), second=[])
+
+    def test_transformer_prefetch_with_store(self):
+        df = pd.read_csv(_get_resource_path('traces2.csv'))
+
+        with tempfile.TemporaryDirectory() as directory, \
+                StubEtherscan({MINT_CONTRACT: _read_resource('trace_test_abi.json')}) as stub:
+            transformer = Transformer(nb_workers=1, abi_store=FileAbiStore(directory), etherscan_api_url=stub.api_url)
+            result_df = transformer.traces_to_func_call_df(df=df.copy())
+            requested_count = len(stub.requested_addresses)
+
+            # a new process reads the abi from the store
+            transformer = Transformer(nb_workers=1, abi_store=FileAbiStore(directory), etherscan_api_url=stub.api_url)
+            transformer.traces_to_func_call_df(df=df.copy())
+
+        self.assertEqual(
+            first=result_df.loc['11565108_139_', f'{MINT_CONTRACT}.mint.data.tokenURI'],
+            second='https://ipfs.fleek.co/ipfs/bafybeifyqibqlheu7ij7fwdex4y2pw2wo7eaw2z6lec5zhbxu3cvxul6h4'
+        )
+        self.assertEqual(first=len(stub.requested_addresses), second=requested_count)
+
+    def test_more_contracts_than_cache_size(self):
+        abi = [{'type': 'function', 'name': 'withdraw', 'inputs': [{'name': 'wad', 'type': 'uint256'}]}]
+        addresses = [f'0x{i:040x}' for i in range(1, 31)]
+        df = pd.DataFrame({
+            'block_number': 1,
+            'tx_index': range(len(addresses)),
+            'trace_address': None,
+            'call_type': 'call',
+            'from_address': addresses[0],
+            'contract_address': addresses,
+            'input': '0x2e1a7d4d' + '0' * 63 + '1'
+        })
+
+        with StubEtherscan({i: json.dumps(abi) for i in addresses}) as stub:
+            transformer = Transformer(nb_workers=1, cache_size=10, etherscan_api_url=stub.api_url,
+                                      etherscan_calls_per_second=1000)
+            result_df = transformer.traces_to_func_call_df(df=df)
+
+        # the abi evicted from the cache are kept by the call, never fetched one by one again
+        self.assertEqual(first=sorted(stub.requested_addresses), second=addresses)
+        self.assertEqual(first=result_df[f'{addresses[0]}.withdraw.wad'].dropna().tolist(), second=[1])
+        self.assertEqual(first=len(result_df), second=len(addresses))
+
+    def test_transformer_prefetch_without_store(self):
+        df = pd.read_csv(_get_resource_path('traces2.csv'))
+
+        with StubEtherscan({MINT_CONTRACT: _read_resource('trace_test_abi.json')}) as stub:
+            transformer = Transformer(nb_workers=1, etherscan_api_url=stub.api_url)
+            with mock.patch.object(etherscan, 'get_contract_abi', wraps=etherscan.get_contract_abi) as get_abi, \
+                    mock.patch.object(etherscan, 'get_contract_abis', wraps=etherscan.get_contract_abis) as get_abis:
+                transformer.traces_to_func_call_df(df=df.copy())
+
+        # fetched in bulk, never one by one by the decoding
+        self.assertEqual(first=get_abis.call_count, second=1)
+        self.assertEqual(first=get_abi.call_count, second=len(stub.requested_addresses))
@@ -0,0 +1,87 @@
+import unittest
+from typing import AnyStr
+from unittest import mock
+
+import pandas as pd
+
+import pandas3
+import test.resources
+from pandas3.transformer import Transformer
+
+RESOURCE_GROUP = 'test_transformer'
+
+OWNABLE_CONTRACT = '0x1D5D9A2DDA0843ED9D8A9BDDC33F1FCA9F9C64A0'
+MINT_CONTRACT = '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7'
+
+
+def _get_resource_path(file_name: str) -> AnyStr:
+    return test.resources.get_resource_path([RESOURCE_GROUP], file_name)
+
+
+class TestAccessor(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.read_csv(_get_resource_path('traces1.csv'))
+        self.transformer = Transformer(nb_workers=1)
+
+    def test_decode_projected_columns(self):
+        calls = self.df.web3.decode_calls(transformer=self.transformer)
+        self.assertIsInstance(calls, pandas3.DecodedCalls)
+        # nothing is decoded before the columns are asked
+        self.assertEqual(first=self.transformer.stage_stats().empty, second=True)
+
+        new_owner = calls[f'{OWNABLE_CONTRACT.lower()}.transferOwnership.newOwner']
+        self.assertEqual(first=new_owner.loc['11565326_60_'], second='0xF8523c551763FE4261A28313015267F163de7541')
+
+        df = calls.select(f'{MINT_CONTRACT}.mint.data.tokenURI', f'{MINT_CONTRACT}.mint.unknown')
+        self.assertEqual(
+            first=[i for i in df.columns if i.startswith('0x')],
+            second=[f'{MINT_CONTRACT}.mint.data.tokenURI', f'{MINT_CONTRACT}.mint.unknown']
+        )
+        self.assertEqual(
+            first=df.loc['11565108_139_', f'{MINT_CONTRACT}.mint.data.tokenURI'],
+            second='https://ipfs.fleek.co/ipfs/bafybeifyqibqlheu7ij7fwdex4y2pw2wo7eaw2z6lec5zhbxu3cvxul6h4'
+        )
+        self.assertTrue(df[f'{MINT_CONTRACT}.mint.unknown'].isna().all())
+
+    def test_dataframe_not_changed(self):
+        columns = list(self.df.columns)
+        transformer = Transformer(nb_workers=1, fetch_abis=False)
+        calls = self.df.web3.decode_calls(transformer=transformer)
+        calls[f'{OWNABLE_CONTRACT}.transferOwnership.newOwner']
+
+        self.assertEqual(first=list(self.df.columns), second=columns)
+        # the abi evicted from the caches are read from the dataframe again
+        transformer.abi_cache.clear()
+        transformer.contract_cache.clear()
+        self.assertEqual(first=calls[f'{MINT_CONTRACT}.mint.data.tokenURI'].notna().sum(), second=3)
+
+    def test_call_key_and_cached_frames(self):
+        calls = self.df.web3.decode_calls(transformer=self.transformer)
+
+        df = calls[f'{MINT_CONTRACT}.mint']
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertIn(f'{MINT_CONTRACT}.mint.data.tokenURI', df.columns)
+
+        first, second = f'{MINT_CONTRACT}.mint.data.tokenURI', f'{OWNABLE_CONTRACT}.transferOwnership.newOwner'
+        expected_df = calls[[first, second]]
+        with mock.patch.object(self.transformer, 'traces_to_func_call_df', side_effect=AssertionError):
+            # the same columns in another order or case are not decoded again
+            pd.testing.assert_frame_equal(calls[[second, first]][[second, first]], expected_df[[second, first]])
+            lower_first = f'{MINT_CONTRACT.lower()}.mint.data.tokenURI'
+            self.assertEqual(first=calls[[lower_first, second]][lower_first].notna().sum(), second=3)
+
+    def test_aggregate(self):
+        column = f'{MINT_CONTRACT}.mint.bidShares.owner.value'
+        df = self.df.web3.decode_calls(transformer=self.transformer).aggregate([column], funcs=['sum', 'count'])
+
+        self.assertEqual(first=df.loc[11565108, (column, 'sum')], second=100000000000000000000)
+        self.assertEqual(first=df[(column, 'count')].sum(), second=3)
+
+    def test_to_frame(self):
+        expected_df = self.transformer.traces_to_func_call_df(df=self.df.copy())
+        pd.testing.assert_frame_equal(self.df.web3.decode_calls(transformer=self.transformer).to_frame(), expected_df)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import unittest
+
+import numpy as np
+import pandas as pd
+from eth_abi import encode_abi
+from eth_utils import encode_hex, function_abi_to_4byte_selector
+
+from pandas3 import arrow
+from pandas3.aggregate import IntAggregator, aggregate_ints, int_limbs
+from pandas3.transformer import Transformer
+
+WETH = '0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2'
+WAD = f'{WETH}.withdraw.wad'
+DELTA = '0x5555555555555555555555555555555555555555.Swap.amount0'
+
+WETH_ABI = [
+    {'type': 'function', 'name': 'deposit', 'inputs': []},
+    {'type': 'function', 'name': 'withdraw', 'inputs': [{'name': 'wad', 'type': 'uint256'}]},
+    {'type': 'function', 'name': 'move', 'inputs': [{'name': 'delta', 'type': 'int256'}]}
+]
+
+
+def _traces_df(calls: list) -> pd.DataFrame:
+    inputs = [encode_hex(function_abi_to_4byte_selector(WETH_ABI[index])
+                         + encode_abi([i['type'] for i in WETH_ABI[index]['inputs']], args))
+              for index, args in calls]
+    return pd.DataFrame({
+        'block_number': 1,
+        'tx_index': range(len(inputs)),
+        'trace_address': None,
+        'call_type': 'call',
+        'from_address': DELTA[:42],
+        'contract_address': WETH,
+        'input': inputs
+    })
+
+
+class TestAggregate(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'block_number': [1, 1, 2, 2, 3],
+            WAD: np.array([2 ** 256 - 1, 2 ** 256 - 1, 5, np.nan, np.nan], dtype=object),
+            DELTA: np.array([-2 ** 255, 3, 7, -1, np.nan], dtype=object)
+        })
+
+    def test_int_limbs(self):
+        for values in ([-1, 0, 2 ** 63], np.array([-1, 0, 5], dtype=np.int64),
+                       np.array([0, 2 ** 64 - 1], dtype=np.uint64)):
+            expected_limbs, _ = int_limbs(np.array([int(i) for i in values], dtype=object))
+            limbs, valid = int_limbs(values)
+            np.testing.assert_array_equal(limbs, expected_limbs)
+            self.assertTrue(valid.all())
+
+    def test_aggregate_ints(self):
+        df = aggregate_ints(self.df, [WAD, DELTA])
+
+        self.assertEqual(first=df[(WAD, 'sum')].tolist(), second=[2 ** 257 - 2, 5, 0])
+        self.assertEqual(first=df[(WAD, 'count')].tolist(), second=[2, 1, 0])
+        self.assertEqual(first=df[(WAD, 'max')].tolist(), second=[2 ** 256 - 1, 5, None])
+        self.assertEqual(first=df[(DELTA, 'sum')].tolist(), second=[-2 ** 255 + 3, 6, 0])
+        self.assertEqual(first=df[(DELTA, 'min')].tolist(), second=[-2 ** 255, -1, None])
+        self.assertEqual(first=df.index.tolist(), second=[1, 2, 3])
+
+    def test_stream_and_buckets(self):
+        aggregator = IntAggregator([WAD, DELTA], bucket=2, funcs=['sum', 'min'])
+        for position in range(len(self.df)):
+            aggregator.update(self.df.iloc[[position]])
+        df = aggregator.result()
+
+        self.assertEqual(first=df.index.tolist(), second=[0, 2])
+        self.assertEqual(first=df[(WAD, 'sum')].tolist(), second=[2 ** 257 - 2, 5])
+        self.assertEqual(first=df[(DELTA, 'min')].tolist(), second=[-2 ** 255, -1])
+
+    def test_floats_are_rejected(self):
+        for values in (np.array([1e18, np.nan]), np.array([2 ** 70, 1e18], dtype=object)):
+            with self.assertRaisesRegex(TypeError, 'inexact'):
+                int_limbs(values)
+
+    def test_mixed_calls_of_the_wide_output(self):
+        wads = [10 ** 18 + 1, 3 * 10 ** 18 + 7]
+        transformer = Transformer(nb_workers=1, init_abi_map={WETH: json.dumps(WETH_ABI)}, fetch_abis=False)
+        df = transformer.traces_to_func_call_df(df=_traces_df([(1, [wads[0]]), (0, []), (1, [wads[1]])]))
+
+        # the missing wad of the deposit never turns the column to float
+        self.assertEqual(first=aggregate_ints(df, [WAD], funcs=['sum']).loc[1, (WAD, 'sum')], second=sum(wads))
+
+    def test_multi_index_output(self):
+        wads = [10 ** 18 + 1, 3 * 10 ** 18 + 7]
+        transformer = Transformer(nb_workers=1, init_abi_map={WETH: json.dumps(WETH_ABI)}, fetch_abis=False)
+        df = transformer.traces_to_func_call_df(df=_traces_df([(1, [i]) for i in wads]), index='multi')
+
+        # block_number is a level of the index
+        self.assertEqual(first=aggregate_ints(df, [WAD], funcs=['sum']).loc[1, (WAD, 'sum')], second=sum(wads))
+
+    def test_strings_are_rejected(self):
+        with self.assertRaisesRegex(TypeError, 'the string values are not ints'):
+            int_limbs(np.array(['1', None], dtype=object))
+
+    @unittest.skipIf(arrow.pa is None, 'pyarrow is not installed')
+    def test_arrow_limbs(self):
+        values = np.array([2 ** 256 - 1, 2 ** 200, 0], dtype=object)
+        limbs, valid = int_limbs(arrow.uint256_to_limbs(values))
+        expected_limbs, _ = int_limbs(values)
+
+        np.testing.assert_array_equal(limbs, expected_limbs)
+        self.assertTrue(valid.all())
+
+        signed_values = np.array([-1, 2 ** 255 - 1, -2 ** 255, 7], dtype=object)
+        signed_limbs, _ = int_limbs(arrow.uint256_to_limbs(signed_values, signed=True))
+        np.testing.assert_array_equal(signed_limbs, int_limbs(signed_values)[0])
+
+        # the decimal strings of an arrow column are parsed
+        string_limbs, string_valid = int_limbs(arrow.pa.array(['-1', None, str(2 ** 255 - 1)]))
+        np.testing.assert_array_equal(string_limbs[string_valid], int_limbs(signed_values[:2])[0])
+        self.assertEqual(first=string_valid.tolist(), second=[True, False, True])
+
+    @unittest.skipIf(arrow.pa is None, 'pyarrow is not installed')
+    def test_int256_arrow_column(self):
+        deltas = [-2 ** 255, 5, -1]
+        transformer = Transformer(nb_workers=1, init_abi_map={WETH: json.dumps(WETH_ABI)}, fetch_abis=False)
+        tables = transformer.traces_to_func_call_df(df=_traces_df([(2, [i]) for i in deltas]), output='arrow')
+        column = tables[(WETH, 'move')]['delta']
+
+        limbs, valid = int_limbs(column)
+        self.assertTrue(valid.all())
+        np.testing.assert_array_equal(limbs, int_limbs(np.array(deltas, dtype=object))[0])
+        self.assertEqual(first=arrow.limbs_to_int(column), second=deltas)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from typing import AnyStr
+
+import numpy as np
+import pandas as pd
+
+import test.resources
+from pandas3 import arrow
+from pandas3.transformer import Transformer
+
+RESOURCE_GROUP = 'test_transformer'
+
+MINT_CONTRACT = '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7'
+
+
+def _get_resource_path(file_name: str) -> AnyStr:
+    return test.resources.get_resource_path([RESOURCE_GROUP], file_name)
+
+
+@unittest.skipIf(arrow.pa is None, 'pyarrow is not installed')
+class TestArrow(unittest.TestCase):
+    transformer = Transformer(nb_workers=1)
+
+    def test_typed_columns(self):
+        self.assertEqual(first=str(arrow.to_arrow_array(np.array([1, 2]), 'uint8').type), second='uint64')
+        self.assertEqual(
+            first=arrow.to_arrow_array(np.array(['0xF8523c551763FE4261A28313015267F163de7541'], dtype=object),
+                                       'address').to_pylist(),
+            second=[bytes.fromhex('F8523c551763FE4261A28313015267F163de7541')]
+        )
+
+        values = np.array([2 ** 256 - 1, 10 ** 20, 0], dtype=object)
+        limbs = arrow.to_arrow_array(values, 'uint256')
+        self.assertEqual(first=limbs.type.num_fields, second=4)
+        self.assertEqual(first=arrow.limbs_to_int(limbs), second=values.tolist())
+
+        signed_values = np.array([-1, 2 ** 255 - 1, -2 ** 255, 0], dtype=object)
+        signed_limbs = arrow.to_arrow_array(signed_values, 'int256')
+        self.assertEqual(first=str(signed_limbs.type.field('limb3').type), second='int64')
+        self.assertEqual(first=arrow.limbs_to_int(signed_limbs), second=signed_values.tolist())
+        self.assertEqual(first=arrow.limbs_to_int(arrow.to_arrow_array(np.array([-3, 4]), 'int128')), second=[-3, 4])
+
+        lists = arrow.to_arrow_array(np.array([[1, 2 ** 200], [], [3]], dtype=object), 'uint256[]')
+        self.assertEqual(first=lists.value_lengths().to_pylist(), second=[2, 0, 1])
+        self.assertEqual(first=arrow.limbs_to_int(lists.flatten()), second=[1, 2 ** 200, 3])
+
+    def test_read_chunks_address_predicate(self):
+        addresses = ['0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2', '0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2',
+                     '0xabEFBc9fD2F806065b4f3C237d4b59D9A97Bcac7', '0xAbefbc9fd2f806065b4f3c237d4b59d9a97bcac7']
+        table = arrow.pa.table({'contract_address': addresses, 'block_number': [1, 2, 3, 4]})
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'traces.parquet')
+            arrow.pq.write_table(table, source, row_group_size=2)
+
+            def read_blocks(contract_addresses, **kwargs):
+                return pd.concat(arrow.read_chunks(source, 10, contract_addresses=contract_addresses, **kwargs)) \
+                    .block_number.tolist()
+
+            # lower case and checksummed addresses are pushed down, any other case is matched by the fallback
+            self.assertEqual(first=read_blocks(['0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2', MINT_CONTRACT]),
+                             second=[1, 2, 3])
+            self.assertEqual(first=read_blocks([addresses[0], MINT_CONTRACT], case_insensitive=True),
+                             second=[1, 2, 3, 4])
+
+            # only the row groups of the addresses are scanned
+            fragment = next(arrow.ds.dataset(source).get_fragments())
+            row_groups = fragment.split_by_row_group(arrow._address_expression('contract_address', [MINT_CONTRACT]))
+            self.assertEqual(first=len(row_groups), second=1)
+
+    def test_parquet_round_trip(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'), dtype={'trace_address': str})
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'traces.parquet')
+            df.to_parquet(source)
+
+            results = list(self.transformer.stream_traces_to_func_call_df(
+                source=source,
+                chunksize=2,
+                output='arrow',
+                contract_addresses=[MINT_CONTRACT.lower()],
+                block_range=(11565108, 11565304)
+            ))
+            paths = arrow.write_parquet_dataset(results, os.path.join(directory, 'output'))
+            table = arrow.pq.read_table(paths[0])
+
+        mint_table = results[0][(MINT_CONTRACT, 'mint')]
+        self.assertEqual(first=len(paths), second=len(results))
+        self.assertEqual(first=str(mint_table.schema.field('data.contentHash').type), second='fixed_size_binary[32]')
+        self.assertEqual(first=arrow.limbs_to_int(mint_table['bidShares.owner.value']), second=[10 ** 20] * 2)
+        self.assertEqual(first=sorted(table['block_number'].to_pylist()), second=[11565108, 11565303])
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import unittest
+from typing import AnyStr
+
+import pandas as pd
+
+import test.resources
+from pandas3 import etherscan
+from pandas3.transformer import Transformer
+from test.stub_etherscan import StubEtherscan
+
+if etherscan.aiohttp is not None:
+    from pandas3.async_transformer import AsyncTransformer
+
+RESOURCE_GROUP = 'test_transformer'
+
+MINT_CONTRACT = '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7'
+
+
+def _get_resource_path(file_name: str) -> AnyStr:
+    return test.resources.get_resource_path([RESOURCE_GROUP], file_name)
+
+
+def _read_resource(file_name: str) -> AnyStr:
+    return test.resources.read_resource([RESOURCE_GROUP], file_name)
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@unittest.skipIf(etherscan.aiohttp is None, 'aiohttp is not installed')
+class TestAsyncTransformer(unittest.TestCase):
+
+    def test_async_get_contract_abis(self):
+        with StubEtherscan({MINT_CONTRACT: '[]'}) as stub:
+            abi_map = _run(etherscan.async_get_contract_abis(
+                [MINT_CONTRACT, '0x01', MINT_CONTRACT],
+                max_concurrency=2,
+                calls_per_second=100,
+                api_url=stub.api_url
+            ))
+
+        self.assertEqual(first=abi_map, second={MINT_CONTRACT: '[]', '0x01': None})
+        self.assertEqual(first=sorted(stub.requested_addresses), second=['0x01', MINT_CONTRACT.lower()])
+
+    def test_traces_to_func_call_df(self):
+        df = pd.read_csv(_get_resource_path('traces2.csv'))
+
+        async def decode(api_url: str) -> pd.DataFrame:
+            transformer = Transformer(nb_workers=1, etherscan_api_url=api_url, etherscan_calls_per_second=100)
+            async with AsyncTransformer(transformer) as async_transformer:
+                return await async_transformer.traces_to_func_call_df(df=df.copy())
+
+        with StubEtherscan({MINT_CONTRACT: _read_resource('trace_test_abi.json')}) as stub:
+            result_df = _run(decode(stub.api_url))
+
+        self.assertEqual(
+            first=result_df.loc['11565108_139_', f'{MINT_CONTRACT}.mint.data.tokenURI'],
+            second='https://ipfs.fleek.co/ipfs/bafybeifyqibqlheu7ij7fwdex4y2pw2wo7eaw2z6lec5zhbxu3cvxul6h4'
+        )
+        self.assertEqual(first=stub.requested_addresses, second=[MINT_CONTRACT.lower()])
+
+    def test_stream_overlaps_fetch_and_decode(self):
+        df = pd.read_csv(_get_resource_path('traces2.csv'), dtype={'trace_address': str})
+        chunks = [df.iloc[[i]] for i in range(len(df))]
+
+        async def decode(api_url: str):
+            transformer = Transformer(nb_workers=1, etherscan_api_url=api_url, etherscan_calls_per_second=100)
+            async with AsyncTransformer(transformer) as async_transformer:
+                return [i async for i in async_transformer.stream_traces_to_func_call_df(iter(chunks))]
+
+        with StubEtherscan({MINT_CONTRACT: _read_resource('trace_test_abi.json')}) as stub:
+            result_dfs = _run(decode(stub.api_url))
+
+        expected_df = Transformer(nb_workers=1, init_abi_map={MINT_CONTRACT: _read_resource('trace_test_abi.json')}) \
+            .traces_to_func_call_df(df=df.copy())
+        pd.testing.assert_frame_equal(pd.concat(result_dfs), expected_df)
+        # the abi fetched for the first chunk serves the next ones
+        self.assertEqual(first=stub.requested_addresses, second=[MINT_CONTRACT.lower()])
+
+    def test_more_contracts_than_cache_size(self):
+        abi = [{'type': 'function', 'name': 'withdraw', 'inputs': [{'name': 'wad', 'type': 'uint256'}]}]
+        addresses = [f'0x{i:040x}' for i in range(1, 31)]
+        df = pd.DataFrame({
+            'block_number': 1,
+            'tx_index': range(len(addresses)),
+            'trace_address': None,
+            'call_type': 'call',
+            'from_address': addresses[0],
+            'contract_address': addresses,
+            'input': '0x2e1a7d4d' + '0' * 63 + '1'
+        })
+
+        async def decode(api_url: str) -> pd.DataFrame:
+            transformer = Transformer(nb_workers=1, cache_size=10, etherscan_api_url=api_url,
+                                      etherscan_calls_per_second=1000)
+            async with AsyncTransformer(transformer) as async_transformer:
+                return await async_transformer.traces_to_func_call_df(df=df)
+
+        with StubEtherscan({i: json.dumps(abi) for i in addresses}) as stub:
+            result_df = _run(decode(stub.api_url))
+
+        # the fetched abi are kept for the decoding, whatever the bounded cache evicts
+        self.assertEqual(first=sorted(stub.requested_addresses), second=addresses)
+        self.assertEqual(first=result_df[f'{addresses[-1]}.withdraw.wad'].dropna().tolist(), second=[1])
+        self.assertEqual(first=len(result_df), second=len(addresses))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+
+import numpy as np
+from eth_abi import encode_abi
+from eth_utils import encode_hex, function_signature_to_4byte_selector
+from web3 import Web3
+
+from pandas3.abi_registry import CompiledContract
+from pandas3.batch_decoder import decode_function_inputs, is_static_layout, deduplicate, broadcast_batch
+
+ABI = [
+    {'type': 'function', 'name': 'withdraw', 'inputs': [{'name': 'wad', 'type': 'uint256'}]},
+    {'type': 'function', 'name': 'set', 'inputs': [
+        {'name': 'owner', 'type': 'address'},
+        {'name': 'enabled', 'type': 'bool'},
+        {'name': 'hash', 'type': 'bytes32'}
+    ]},
+    {'type': 'function', 'name': 'mint', 'inputs': [
+        {'name': 'data', 'type': 'tuple', 'components': [
+            {'name': 'uri', 'type': 'string'},
+            {'name': 'amount', 'type': 'uint8'}
+        ]}
+    ]}
+]
+
+OWNER = '0xF8523c551763FE4261A28313015267F163de7541'
+
+
+def _calldata(signature: str, types, values) -> str:
+    return encode_hex(function_signature_to_4byte_selector(signature) + encode_abi(types, values))
+
+
+class TestBatchDecoder(unittest.TestCase):
+    contract = CompiledContract(abi=ABI, codec=Web3().codec)
+
+    def test_static_layout(self):
+        self.assertTrue(is_static_layout(['address', 'uint256', 'bool', 'bytes32', 'uint8']))
+        self.assertFalse(is_static_layout(['string']))
+        self.assertFalse(is_static_layout(['int256']))
+
+    def test_decode_uint256(self):
+        func = self.contract.get_function(_calldata('withdraw(uint256)', ['uint256'], [0]))
+        inputs = [
+            _calldata('withdraw(uint256)', ['uint256'], [1]),
+            _calldata('withdraw(uint256)', ['uint256'], [2 ** 255 + 7]).upper(),
+            # non hex character
+            _calldata('withdraw(uint256)', ['uint256'], [3])[:-1] + 'z',
+            # trailing bytes fall back to eth_abi
+            _calldata('withdraw(uint256)', ['uint256'], [4]) + '00',
+        ]
+
+        batch = decode_function_inputs(func, inputs)
+
+        self.assertEqual(first=batch.mask.tolist(), second=[True, True, False, True])
+        self.assertEqual(first=list(batch.columns['wad']), second=[1, 2 ** 255 + 7, 4])
+        self.assertEqual(first=len(batch.errors), second=1)
+        self.assertEqual(first=batch.errors[0][0], second=2)
+
+    def test_decode_static_layout(self):
+        signature = 'set(address,bool,bytes32)'
+        types = ['address', 'bool', 'bytes32']
+        func = self.contract.get_function(_calldata(signature, types, [OWNER, False, b'']))
+        valid = _calldata(signature, types, [OWNER, True, b'\x01' + b'\x00' * 31])
+        # the bool is neither 0 nor 1
+        invalid = valid[:10 + 64 * 2 - 1] + '2' + valid[10 + 64 * 2:]
+
+        batch = decode_function_inputs(func, [valid, invalid])
+
+        self.assertEqual(first=batch.mask.tolist(), second=[True, False])
+        self.assertEqual(first=list(batch.columns['owner']), second=[OWNER])
+        self.assertEqual(first=list(batch.columns['enabled']), second=[True])
+        self.assertEqual(first=list(batch.columns['hash']), second=[b'\x01' + b'\x00' * 31])
+
+    def test_decode_tuple(self):
+        calldata = _calldata('mint((string,uint8))', ['(string,uint8)'], [('ipfs://a', 3)])
+        func = self.contract.get_function(calldata)
+
+        batch = decode_function_inputs(func, [calldata])
+
+        self.assertEqual(first=list(batch.columns.keys()), second=['data.uri', 'data.amount'])
+        self.assertEqual(first=list(batch.columns['data.uri']), second=['ipfs://a'])
+        self.assertEqual(first=list(batch.columns['data.amount']), second=[3])
+
+    def test_decode_projected_params(self):
+        signature = 'set(address,bool,bytes32)'
+        types = ['address', 'bool', 'bytes32']
+        valid = _calldata(signature, types, [OWNER, True, b'\x01' + b'\x00' * 31])
+        func = self.contract.get_function(valid)
+        # the bool is neither 0 nor 1, the row is invalid even if the bool is not asked
+        invalid = valid[:10 + 64 * 2 - 1] + '2' + valid[10 + 64 * 2:]
+
+        batch = decode_function_inputs(func, [valid, invalid], params={'owner'})
+        self.assertEqual(first=batch.mask.tolist(), second=[True, False])
+        self.assertEqual(first=list(batch.columns.keys()), second=['owner'])
+
+        calldata = _calldata('mint((string,uint8))', ['(string,uint8)'], [('ipfs://a', 3)])
+        batch = decode_function_inputs(self.contract.get_function(calldata), [calldata], params={'data.amount'})
+        self.assertEqual(first=list(batch.columns.keys()), second=['data.amount'])
+
+    def test_deduplicate_and_broadcast(self):
+        func = self.contract.get_function(_calldata('withdraw(uint256)', ['uint256'], [0]))
+        one = _calldata('withdraw(uint256)', ['uint256'], [1])
+        two = _calldata('withdraw(uint256)', ['uint256'], [2])
+        inputs = np.array([one, two, one, 'bad', two, 'bad', None], dtype=object)
+
+        codes, representatives = deduplicate([inputs])
+        self.assertEqual(first=representatives.tolist(), second=[0, 1, 3, 6])
+
+        batch = broadcast_batch(decode_function_inputs(func, inputs[representatives]), codes)
+        self.assertEqual(first=batch.mask.tolist(), second=[True, True, True, False, True, False, False])
+        self.assertEqual(first=list(batch.columns['wad']), second=[1, 2, 1, 2])
+        self.assertEqual(first=[i[0] for i in batch.errors], second=[3, 5, 6])
@@ -0,0 +1,83 @@
+import json
+import unittest
+from datetime import timedelta
+
+import pandas as pd
+
+import test.resources
+from pandas3.cache import make_cache, abi_size, LFUCache, TTLCache
+from pandas3.transformer import Transformer
+from test.stub_etherscan import StubEtherscan
+
+
+class TestCache(unittest.TestCase):
+
+    def test_counters(self):
+        cache = make_cache(2, policy='lfu')
+        cache['a'] = [{}]
+        cache['b'] = [{}]
+        cache.get('a')
+        cache.get('a')
+        cache.get('c')
+        cache['c'] = [{}]
+
+        self.assertIsInstance(cache, LFUCache)
+        # the least frequently used entry is evicted
+        self.assertNotIn('b', cache)
+        self.assertEqual(first={k: v for k, v in cache.stats().items() if k in ('hits', 'misses', 'evictions')},
+                         second={'hits': 2, 'misses': 1, 'evictions': 1})
+
+    def test_abi_size_budget(self):
+        abi = [{'type': 'function', 'name': 'withdraw', 'inputs': [{'name': 'wad', 'type': 'uint256'}]}]
+        cache = make_cache(10, ttl=timedelta(minutes=3), max_abi_size=abi_size(abi) * 2)
+        cache['a'] = abi
+        cache['b'] = abi
+        cache['c'] = abi
+        cache['d'] = abi * 3
+
+        self.assertIsInstance(cache, TTLCache)
+        self.assertEqual(first=list(cache.keys()), second=['b', 'c'])
+        self.assertEqual(first=cache.stats()['evictions'], second=1)
+
+    def test_abi_larger_than_budget(self):
+        abi = [{'type': 'function', 'name': 'withdraw', 'inputs': [{'name': 'wad', 'type': 'uint256'}]}]
+        address = '0x' + '1' * 40
+        df = pd.DataFrame({
+            'block_number': [1, 2], 'tx_index': [0, 0], 'trace_address': [None, None], 'call_type': ['call', 'call'],
+            'from_address': [address, address], 'contract_address': [address, address],
+            'input': ['0x2e1a7d4d' + '0' * 63 + '1'] * 2
+        })
+
+        with StubEtherscan({address: json.dumps(abi)}) as stub:
+            transformer = Transformer(nb_workers=1, cache_max_abi_size=abi_size(abi) - 1,
+                                      etherscan_api_url=stub.api_url)
+            with self.assertLogs(level='WARNING') as logs:
+                result_df = transformer.traces_to_func_call_df(df=df)
+
+        # never cached, the abi is kept by the call
+        self.assertEqual(first=stub.requested_addresses, second=[address])
+        self.assertEqual(first=result_df[f'{address}.withdraw.wad'].tolist(), second=[1, 1])
+        self.assertGreater(transformer.cache_stats()['abi']['rejections'], 0)
+        self.assertIn('larger than the cache budget', logs.output[0])
+
+    def test_capacity_with_budget(self):
+        cache = make_cache(1, max_abi_size=1000)
+        cache['a'] = []
+        cache['b'] = []
+
+        self.assertEqual(first=list(cache.keys()), second=['b'])
+
+    def test_transformer_lfu_policy(self):
+        transformer = Transformer(nb_workers=1, cache_policy='lfu')
+        self.assertIsInstance(transformer.abi_cache, LFUCache)
+        self.assertIsInstance(Transformer(nb_workers=1).abi_cache, TTLCache)
+
+    def test_transformer_cache_stats(self):
+        transformer = Transformer(nb_workers=1, cache_size=1000, cache_ttl=None)
+        df = pd.read_csv(test.resources.get_resource_path(['test_transformer'], 'traces1.csv'))
+        transformer.traces_to_func_call_df(df=df)
+
+        stats = transformer.cache_stats()
+        self.assertEqual(first=stats['contract']['size'], second=3)
+        self.assertEqual(first=stats['contract']['evictions'], second=0)
+        self.assertGreater(stats['contract']['misses'], 0)
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+import test.resources
+from pandas3.batch_decoder import StringColumn
+from pandas3.executor import make_backend, SerialBackend, ThreadBackend, ProcessBackend
+from pandas3.transformer import Transformer
+
+
+class TestExecutor(unittest.TestCase):
+
+    def test_string_column(self):
+        column = StringColumn.from_values(['0x12', None, '', '0xab'])
+
+        self.assertEqual(first=len(column), second=4)
+        self.assertEqual(first=[column[i] for i in range(4)], second=['0x12', None, '', '0xab'])
+        self.assertEqual(first=column.lengths().tolist(), second=[4, -1, 0, 4])
+
+        positions, matrix = column.fixed_width_rows(4)
+        self.assertEqual(first=positions.tolist(), second=[0, 3])
+        self.assertEqual(first=matrix.tobytes(), second=b'0x120xab')
+
+    def test_make_backend(self):
+        self.assertIsInstance(make_backend(None, 1), SerialBackend)
+        self.assertIsInstance(make_backend(None, 2), ProcessBackend)
+        self.assertIsInstance(make_backend('thread', 2), ThreadBackend)
+        self.assertEqual(first=make_backend(ProcessBackend(3, mp_context='fork'), 1).nb_workers, second=3)
+
+    def test_backends_give_same_result(self):
+        df = pd.read_csv(test.resources.get_resource_path(['test_transformer'], 'traces1.csv'))
+
+        expected = Transformer(nb_workers=1).traces_to_func_call_df(df=df.copy())
+        for backend in ('thread', ProcessBackend(2, mp_context='fork')):
+            # one row per task, so that every backend runs several tasks
+            transformer = Transformer(nb_workers=2, backend=backend, partition_size=1)
+            assert_frame_equal(left=transformer.traces_to_func_call_df(df=df.copy()), right=expected)
+
+    def test_process_backend_map(self):
+        result = ProcessBackend(2, mp_context='fork').map(np.sum, [np.arange(3), np.arange(5)])
+
+        self.assertEqual(first=result, second=[3, 10])
@@ -0,0 +1,43 @@
+import unittest
+
+import pandas as pd
+
+import test.resources
+from pandas3.failures import FailureReport
+from pandas3.transformer import Transformer
+
+RESOURCE_GROUP = 'test_transformer'
+
+
+class TestFailureReport(unittest.TestCase):
+
+    def test_sampled_logging(self):
+        report = FailureReport(max_rows=3)
+        rows = pd.DataFrame({'block_number': [1, 2], 'tx_index': [0, 0]})
+
+        with self.assertLogs(report.logger, level='WARNING') as logs:
+            for _ in range(6):
+                report.record('0xA', '0x12345678', 'deposit', [(0, 'ValueError', 'bad'), (1, 'ValueError', 'bad')],
+                              rows)
+
+        # the 1st and the 10th failure
+        self.assertEqual(first=len(logs.records), second=2)
+        self.assertEqual(first=report.total, second=12)
+        self.assertEqual(first=report.summary()[['name', 'error', 'count']].values.tolist(),
+                         second=[['deposit', 'ValueError', 12]])
+        self.assertEqual(first=len(report.failed_rows()), second=3)
+
+    def test_transformer_failures(self):
+        df = pd.read_json(test.resources.get_resource_path([RESOURCE_GROUP], 'logs1.json'))
+        abi = test.resources.read_resource([RESOURCE_GROUP], 'log_test_abi.json')
+        transformer = Transformer(nb_workers=1)
+
+        with self.assertLogs(transformer.logger, level='WARNING'):
+            transformer.logs_to_func_call_df(df=df, abi_map={'0x7be8076f4ea4a4ad08075c2508e481d6c946d12b': abi})
+
+        failed_df = transformer.failures.failed_rows()
+        self.assertEqual(first=sorted(failed_df.block_number.tolist()), second=sorted(df.block_number[[0, 4]].tolist()))
+        self.assertEqual(first=set(transformer.failures.summary().message), second={'The data is empty.'})
+
+        transformer.failures.reset()
+        self.assertEqual(first=transformer.failures.total, second=0)
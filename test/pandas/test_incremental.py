@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from typing import AnyStr
+
+import pandas as pd
+
+import test.resources
+from pandas3 import arrow
+from pandas3.incremental import FileCheckpointStore, IncrementalDecoder, ParquetResultStore
+from pandas3.transformer import Transformer
+
+RESOURCE_GROUP = 'test_transformer'
+
+MINT_CONTRACT = '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7'
+LOG_CONTRACT = '0x7be8076f4ea4a4ad08075c2508e481d6c946d12b'
+
+
+def _get_resource_path(file_name: str) -> AnyStr:
+    return test.resources.get_resource_path([RESOURCE_GROUP], file_name)
+
+
+def _read_resource(file_name: str) -> AnyStr:
+    return test.resources.read_resource([RESOURCE_GROUP], file_name)
+
+
+@unittest.skipIf(arrow.pa is None, 'pyarrow is not installed')
+class TestIncremental(unittest.TestCase):
+
+    def test_overlapping_windows(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'), dtype={'trace_address': str}).sort_values('block_number')
+        transformer = Transformer(nb_workers=1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            decoder = IncrementalDecoder(
+                transformer,
+                checkpoint_store=FileCheckpointStore(os.path.join(directory, 'checkpoints')),
+                result_store=ParquetResultStore(os.path.join(directory, 'results')),
+                reorg_window=30
+            )
+
+            # 11565108, 11565275 then 11565275 to 11565326, the block 11565275 is in the reorg window
+            self.assertEqual(first=decoder.update_traces('traces', df.iloc[:2].copy()), second=11565275)
+            self.assertEqual(first=decoder.update_traces('traces', df.copy()), second=11565326)
+            # nothing new
+            self.assertEqual(first=decoder.update_traces('traces', df.iloc[:3].copy()), second=11565326)
+
+            mint_table = decoder.result_store.read_table(MINT_CONTRACT, 'mint')
+            self.assertEqual(first=mint_table['block_number'].to_pylist(), second=[11565108, 11565275, 11565303])
+            self.assertEqual(first=FileCheckpointStore(os.path.join(directory, 'checkpoints')).get('traces'),
+                             second=11565326)
+
+    def test_sources_sharing_a_store(self):
+        traces_df = pd.read_csv(_get_resource_path('traces1.csv'), dtype={'trace_address': str}) \
+            .sort_values('block_number')
+        logs_df = pd.read_json(_get_resource_path('logs1.json'))
+        abi_map = {LOG_CONTRACT: _read_resource('log_test_abi.json')}
+
+        with tempfile.TemporaryDirectory() as directory:
+            decoder = IncrementalDecoder(
+                Transformer(nb_workers=1),
+                checkpoint_store=FileCheckpointStore(os.path.join(directory, 'checkpoints')),
+                result_store=ParquetResultStore(os.path.join(directory, 'results'))
+            )
+            decoder.update_traces('traces', traces_df)
+            # the logs are older than the traces checkpoint, their reorg window never truncates the traces
+            decoder.update_logs('logs', logs_df.iloc[:3].copy(), abi_map=abi_map)
+            decoder.update_logs('logs', logs_df.copy(), abi_map=abi_map)
+
+            store = decoder.result_store
+            self.assertEqual(first=store.read_table(MINT_CONTRACT, 'mint')['block_number'].to_pylist(),
+                             second=[11565108, 11565275, 11565303])
+            self.assertIsNone(store.read_table(MINT_CONTRACT, 'mint', source_id='logs'))
+            self.assertEqual(first=store.read_table(LOG_CONTRACT, 'OrdersMatched', source_id='logs')['block_number']
+                             .to_pylist(), second=[5779378, 5779474, 5779612])
+
+    def test_truncate(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'), dtype={'trace_address': str})
+        tables = Transformer(nb_workers=1).traces_to_func_call_df(df=df, output='arrow')
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = ParquetResultStore(directory)
+            store.append('traces', tables)
+            store.append('other', tables)
+            store.truncate('traces', 11565300)
+
+            self.assertEqual(first=store.read_table(MINT_CONTRACT, 'mint', 'traces')['block_number'].to_pylist(),
+                             second=[11565108, 11565275])
+            self.assertIsNone(store.read_table('0x1D5D9A2DDA0843ED9D8A9BDDC33F1FCA9F9C64A0', 'transferOwnership',
+                                               'traces'))
+            self.assertEqual(first=store.read_table(MINT_CONTRACT, 'mint', 'other').num_rows, second=3)
@@ -0,0 +1,111 @@
+import json
+import unittest
+
+import pandas as pd
+from eth_abi import encode_abi
+from eth_utils import encode_hex, event_abi_to_log_topic, function_abi_to_4byte_selector
+
+from pandas3.proxy import delegatecall_implementations, parent_trace_address
+from pandas3.transformer import Transformer
+
+PROXY = '0x1111111111111111111111111111111111111111'
+OTHER_PROXY = '0x2222222222222222222222222222222222222222'
+IMPLEMENTATION = '0x3333333333333333333333333333333333333333'
+RECEIVER = '0x4444444444444444444444444444444444444444'
+
+PROXY_ABI = [
+    {'type': 'function', 'name': 'upgradeTo', 'inputs': [{'name': 'implementation', 'type': 'address'}]}
+]
+IMPLEMENTATION_ABI = [
+    {'type': 'function', 'name': 'transfer', 'inputs': [
+        {'name': 'to', 'type': 'address'},
+        {'name': 'value', 'type': 'uint256'}
+    ]},
+    {'type': 'event', 'name': 'Transfer', 'anonymous': False, 'inputs': [
+        {'name': 'to', 'type': 'address', 'indexed': True},
+        {'name': 'value', 'type': 'uint256', 'indexed': False}
+    ]}
+]
+
+
+def _calldata(abi, types, values) -> str:
+    return encode_hex(function_abi_to_4byte_selector(abi) + encode_abi(types, values))
+
+
+TRANSFER = _calldata(IMPLEMENTATION_ABI[0], ['address', 'uint256'], [RECEIVER, 7])
+UPGRADE = _calldata(PROXY_ABI[0], ['address'], [IMPLEMENTATION])
+
+
+def _traces_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        'block_number': [100, 100, 101, 102, 103],
+        'tx_index': [0, 0, 0, 0, 0],
+        'trace_address': [None, '0', None, None, None],
+        'call_type': ['call', 'delegatecall', 'call', 'call', 'call'],
+        'from_address': [RECEIVER, PROXY, RECEIVER, RECEIVER, RECEIVER],
+        'contract_address': [PROXY, IMPLEMENTATION, PROXY, PROXY, OTHER_PROXY],
+        'input': [TRANSFER, TRANSFER, TRANSFER, UPGRADE, TRANSFER]
+    })
+
+
+class TestProxy(unittest.TestCase):
+
+    def test_delegatecall_implementations(self):
+        self.assertEqual(parent_trace_address(pd.Series([None, '0', '0,1,2'])).tolist(), ['', '', '0,1'])
+
+        implementations = delegatecall_implementations(_traces_df())
+        self.assertEqual(implementations[0], IMPLEMENTATION)
+        self.assertTrue(implementations[1:].isna().all())
+
+    def test_traces_and_logs_of_proxies(self):
+        transformer = Transformer(
+            nb_workers=1,
+            init_abi_map={
+                PROXY: json.dumps(PROXY_ABI),
+                OTHER_PROXY: json.dumps(PROXY_ABI),
+                IMPLEMENTATION: json.dumps(IMPLEMENTATION_ABI)
+            },
+            proxy_map={OTHER_PROXY: IMPLEMENTATION}
+        )
+
+        df = transformer.traces_to_func_call_df(df=_traces_df(), output='dict')
+
+        transfer_df = df[(PROXY, 'transfer')]
+        # the call of the second tx has no delegatecall, it is resolved by the implementation detected before
+        self.assertEqual(transfer_df.index.tolist(), ['100_0_', '101_0_'])
+        self.assertEqual(transfer_df['value'].tolist(), [7, 7])
+        self.assertEqual(df[(PROXY, 'upgradeTo')]['implementation'].tolist(), [IMPLEMENTATION])
+        self.assertEqual(df[(OTHER_PROXY, 'transfer')].index.tolist(), ['103_0_'])
+        self.assertEqual(df[(IMPLEMENTATION, 'transfer')].index.tolist(), ['100_0_0'])
+        self.assertEqual(transformer.implementations, {PROXY: IMPLEMENTATION})
+        self.assertEqual(transformer.failures.total, 0)
+
+        event_abi = IMPLEMENTATION_ABI[1]
+        logs_df = transformer.logs_to_func_call_df(df=pd.DataFrame({
+            'block_number': [104],
+            'tx_index': [0],
+            'contract_address': [PROXY],
+            'topic1': [encode_hex(event_abi_to_log_topic(event_abi))],
+            'topic2': [encode_hex(encode_abi(['address'], [RECEIVER]))],
+            'topic3': [None],
+            'topic4': [None],
+            'data': [encode_hex(encode_abi(['uint256'], [7]))]
+        }))
+        self.assertEqual(logs_df.loc['104_0', f'{PROXY}.Transfer.value'], 7)
+
+    def test_detect_proxies_off(self):
+        transformer = Transformer(
+            nb_workers=1,
+            init_abi_map={PROXY: json.dumps(PROXY_ABI), IMPLEMENTATION: json.dumps(IMPLEMENTATION_ABI)},
+            detect_proxies=False,
+            fetch_abis=False
+        )
+
+        df = transformer.traces_to_func_call_df(df=_traces_df(), output='dict')
+
+        self.assertNotIn((PROXY, 'transfer'), df)
+        self.assertEqual(transformer.implementations, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import unittest
+from typing import AnyStr
+from unittest import mock
+
+import pandas as pd
+
+import test.resources
+from pandas3 import arrow
+from pandas3.abi_store import FileAbiStore
+from pandas3.transformer import Transformer
+from test.pandas.test_proxy import IMPLEMENTATION, IMPLEMENTATION_ABI, PROXY, PROXY_ABI, _traces_df
+
+if arrow.pa is not None:
+    from pandas3.result_cache import FileResultCache
+
+RESOURCE_GROUP = 'test_transformer'
+
+MINT_CONTRACT = '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7'
+
+
+def _get_resource_path(file_name: str) -> AnyStr:
+    return test.resources.get_resource_path([RESOURCE_GROUP], file_name)
+
+
+def _read_resource(file_name: str) -> AnyStr:
+    return test.resources.read_resource([RESOURCE_GROUP], file_name)
+
+
+@unittest.skipIf(arrow.pa is None, 'pyarrow is not installed')
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = FileResultCache(os.path.join(self.directory.name, 'results'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_call(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'))
+        transformer = Transformer(nb_workers=1, result_cache=self.cache)
+
+        for output in ('wide', 'long'):
+            expected_df = transformer.traces_to_func_call_df(df=df.copy(), output=output)
+            with mock.patch.object(transformer, '_decode_function_groups', side_effect=AssertionError):
+                result_df = transformer.traces_to_func_call_df(df=df.copy(), output=output)
+            pd.testing.assert_frame_equal(result_df, expected_df)
+
+        # another input is a miss
+        result_df = transformer.traces_to_func_call_df(df=df.iloc[:2].copy())
+        self.assertEqual(first=len(result_df), second=2)
+
+    def test_changed_abi_is_a_miss(self):
+        df = pd.read_csv(_get_resource_path('traces2.csv'))
+        abi_store = FileAbiStore(os.path.join(self.directory.name, 'abi'))
+        abi_store.put(MINT_CONTRACT, _read_resource('trace_test_abi.json'))
+        Transformer(nb_workers=1, abi_store=abi_store, fetch_abis=False, result_cache=self.cache) \
+            .traces_to_func_call_df(df=df.copy())
+
+        abi_store.put(MINT_CONTRACT, '[]')
+        result_df = Transformer(nb_workers=1, abi_store=abi_store, fetch_abis=False, result_cache=self.cache) \
+            .traces_to_func_call_df(df=df.copy())
+        self.assertEqual(first=len(result_df), second=0)
+
+    def test_cached_stream(self):
+        path = os.path.join(self.directory.name, 'traces.csv')
+        pd.read_csv(_get_resource_path('traces1.csv')).to_csv(path, index=False)
+        transformer = Transformer(nb_workers=1, result_cache=self.cache)
+
+        expected_dfs = list(transformer.stream_traces_to_func_call_df(path, chunksize=2))
+        with mock.patch.object(transformer, 'traces_to_func_call_df', side_effect=AssertionError):
+            result_dfs = list(transformer.stream_traces_to_func_call_df(path, chunksize=2))
+        self.assertEqual(first=len(result_dfs), second=len(expected_dfs))
+        for result_df, expected_df in zip(result_dfs, expected_dfs):
+            pd.testing.assert_frame_equal(result_df, expected_df)
+
+        # a stream not read to the end is not cached
+        next(transformer.stream_traces_to_func_call_df(path, chunksize=3))
+        self.assertEqual(first=len(os.listdir(self.cache.directory)), second=1)
+
+    def test_learned_implementations(self):
+        def make_transformer() -> Transformer:
+            init_abi_map = {PROXY: json.dumps(PROXY_ABI), IMPLEMENTATION: json.dumps(IMPLEMENTATION_ABI)}
+            return Transformer(nb_workers=1, init_abi_map=init_abi_map, fetch_abis=False, result_cache=self.cache)
+
+        transformer = make_transformer()
+        expected_df = transformer.traces_to_func_call_df(df=_traces_df())
+        self.assertEqual(first=transformer.implementations, second={PROXY: IMPLEMENTATION})
+
+        # the implementations learned by the first call do not change the key of the second one
+        with mock.patch.object(transformer, '_decode_function_groups', side_effect=AssertionError):
+            pd.testing.assert_frame_equal(transformer.traces_to_func_call_df(df=_traces_df()), expected_df)
+
+        # a hit restores the implementations learned by its call
+        transformer = make_transformer()
+        with mock.patch.object(transformer, '_decode_function_groups', side_effect=AssertionError):
+            pd.testing.assert_frame_equal(transformer.traces_to_func_call_df(df=_traces_df()), expected_df)
+        self.assertEqual(first=transformer.implementations, second={PROXY: IMPLEMENTATION})
+
+    def test_evict(self):
+        df = pd.DataFrame({'value': range(1000)})
+        self.cache.put('first', [df], {})
+        # used long ago
+        os.utime(os.path.join(self.cache.directory, 'first', 'manifest.json'), (0, 0))
+        self.cache.max_bytes = self.cache.size() + 1
+        self.cache.put('second', [df], {})
+
+        self.assertIsNone(self.cache.get('first'))
+        pd.testing.assert_frame_equal(next(self.cache.get('second')), df)
+
+
+if __name__ == '__main__':
+    unittest.main()
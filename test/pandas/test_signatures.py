@@ -0,0 +1,140 @@
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from eth_abi import encode_abi
+from eth_utils import encode_hex, event_signature_to_log_topic, function_signature_to_4byte_selector
+
+from pandas3.signatures import SignatureDatabase, canonical_signature, parse_signature
+from pandas3.transformer import Transformer
+
+TOKEN = '0x5555555555555555555555555555555555555555'
+OTHER = '0x6666666666666666666666666666666666666666'
+RECEIVER = '0x4444444444444444444444444444444444444444'
+
+SIGNATURES = [
+    '# the preferred signature of a selector comes first',
+    'function transfer(address to,uint256 value)',
+    'transfer(address,uint256)',
+    'event Transfer(address indexed from,address indexed to,uint256 value)',
+    'function fill((address maker,uint256[] amounts)[] orders,bytes data)',
+    ''
+]
+
+TRANSFER = encode_hex(function_signature_to_4byte_selector('transfer(address,uint256)') +
+                      encode_abi(['address', 'uint256'], [RECEIVER, 7]))
+TRANSFER_TOPIC = encode_hex(event_signature_to_log_topic('Transfer(address,address,uint256)'))
+
+
+def _topic(value) -> str:
+    return encode_hex(encode_abi(['uint256'], [value])) if isinstance(value, int) \
+        else encode_hex(encode_abi(['address'], [value]))
+
+
+class TestSignatureDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = SignatureDatabase.build(SIGNATURES, self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parse_signature(self):
+        abi = parse_signature(SIGNATURES[4])
+        self.assertEqual(canonical_signature(abi), 'fill((address,uint256[])[],bytes)')
+        self.assertEqual(abi['inputs'][0]['components'][1], {'type': 'uint256[]', 'name': 'amounts'})
+        self.assertEqual(parse_signature('approve(address,uint256)')['inputs'][1]['name'], 'arg1')
+
+    def test_lookup(self):
+        self.assertEqual(len(SignatureDatabase(self.directory.name)), 3)
+        self.assertEqual(
+            self.db.lookup_functions([TRANSFER[:10], TRANSFER[:10], '0x12345678', 'bad', None]),
+            {TRANSFER[:10]: 'function transfer(address to,uint256 value)'}
+        )
+        self.assertEqual(list(self.db.lookup_events([TRANSFER_TOPIC]).keys()), [TRANSFER_TOPIC])
+
+    def test_decode_without_abi(self):
+        transformer = Transformer(nb_workers=1, signature_db=self.db, fetch_abis=False)
+
+        traces_df = transformer.traces_to_func_call_df(df=pd.DataFrame({
+            'block_number': [1, 2],
+            'tx_index': [0, 0],
+            'trace_address': [None, None],
+            'contract_address': [TOKEN, OTHER],
+            'input': [TRANSFER, '0x12345678']
+        }))
+        self.assertEqual(traces_df.loc['1_0_', f'{TOKEN}.transfer.value'], 7)
+        self.assertEqual(len(traces_df), 1)
+
+        # the same topic is an erc-20 transfer with 2 indexed params and an erc-721 transfer with 3
+        logs_df = transformer.logs_to_func_call_df(df=pd.DataFrame({
+            'block_number': [3, 4],
+            'tx_index': [0, 0],
+            'contract_address': [TOKEN, OTHER],
+            'topic1': [TRANSFER_TOPIC, TRANSFER_TOPIC],
+            'topic2': [_topic(TOKEN), _topic(TOKEN)],
+            'topic3': [_topic(RECEIVER), _topic(RECEIVER)],
+            'topic4': [None, _topic(9)],
+            'data': [encode_hex(encode_abi(['uint256'], [7])), '0x']
+        }))
+        self.assertEqual(logs_df.loc['3_0', f'{TOKEN}.Transfer.value'], 7)
+        self.assertEqual(logs_df.loc['4_0', f'{OTHER}.Transfer.value'], 9)
+        self.assertEqual(transformer.failures.total, 0)
+
+    def test_abi_first(self):
+        abi = [{'type': 'function', 'name': 'send', 'inputs': [
+            {'name': 'receiver', 'type': 'address'},
+            {'name': 'amount', 'type': 'uint256'}
+        ]}]
+        transformer = Transformer(nb_workers=1, init_abi_map={TOKEN: json.dumps(abi)}, signature_db=self.db,
+                                  fetch_abis=False)
+        send = encode_hex(function_signature_to_4byte_selector('send(address,uint256)') +
+                          encode_abi(['address', 'uint256'], [RECEIVER, 7]))
+
+        df = transformer.traces_to_func_call_df(df=pd.DataFrame({
+            'block_number': [1, 2],
+            'tx_index': [0, 0],
+            'trace_address': [None, None],
+            'contract_address': [TOKEN, TOKEN],
+            'input': [send, TRANSFER]
+        }))
+
+        self.assertEqual(df.loc['1_0_', f'{TOKEN}.send.amount'], 7)
+        self.assertEqual(df.loc['2_0_', f'{TOKEN}.transfer.to'], RECEIVER)
+
+    def test_contracts_share_the_signature_batches(self):
+        abi = [{'type': 'function', 'name': 'send', 'inputs': [{'name': 'amount', 'type': 'uint256'}]}]
+        addresses = [f'0x{i:040x}' for i in range(1, 21)] + [TOKEN]
+        df = pd.DataFrame({
+            'block_number': range(len(addresses)),
+            'tx_index': 0,
+            'trace_address': None,
+            'contract_address': addresses,
+            # the truncated input of the first contract fails
+            'input': [TRANSFER[:-2]] + [TRANSFER] * (len(addresses) - 1)
+        })
+        transformer = Transformer(nb_workers=1, init_abi_map={TOKEN: json.dumps(abi)}, signature_db=self.db,
+                                  fetch_abis=False)
+
+        with mock.patch.object(transformer, '_map_tasks', wraps=transformer._map_tasks) as map_tasks:
+            result = transformer.traces_to_func_call_df(df=df.copy(), output='dict')
+        # the rows of every contract are decoded by one batch, split by contract after decoding
+        self.assertEqual(first=len(map_tasks.call_args.args[1]), second=1)
+        self.assertEqual(first=list(result.keys()), second=[(i, 'transfer') for i in sorted(addresses[1:])])
+        self.assertEqual(first=result[(TOKEN, 'transfer')]['value'].tolist(), second=[7])
+        self.assertEqual(first=transformer.failures.summary().contract_address.tolist(), second=addresses[:1])
+
+        # the projected calls are decoded by contract, to the same frames
+        projected = transformer.traces_to_func_call_df(df=df.copy(), output='dict',
+                                                       columns=[f'{i}.transfer' for i in addresses])
+        self.assertEqual(first=list(projected.keys()), second=list(result.keys()))
+        for key, frame in result.items():
+            pd.testing.assert_frame_equal(projected[key], frame)
+        self.assertEqual(first=transformer.failures.summary()['count'].tolist(), second=[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import pstats
+import unittest
+
+import pandas as pd
+
+import test.resources
+from pandas3.stats import StageStats
+from pandas3.transformer import Transformer
+
+RESOURCE_GROUP = 'test_transformer'
+
+
+class TestStageStats(unittest.TestCase):
+
+    def test_summary(self):
+        events = []
+        stats = StageStats(callback=lambda name, event: events.append((name, event)))
+        for _ in range(2):
+            with stats.stage('decode', rows=10):
+                stats.add_worker_time(0.0, 4)
+        with stats.stage('assemble', rows=5):
+            pass
+
+        summary = stats.summary()
+        self.assertEqual(list(summary.index), ['decode', 'assemble'])
+        self.assertEqual(summary.loc['decode', 'calls'], 2)
+        self.assertEqual(summary.loc['decode', 'rows'], 20)
+        self.assertEqual(summary.loc['decode', 'worker_utilization'], 0.0)
+        self.assertTrue(pd.isna(summary.loc['assemble', 'worker_utilization']))
+        self.assertEqual([i[0] for i in events], ['decode', 'decode', 'assemble'])
+        self.assertIn('worker_utilization', events[0][1])
+        self.assertNotIn('worker_utilization', events[2][1])
+
+        stats.reset()
+        self.assertEqual(len(stats.summary()), 0)
+
+    def test_transformer_stages(self):
+        df = pd.read_csv(test.resources.get_resource_path([RESOURCE_GROUP], 'traces1.csv'))
+        events = []
+        transformer = Transformer(nb_workers=1, stats_callback=lambda name, event: events.append(name),
+                                  profiler='cprofile')
+
+        transformer.traces_to_func_call_df(df=df)
+
+        summary = transformer.stage_stats()
+        self.assertEqual(list(summary.index), ['load_abi', 'prefilter', 'decode', 'hash_index', 'to_frames',
+                                               'assemble'])
+        self.assertEqual(events, list(summary.index))
+        self.assertEqual(summary.loc['load_abi', 'rows'], len(df))
+        self.assertGreater(summary.loc['decode', 'worker_utilization'], 0)
+        self.assertGreater(pstats.Stats(transformer.stats.profile('decode')).total_calls, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from benchmark.synthetic import SyntheticChain
+from pandas3.transformer import Transformer
+
+
+class TestSyntheticChain(unittest.TestCase):
+
+    def test_traces_decode(self):
+        chain = SyntheticChain(rows=400, contracts=3, complexity='mixed', undecodable_ratio=0.1, unknown_ratio=0.5)
+        transformer = Transformer(init_abi_map=chain.abi_map, fetch_abis=False)
+        df = chain.traces()
+
+        with self.assertLogs(transformer.failures.logger, level='WARNING'):
+            result = transformer.traces_to_func_call_df(df=df)
+
+        known = df.contract_address.isin(chain.contract_addresses).sum()
+        self.assertGreater(transformer.failures.total, 0)
+        self.assertEqual(len(result) + transformer.failures.total, known)
+        self.assertEqual(chain.traces().input.tolist(), df.input.tolist())
+
+    def test_logs_decode(self):
+        chain = SyntheticChain(rows=300, contracts=2, complexity='mixed', undecodable_ratio=0, distinct_ratio=0.1)
+        transformer = Transformer(init_abi_map=chain.abi_map, fetch_abis=False)
+        df = chain.logs()
+
+        result = transformer.logs_to_func_call_df(df=df)
+
+        self.assertEqual(transformer.failures.total, 0)
+        self.assertEqual(len(result), df.contract_address.isin(chain.contract_addresses).sum())
+        self.assertLessEqual(df.data.nunique(), 3 * 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
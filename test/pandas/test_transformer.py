@@ -84,6 +84,93 @@ class TestTransformer(unittest.TestCase):
             second='https://ipfs.fleek.co/ipfs/bafybeifpxcq2hhbzuy2ich3duh7cjk4zk4czjl6ufbpmxep247ugwzsny4'
         )
 
+    def test_traces_to_func_call_df_long_output(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'))
+        df = self.transformer.traces_to_func_call_df(df=df, output='long')
+
+        mint_df = df.loc['11565108_139_'].set_index('param_path')
+        self.assertEqual(first=set(mint_df.call_name), second={'mint'})
+        self.assertEqual(
+            first=mint_df.loc['data.tokenURI', 'value'],
+            second='https://ipfs.fleek.co/ipfs/bafybeifyqibqlheu7ij7fwdex4y2pw2wo7eaw2z6lec5zhbxu3cvxul6h4'
+        )
+        self.assertEqual(first=len(df.loc[['11565326_60_']]), second=1)
+
+    def test_traces_to_func_call_df_dict_output(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'))
+        dfs = self.transformer.traces_to_func_call_df(df=df, output='dict')
+
+        mint_df = dfs[('0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7', 'mint')]
+        self.assertEqual(
+            first=mint_df.loc['11565303_29_', 'data.metadataURI'],
+            second='https://ipfs.fleek.co/ipfs/bafybeifpxcq2hhbzuy2ich3duh7cjk4zk4czjl6ufbpmxep247ugwzsny4'
+        )
+        self.assertEqual(first=mint_df.loc['11565303_29_', 'block_number'], second=11565303)
+        self.assertNotIn('newOwner', mint_df.columns)
+
+    def test_stream_traces_to_func_call_df(self):
+        chunks = list(self.transformer.stream_traces_to_func_call_df(
+            source=_get_resource_path('traces1.csv'),
+            chunksize=2,
+            contract_addresses=['0xabefbc9fd2f806065b4f3c237d4b59d9a97bcac7']
+        ))
+        df = pd.concat(chunks)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            first=df.loc['11565303_29_', '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7.mint.data.metadataURI'],
+            second='https://ipfs.fleek.co/ipfs/bafybeifpxcq2hhbzuy2ich3duh7cjk4zk4czjl6ufbpmxep247ugwzsny4'
+        )
+        self.assertFalse(any(i.startswith('0x1D5D9A2DDA0843ED9D8A9BDDC33F1FCA9F9C64A0') for i in df.columns))
+
+    def test_traces_to_func_call_df_multi_index(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'))
+        multi_df = self.transformer.traces_to_func_call_df(df=df.copy(), index='multi')
+        hash_df = self.transformer.traces_to_func_call_df(df=df.copy())
+
+        self.assertEqual(first=multi_df.index.names, second=['block_number', 'tx_index', 'trace_address'])
+        self.assertEqual(
+            first=multi_df.loc[(11565303, 29, ''), '0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7.mint.data.metadataURI'],
+            second='https://ipfs.fleek.co/ipfs/bafybeifpxcq2hhbzuy2ich3duh7cjk4zk4czjl6ufbpmxep247ugwzsny4'
+        )
+        self.assertEqual(first=Transformer.to_hash_index(multi_df.index).tolist(), second=hash_df.index.tolist())
+        self.assertNotIn('block_number', multi_df.columns)
+
+    def test_traces_to_func_call_df_allowed_calls(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'))
+        transformer = Transformer(nb_workers=1)
+        df = transformer.traces_to_func_call_df(
+            df=df,
+            allowed_calls=[('0xabefbc9fd2f806065b4f3c237d4b59d9a97bcac7', 'mint')]
+        )
+
+        self.assertEqual(first=df.index.tolist(), second=['11565108_139_', '11565303_29_', '11565275_26_'])
+        self.assertTrue(all(i.startswith('0xABEFBC9FD2F806065B4F3C237D4B59D9A97BCAC7.mint.') for i in df.columns[:-3]))
+        # the contracts out of the allow-list are not resolved
+        self.assertEqual(first=transformer.cache_stats()['contract']['size'], second=1)
+
+    def test_prefilter(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'))
+        contracts = self.transformer._cache_abi_and_contract_by_df(df=df)
+        selectors = pd.Series(['0xf2fde38b', '0x', '0xf2fde38b', None, '0x00000000'])
+        addresses = pd.Series(['0x1D5D9A2DDA0843ED9D8A9BDDC33F1FCA9F9C64A0'] * 2 + ['0x01'] * 2 +
+                              ['0x1D5D9A2DDA0843ED9D8A9BDDC33F1FCA9F9C64A0'])
+
+        mask = self.transformer._prefilter(addresses, selectors, contracts, 'functions')
+
+        self.assertEqual(first=mask.tolist(), second=[True, False, False, False, False])
+
+    def test_traces_to_func_call_df_dedup_inputs(self):
+        df = pd.read_csv(_get_resource_path('traces1.csv'))
+        df = pd.concat([df, df], ignore_index=True)
+        transformer = Transformer(nb_workers=1, dedup_inputs=True)
+
+        pd.testing.assert_frame_equal(
+            left=transformer.traces_to_func_call_df(df=df.copy()),
+            right=self.transformer.traces_to_func_call_df(df=df.copy())
+        )
+        self.assertEqual(first=transformer.dedup_stats()['hit_rate'], second=0.5)
+
     def test_logs_to_func_call_df_with_abi(self):
         df = pd.read_json(_get_resource_path('logs1.json'))
         abi = _read_resource('log_test_abi.json')
@@ -105,3 +192,30 @@ class TestTransformer(unittest.TestCase):
         )
 
         self.assertEqual(first=len(df), second=3)
+
+    def test_logs_to_func_call_df_multi_index(self):
+        df = pd.read_json(_get_resource_path('logs1.json'))
+        abi = _read_resource('log_test_abi.json')
+        df = self.transformer.logs_to_func_call_df(df=df, abi_map={'0x7be8076f4ea4a4ad08075c2508e481d6c946d12b': abi},
+                                                   index='multi')
+
+        self.assertEqual(first=df.index.names, second=['block_number', 'tx_index'])
+        self.assertEqual(
+            first=df.loc[(5779474, 83), '0x7be8076f4ea4a4ad08075c2508e481d6c946d12b.OrdersMatched.taker'],
+            second='0x0239769A1aDF4DeF9f07Da824B80B9C4fCB59593'
+        )
+
+    def test_assemble_name_parts(self):
+        index_df = pd.DataFrame({'hash_index': ['1_0_', '1_1_', '2_0_'], 'block_number': [1, 1, 2]})
+        funcall_dfs = [
+            (('0xA', 'deposit'), pd.DataFrame({'wad': [10, 30]}, index=[0, 2])),
+            (('0xB', 'transfer'), pd.DataFrame({'to': ['0xC']}, index=[1])),
+        ]
+
+        df = self.transformer._assemble_name_parts(funcall_dfs=funcall_dfs, index_df=index_df)
+
+        self.assertEqual(first=df.index.tolist(), second=['1_0_', '1_1_', '2_0_'])
+        self.assertEqual(first=df.columns.tolist(), second=['0xA.deposit.wad', '0xB.transfer.to', 'block_number'])
+        self.assertEqual(first=df.loc['2_0_', '0xA.deposit.wad'], second=30)
+        self.assertTrue(pd.isna(df.loc['1_1_', '0xA.deposit.wad']))
+        self.assertEqual(first=df.loc['1_1_', 'block_number'], second=1)
@@ -0,0 +1,49 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List
+from urllib.parse import parse_qs, urlparse
+
+
+class StubEtherscan:
+    """A local HTTP server answering the `getabi` action of the etherscan api from `abi_map`, the
+    `rate_limited_addresses` are answered by the rate limit error.
+    """
+
+    def __init__(self, abi_map: Dict[str, str], rate_limited_addresses: Iterable[str] = ()):
+        self.abi_map = {k.lower(): v for k, v in abi_map.items()}
+        self.rate_limited_addresses = {i.lower() for i in rate_limited_addresses}
+        self.requested_addresses: List[str] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                address = parse_qs(urlparse(self.path).query)['address'][0].lower()
+                stub.requested_addresses.append(address)
+                if address in stub.rate_limited_addresses:
+                    data = {'status': '0', 'message': 'NOTOK', 'result': 'Max rate limit reached'}
+                elif address in stub.abi_map:
+                    data = {'status': '1', 'message': 'OK', 'result': stub.abi_map[address]}
+                else:
+                    data = {'status': '0', 'message': 'NOTOK', 'result': 'Contract source code not verified'}
+                body = json.dumps(data).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.api_url = f'http://127.0.0.1:{self.server.server_address[1]}/api'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'StubEtherscan':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()